@@ -0,0 +1,67 @@
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    """
+    Delete expired rows from django_session in small batches.
+
+    Django's clearsessions deletes every expired row in one statement,
+    which on a large table holds its locks (and, on SQLite, the whole
+    database) for the length of the delete. Here each batch is a short
+    transaction that deletes at most --batch-size rows by primary key,
+    found through the expire_date index, with an optional pause between
+    batches so regular traffic gets through.
+
+    Usage: python manage.py clear_expired_sessions --batch-size 1000 --sleep 0.1
+    """
+    help = 'Delete expired sessions in short batched transactions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows deleted per transaction (default 1000)'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0.0,
+            help='Seconds to pause between batches (default 0)'
+        )
+        parser.add_argument(
+            '--max-batches',
+            type=int,
+            help='Stop after this many batches (default: until none are left)'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1')
+        # rows that expire while the command runs are left for the next run
+        now = timezone.now()
+        expired = Session.objects.filter(expire_date__lt=now).order_by()
+        deleted = batches = 0
+        started = time.perf_counter()
+        while options['max_batches'] is None or batches < options['max_batches']:
+            with transaction.atomic():
+                keys = list(expired.values_list('session_key', flat=True)[:batch_size])
+                if not keys:
+                    break
+                count, _ = Session.objects.filter(session_key__in=keys).delete()
+            deleted += count
+            batches += 1
+            if len(keys) < batch_size:
+                break
+            if options['sleep']:
+                time.sleep(options['sleep'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted} expired sessions in {batches} batches ({elapsed:.1f}s)'
+        ))
@@ -0,0 +1,87 @@
+"""
+AuthenticationMiddleware with the logged-in user cached between requests.
+
+Django builds request.user with a primary-key query on auth_user for every
+authenticated request. With ACCOUNT_USER_CACHE_TIMEOUT set, the user
+object is kept in the cache under its id, so a logged-in page view runs
+no auth query at all. The session hash is still checked against the
+cached user's password on every request, and anything unusual (no cached
+copy, a hash mismatch, an unknown backend) goes through the normal
+django.contrib.auth.get_user path.
+
+The cached copy is dropped when the user is saved or deleted or logs out
+(account/signals.py), which covers password, is_staff and is_active
+changes. Bulk QuerySet.update() calls send no signals; the timeout bounds
+how long such a change can go unnoticed.
+"""
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.core.cache import caches
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+from mysite import routers
+
+USER_KEY = 'account:user:{user_id}'
+
+
+def get_timeout():
+    return getattr(settings, 'ACCOUNT_USER_CACHE_TIMEOUT', 0)
+
+
+def get_cache():
+    return caches[getattr(settings, 'ACCOUNT_USER_CACHE', 'default')]
+
+
+def forget_user(user_id):
+    get_cache().delete(USER_KEY.format(user_id=user_id))
+
+
+def forget_users(user_ids):
+    get_cache().delete_many([USER_KEY.format(user_id=user_id) for user_id in user_ids])
+
+
+def get_user(request):
+    """
+    django.contrib.auth.get_user, served from the cache when possible
+    """
+    user_id = request.session.get(auth.SESSION_KEY)
+    backend_path = request.session.get(auth.BACKEND_SESSION_KEY)
+    if user_id is None or backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return auth.get_user(request)
+
+    cache = get_cache()
+    key = USER_KEY.format(user_id=user_id)
+    user = cache.get(key)
+    if user is not None:
+        session_hash = request.session.get(auth.HASH_SESSION_KEY)
+        if session_hash and constant_time_compare(
+            session_hash, user.get_session_auth_hash()
+        ):
+            user.backend = backend_path
+            return user
+
+    # the cached copy outlives this request, so load it from the primary
+    with routers.primary_reads():
+        user = auth.get_user(request)
+    if user.is_authenticated:
+        cache.set(key, user, get_timeout())
+    return user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """
+    Drop-in replacement for django.contrib.auth's AuthenticationMiddleware;
+    without ACCOUNT_USER_CACHE_TIMEOUT it behaves exactly the same
+    """
+
+    def process_request(self, request):
+        super().process_request(request)
+        if get_timeout():
+            request.user = SimpleLazyObject(lambda: self.get_user(request))
+
+    def get_user(self, request):
+        if not hasattr(request, '_cached_user'):
+            request._cached_user = get_user(request)
+        return request._cached_user
@@ -0,0 +1,32 @@
+"""
+Signal handlers for the account app. They are connected in AccountConfig.ready()
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_out
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .middleware import forget_user
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_cached_user(sender, instance, **kwargs):
+    """
+    A password, is_staff or is_active change (or a deletion) must reach
+    the next request, so the cached copy is dropped straight away and,
+    inside a transaction (admin saves are atomic), once more after commit:
+    a request in between still loads the old row and would cache it again
+    """
+    # delete() clears instance.pk before the transaction commits
+    user_id = instance.pk
+    forget_user(user_id)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: forget_user(user_id))
+
+
+@receiver(user_logged_out)
+def forget_logged_out_user(sender, request, user, **kwargs):
+    if user is not None:
+        forget_user(user.pk)
@@ -1,7 +1,17 @@
-from django.test import TestCase, Client
+from datetime import timedelta
+from io import StringIO
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import User
+from django.contrib.sessions.backends.cached_db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
 from django.urls import reverse
+from django.utils import timezone
 from .forms import UserRegistrationForm
+from .middleware import USER_KEY
 
 
 class UserRegistrationTest(TestCase):
@@ -310,3 +320,166 @@ class SecurityTest(TestCase):
             for middleware in settings.MIDDLEWARE
         )
         self.assertTrue(csrf_middleware_present)
+
+
+class SessionStorageTest(TestCase):
+    """Test cases for cache-backed sessions, cookie messages and session cleanup"""
+    
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+    
+    def session_queries(self, queries):
+        return [query for query in queries if 'django_session' in query['sql']]
+    
+    def test_authenticated_requests_do_not_read_session_table(self):
+        """Test that a logged-in page view is served from the session cache"""
+        self.client.login(username='testuser', password='testpass123')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('blog:post_list'))
+        self.assertContains(response, 'Logout (testuser)')
+        self.assertEqual(self.session_queries(queries), [])
+    
+    def test_session_survives_cache_flush(self):
+        """Test that the database copy is used when the cache is emptied"""
+        self.client.login(username='testuser', password='testpass123')
+        cache.clear()
+        response = self.client.get(reverse('blog:post_list'))
+        self.assertContains(response, 'Logout (testuser)')
+    
+    def test_messages_use_cookie_not_session(self):
+        """Test that the registration message is stored without a session write"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('register'), {
+                'username': 'newuser',
+                'email': 'newuser@example.com',
+                'password': 'testpass123',
+                'password2': 'testpass123'
+            })
+        self.assertRedirects(response, reverse('login'))
+        self.assertIn('messages', response.cookies)
+        self.assertEqual(self.session_queries(queries), [])
+        response = self.client.get(reverse('login'))
+        self.assertEqual(
+            [str(message) for message in response.context['messages']],
+            ['Registration successful! Please log in.']
+        )
+    
+    def test_clear_expired_sessions_in_batches(self):
+        """Test that only expired sessions are deleted, a batch at a time"""
+        now = timezone.now()
+        for i in range(5):
+            Session.objects.create(
+                session_key=f'expired{i}', session_data='',
+                expire_date=now - timedelta(days=1)
+            )
+        live = SessionStore()
+        live.create()
+        out = StringIO()
+        call_command('clear_expired_sessions', '--batch-size', '2', stdout=out)
+        self.assertIn('Deleted 5 expired sessions in 3 batches', out.getvalue())
+        self.assertEqual(
+            list(Session.objects.values_list('session_key', flat=True)),
+            [live.session_key]
+        )
+    
+    def test_clear_expired_sessions_max_batches(self):
+        """Test that --max-batches stops early"""
+        for i in range(3):
+            Session.objects.create(
+                session_key=f'expired{i}', session_data='',
+                expire_date=timezone.now() - timedelta(days=1)
+            )
+        call_command(
+            'clear_expired_sessions', '--batch-size', '1', '--max-batches', '2',
+            stdout=StringIO()
+        )
+        self.assertEqual(Session.objects.count(), 1)
+
+
+@override_settings(ACCOUNT_USER_CACHE_TIMEOUT=60)
+class CachedUserTest(TestCase):
+    """Test cases for the cached request.user"""
+    
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.client.login(username='testuser', password='testpass123')
+        self.url = reverse('blog:post_list')
+    
+    def user_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        return response, [query for query in queries if 'auth_user' in query['sql']]
+    
+    def test_cached_user_skips_auth_query(self):
+        """Test that only the first request loads the user"""
+        response, queries = self.user_queries()
+        self.assertEqual(len(queries), 1)
+        response, queries = self.user_queries()
+        self.assertEqual(queries, [])
+        self.assertContains(response, 'Logout (testuser)')
+    
+    @override_settings(ACCOUNT_USER_CACHE_TIMEOUT=0)
+    def test_disabled_by_default(self):
+        """Test that without a timeout every request loads the user"""
+        self.user_queries()
+        response, queries = self.user_queries()
+        self.assertEqual(len(queries), 1)
+    
+    def test_password_change_ends_session(self):
+        """Test that the session hash is still checked against the new password"""
+        self.user_queries()
+        self.user.set_password('newpass456')
+        self.user.save()
+        response, queries = self.user_queries()
+        self.assertContains(response, 'Login')
+        self.assertNotContains(response, 'Logout (testuser)')
+    
+    def test_deactivation_and_deletion(self):
+        """Test that inactive and deleted users are logged out"""
+        self.user_queries()
+        self.user.is_active = False
+        self.user.save()
+        self.assertNotContains(self.user_queries()[0], 'Logout (testuser)')
+        self.user.is_active = True
+        self.user.save()
+        self.client.login(username='testuser', password='testpass123')
+        self.user_queries()
+        self.user.delete()
+        self.assertNotContains(self.user_queries()[0], 'Logout (testuser)')
+    
+    def test_staff_change_is_seen(self):
+        """Test that promoting a user shows the admin link straight away"""
+        self.assertNotContains(self.user_queries()[0], 'Admin')
+        self.user.is_staff = True
+        self.user.save()
+        self.assertContains(self.user_queries()[0], 'Admin')
+    
+    def test_user_recached_before_commit_is_dropped(self):
+        """Test that a copy cached between the save and the commit is dropped"""
+        key = USER_KEY.format(user_id=self.user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+            # a concurrent request still sees the committed, active row
+            cache.set(key, User.objects.get(pk=self.user.pk))
+        self.assertIsNone(cache.get(key))
+    
+    def test_logout_forgets_user(self):
+        """Test that logging out drops the cached copy"""
+        self.user_queries()
+        self.assertIsNotNone(cache.get(USER_KEY.format(user_id=self.user.pk)))
+        self.client.get(reverse('logout'))
+        self.assertIsNone(cache.get(USER_KEY.format(user_id=self.user.pk)))
+
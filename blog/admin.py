@@ -1,5 +1,6 @@
 from django.contrib import admin
 from .models import Review, Comment
+from .search import filter_reviews
 
 
 @admin.register(Review)
@@ -12,6 +13,15 @@ class ReviewAdmin(admin.ModelAdmin):
     date_hierarchy = 'created_on'
     ordering = ['status', '-created_on']
 
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Use the full-text index (blog/search.py) instead of ILIKE scans
+        over search_fields, which are kept only so the search box shows
+        """
+        if not search_term:
+            return queryset, False
+        return filter_reviews(queryset, search_term), False
+
 
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
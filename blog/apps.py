@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class BlogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blog'
+
+    def ready(self):
+        # register the signal handlers in blog/signals.py
+        from . import signals  # noqa: F401
+        from .search import ensure_search_schema
+        post_migrate.connect(ensure_search_schema, sender=self)
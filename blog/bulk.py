@@ -0,0 +1,86 @@
+"""
+Helpers shared by the bulk loading commands (import_reviews,
+generate_dataset).
+
+bulk_create skips save() and signals, so these cover what save() and the
+handlers in blog/signals.py would otherwise have done: keeping supplied
+timestamps, creating taggit rows and invalidating cached pages.
+"""
+from django.db import connections, router
+from django.utils.text import slugify
+from taggit.models import Tag
+
+from . import page_cache, sidebar
+from .fields import keep_timestamps
+
+
+def bulk_create_keeping_timestamps(model, objs):
+    """
+    bulk_create `objs`, inserting the created_on / updated_on values set on
+    them instead of letting auto_now_add and auto_now replace them with the
+    current time. Every instance must have both fields set
+    """
+    with keep_timestamps():
+        return model.objects.bulk_create(objs)
+
+
+def delete_rows(queryset):
+    """
+    Delete the rows matched by `queryset` with one DELETE ... WHERE pk IN
+    (subquery). Unlike QuerySet.delete() nothing is collected first, so
+    there are no cascades and no signals: the caller deletes dependent rows
+    first and invalidates caches itself. Returns the number of rows deleted
+    """
+    model = queryset.model
+    alias = router.db_for_write(model)
+    connection = connections[alias]
+    sql, params = queryset.using(alias).order_by().values('pk').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'DELETE FROM %s WHERE %s IN (%s)' % (
+                connection.ops.quote_name(model._meta.db_table),
+                connection.ops.quote_name(model._meta.pk.column),
+                sql,
+            ),
+            params,
+        )
+        return cursor.rowcount
+
+
+def resolve_tags(names, known):
+    """
+    Add the pk of every tag name in `names` to the `known` name -> pk dict,
+    creating missing tags in bulk
+    """
+    missing = set(names) - set(known)
+    if not missing:
+        return known
+    known.update(Tag.objects.filter(name__in=missing).values_list('name', 'pk'))
+    missing -= set(known)
+    if not missing:
+        return known
+    Tag.objects.bulk_create(
+        [Tag(name=name, slug=slugify(name)) for name in missing],
+        ignore_conflicts=True
+    )
+    known.update(Tag.objects.filter(name__in=missing).values_list('name', 'pk'))
+    # names whose slug collided with an existing tag: let taggit pick a
+    # unique slug one at a time
+    for name in missing - set(known):
+        known[name] = Tag.objects.create(name=name).pk
+    return known
+
+
+def invalidate_pages(tag_ids, review_ids=()):
+    """
+    Invalidate the sidebar and purge the cached main list, the lists of
+    the given tags and the pages of the given reviews, once for a whole
+    bulk load or delete
+    """
+    sidebar.bump_version()
+    slugs = Tag.objects.filter(pk__in=set(tag_ids)).values_list('slug', flat=True)
+    page_cache.purge(
+        'list', 'sidebar',
+        *(f'tag:{slug}' for slug in slugs),
+        *(f'review:{review_id}' for review_id in review_ids),
+    )
@@ -0,0 +1,130 @@
+"""
+Validators for conditional GET (ETag / Last-Modified) on the review pages.
+
+They are computed from a single small query per page, without rendering
+anything, and fed to django.views.decorators.http.condition so a matching
+If-None-Match / If-Modified-Since gets a 304 straight away.
+
+What goes into a validator:
+- the newest updated_on of the review(s) on the page (and, on the detail
+  page, of its comments)
+- the sidebar version (blog/sidebar.py), which is bumped by every Review
+  and Comment save or delete, so deletions are caught too
+- the viewer: anonymous, or the user id plus their CSRF cookie, because
+  the detail page embeds a per-user comment form
+- the query string (page number, cursor)
+- a time bucket for relative dates ("today", "5 minutes ago")
+"""
+import functools
+import hashlib
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+
+from . import sidebar
+from .models import Review
+
+
+def viewer(request):
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return 'anon'
+    return f'{user.pk}:{request.COOKIES.get(settings.CSRF_COOKIE_NAME, "")}'
+
+
+def _relative_time_bucket(latest):
+    """
+    Return the start of the current period that relative dates on the page
+    depend on. naturaltime shows minutes for the first hour and hours for
+    the first day, so while the newest timestamp on the page is that recent
+    the validators change every minute or hour; otherwise once a day, for
+    naturalday
+    """
+    now = timezone.localtime()
+    bucket = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    if latest is not None:
+        age = timezone.now() - latest
+        if age < timedelta(hours=1):
+            bucket = now.replace(second=0, microsecond=0)
+        elif age < timedelta(days=1):
+            bucket = now.replace(minute=0, second=0, microsecond=0)
+    return bucket
+
+
+def _validators(request, key, latest, bucket, *parts):
+    """
+    Build (etag, last_modified). Last-Modified carries no notion of who is
+    viewing, so it is only sent to anonymous users
+    """
+    version = sidebar.get_version()
+    version_time = datetime.fromtimestamp(version / 1e9, tz=dt_timezone.utc)
+    last_modified = None
+    if viewer(request) == 'anon':
+        last_modified = max(filter(None, [latest, version_time, bucket]))
+    raw = '|'.join(str(part) for part in (
+        key, version, latest, bucket.isoformat(), viewer(request),
+        request.GET.urlencode(), *parts,
+    ))
+    etag = hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+    return etag, last_modified
+
+
+def _once_per_request(func):
+    """
+    condition() asks for the ETag and Last-Modified separately; remember
+    the pair on the request so the lookup query only runs once
+    """
+    @functools.wraps(func)
+    def wrapper(request, *args, **kwargs):
+        if not hasattr(request, '_blog_validators'):
+            request._blog_validators = func(request, *args, **kwargs)
+        return request._blog_validators
+    return wrapper
+
+
+@_once_per_request
+def _detail_validators(request, year, month, day, post):
+    try:
+        created_on = Review.date_lookup(year, month, day)
+    except ValueError:
+        return None, None
+    review = (
+        Review.published.filter(slug=post, **created_on)
+        .annotate(latest_comment=Max('comments__updated_on'))
+        .values('pk', 'updated_on', 'latest_comment')
+        .first()
+    )
+    if review is None:
+        return None, None
+    latest = max(filter(None, [review['updated_on'], review['latest_comment']]))
+    return _validators(
+        request, 'detail', latest,
+        _relative_time_bucket(review['latest_comment']), review['pk']
+    )
+
+
+def detail_etag(request, year, month, day, post):
+    return _detail_validators(request, year, month, day, post)[0]
+
+
+def detail_last_modified(request, year, month, day, post):
+    return _detail_validators(request, year, month, day, post)[1]
+
+
+@_once_per_request
+def _list_validators(request, tag_slug=None):
+    reviews = Review.published.all()
+    if tag_slug:
+        reviews = reviews.filter(tags__slug=tag_slug)
+    latest = reviews.aggregate(latest=Max('updated_on'))['latest']
+    return _validators(request, 'list', latest, _relative_time_bucket(None), tag_slug)
+
+
+def list_etag(request, tag_slug=None):
+    return _list_validators(request, tag_slug)[0]
+
+
+def list_last_modified(request, tag_slug=None):
+    return _list_validators(request, tag_slug)[1]
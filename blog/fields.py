@@ -0,0 +1,42 @@
+"""
+Model fields for the blog app.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import models
+
+_keep_timestamps = ContextVar('keep_timestamps', default=False)
+
+
+@contextmanager
+def keep_timestamps():
+    """
+    Inside the block, TimestampFields save the value set on the instance
+    instead of the current time. Only the current thread (or task) is
+    affected, so requests served alongside a bulk load are not
+    """
+    token = _keep_timestamps.set(True)
+    try:
+        yield
+    finally:
+        _keep_timestamps.reset(token)
+
+
+class TimestampField(models.DateTimeField):
+    """
+    DateTimeField whose auto_now / auto_now_add can be suspended with
+    keep_timestamps(), for bulk loads that supply their own times
+    """
+
+    def deconstruct(self):
+        # only the Python side differs, so migrations see a DateTimeField
+        name, path, args, kwargs = super().deconstruct()
+        return name, 'django.db.models.DateTimeField', args, kwargs
+
+    def pre_save(self, model_instance, add):
+        if _keep_timestamps.get():
+            value = getattr(model_instance, self.attname)
+            if value is not None:
+                return value
+        return super().pre_save(model_instance, add)
@@ -15,3 +15,14 @@ class CommentForm(forms.ModelForm):
             'placeholder': 'Share your thoughts on this horror film...',
             'class': 'comment-textarea'
         })
+
+
+class SearchForm(forms.Form):
+    q = forms.CharField(max_length=200, label='')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['q'].widget.attrs.update({
+            'placeholder': 'Search reviews...',
+            'class': 'search-input'
+        })
@@ -0,0 +1,86 @@
+"""
+Hole punching: per-user fragments filled into otherwise shared HTML.
+
+A template marks the parts of a page that depend on who is looking with
+
+    {% load holes %}
+    {% hole "comment_actions" comment_id=comment.id author_id=comment.user_id %}
+
+which renders only a marker comment and flags the request
+(request.has_holes). The rest of the page is then the same for every
+visitor and can be cached and shared (blog/page_cache.py).
+blog.middleware.HoleMiddleware fills the markers as the last step, cached
+or not, by rendering blog/holes/<name>.html for the current user with the
+marker's arguments. In JSON responses the fragments are escaped as string
+content.
+
+Only responses whose request was flagged are filled, and only markers
+naming one of HOLES, so a marker echoed back from user input (a form
+error, a search term) stays inert text.
+
+A view can pass extra context to its holes through request.hole_context,
+e.g. a bound comment form with errors.
+"""
+import json
+import re
+from urllib.parse import parse_qsl, urlencode
+
+from django.template.context_processors import csrf
+from django.template.loader import get_template
+
+from .forms import CommentForm
+
+MARKER = '<!--hole:{name}?{args}-->'
+MARKER_RE = re.compile(rb'<!--hole:(\w+)\?(.*?)-->')
+HOLE_TEMPLATE = 'blog/holes/{name}.html'
+HOLES = {
+    'comment_actions',
+    'comment_form',
+    'review_cta',
+    'sidebar_welcome',
+    'user_nav',
+}
+
+# context some holes need besides the marker arguments
+DEFAULTS = {
+    'comment_form': lambda: {'form': CommentForm()},
+}
+
+
+def marker(name, **kwargs):
+    if name not in HOLES:
+        raise ValueError(f'Invalid hole name: {name!r}')
+    return MARKER.format(name=name, args=urlencode(kwargs))
+
+
+def _parse_args(raw):
+    args = {}
+    for key, value in parse_qsl(raw.decode()):
+        args[key] = int(value) if value.isdigit() else value
+    return args
+
+
+def render_hole(request, name, args):
+    context = {'user': request.user, 'request': request, **csrf(request)}
+    if name in DEFAULTS:
+        context.update(DEFAULTS[name]())
+    context.update(args)
+    context.update(getattr(request, 'hole_context', {}))
+    return get_template(HOLE_TEMPLATE.format(name=name)).render(context)
+
+
+def fill(request, content, as_json=False):
+    """
+    Replace every hole marker in content (bytes) with its fragment,
+    leaving markers with unknown names as they are
+    """
+    def replace(match):
+        name = match[1].decode()
+        if name not in HOLES:
+            return match[0]
+        html = render_hole(request, name, _parse_args(match[2]))
+        if as_json:
+            html = json.dumps(html)[1:-1]
+        return html.encode()
+
+    return MARKER_RE.sub(replace, content)
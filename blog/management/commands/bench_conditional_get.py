@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from blog.models import Review
+
+
+class Command(BaseCommand):
+    """
+    Compare full renders with 304 Not Modified responses for the review
+    list and detail pages, in-process, against the configured database.
+
+    Usage: python manage.py bench_conditional_get --requests 200
+    """
+    help = 'Benchmark full responses against conditional GET 304 hits'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help='Number of requests per measurement (default 200)'
+        )
+
+    def measure(self, client, url, count, **headers):
+        statuses = set()
+        start = time.perf_counter()
+        for _ in range(count):
+            statuses.add(client.get(url, secure=True, **headers).status_code)
+        elapsed = time.perf_counter() - start
+        return elapsed / count * 1000, statuses
+
+    def handle(self, *args, **options):
+        count = options['requests']
+        review = Review.published.first()
+        if review is None:
+            raise CommandError('No published reviews to benchmark against')
+
+        client = Client(HTTP_HOST='localhost')
+        urls = {
+            'post_list': reverse('blog:post_list'),
+            'post_detail': review.get_absolute_url(),
+        }
+        for name, url in urls.items():
+            etag = client.get(url, secure=True)['ETag']
+            full_ms, full_statuses = self.measure(client, url, count)
+            hit_ms, hit_statuses = self.measure(
+                client, url, count, HTTP_IF_NONE_MATCH=etag
+            )
+            self.stdout.write(
+                f'{name}: full {full_ms:.2f} ms {sorted(full_statuses)}, '
+                f'conditional {hit_ms:.2f} ms {sorted(hit_statuses)}, '
+                f'speedup x{full_ms / hit_ms:.1f}'
+            )
@@ -0,0 +1,204 @@
+import json
+import threading
+import time
+from wsgiref.util import setup_testing_defaults
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import override_settings
+from django.urls import reverse
+
+from .bench_site import percentile
+
+MODES = ('close', 'persistent', 'pooled')
+
+
+class Command(BaseCommand):
+    """
+    Compare requests/sec for the three ways of handling database
+    connections: a new connection per request (CONN_MAX_AGE=0), persistent
+    connections per thread, and the in-process pool of mysite/db/pool.py.
+    Requests go through the full WSGI handler from several threads, so
+    connections are opened and closed exactly as under a threaded server.
+    The page cache is switched off so every request reaches the database.
+
+    The pooled mode needs DATABASE_POOL_MAX_SIZE set (PostgreSQL only) and
+    is skipped otherwise.
+
+    Usage: python manage.py bench_connections --threads 8 --requests 500
+           python manage.py bench_connections --modes close persistent
+    """
+    help = 'Benchmark per-request, persistent and pooled database connections'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=4,
+            help='Concurrent worker threads (default 4)'
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help='Measured requests per mode, over all threads (default 200)'
+        )
+        parser.add_argument(
+            '--path',
+            help='URL to request (default the review list)'
+        )
+        parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+        parser.add_argument('--output', help='Write the JSON report to this file')
+
+    def handle(self, *args, **options):
+        if options['threads'] < 1 or options['requests'] < 1:
+            raise CommandError('--threads and --requests must be at least 1')
+        path = options['path'] or reverse('blog:post_list')
+        self.handler = WSGIHandler()
+        self.settings = {alias: connections.settings[alias] for alias in connections}
+        self.original = {
+            alias: (settings_dict['CONN_MAX_AGE'], settings_dict.get('POOL'))
+            for alias, settings_dict in self.settings.items()
+        }
+        pooling = getattr(connections['default'], 'connection_pooling', False)
+        pooling = pooling and self.original['default'][1]
+
+        report = {
+            'database': connections['default'].vendor,
+            'path': path,
+            'threads': options['threads'],
+            'requests': options['requests'],
+            'modes': {},
+        }
+        try:
+            with override_settings(BLOG_PAGE_CACHE_ENABLED=False):
+                for mode in options['modes']:
+                    if mode == 'pooled' and not pooling:
+                        self.stderr.write('pooled: skipped (set DATABASE_POOL_MAX_SIZE)')
+                        continue
+                    self.configure(mode)
+                    pools = self.pools() if mode == 'pooled' else []
+                    self.run(path, options['threads'], options['threads'] * 2, pools)
+                    result = self.run(path, options['threads'], options['requests'], pools)
+                    if mode == 'pooled':
+                        result['pool'] = connections['default'].pool.stats()
+                    report['modes'][mode] = result
+                    self.stderr.write(
+                        f"{mode}: {result['throughput_rps']} req/s, p50 {result['p50_ms']} ms, "
+                        f"{result['connections_opened']} connections opened"
+                    )
+        finally:
+            for alias, (max_age, pool) in self.original.items():
+                self.settings[alias]['CONN_MAX_AGE'] = max_age
+                if pool is not None:
+                    self.settings[alias]['POOL'] = pool
+            connections.close_all()
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                handle.write(output + '\n')
+        self.stdout.write(output)
+
+    def configure(self, mode):
+        """
+        Switch every alias to the mode; each thread's connection wrapper
+        reads these settings when it connects
+        """
+        connections.close_all()
+        for alias, settings_dict in self.settings.items():
+            pool = self.original[alias][1]
+            settings_dict['CONN_MAX_AGE'] = 600 if mode == 'persistent' else 0
+            settings_dict['POOL'] = pool if mode == 'pooled' else None
+
+    def pools(self):
+        """
+        The connection pool of every pooled alias
+        """
+        pools = []
+        for alias in self.settings:
+            if getattr(connections[alias], 'connection_pooling', False):
+                pool = connections[alias].pool
+                if pool is not None:
+                    pools.append(pool)
+        return pools
+
+    def request(self, path):
+        environ = {
+            'PATH_INFO': path,
+            'HTTP_HOST': 'localhost',
+            'wsgi.url_scheme': 'https',
+        }
+        setup_testing_defaults(environ)
+        statuses = []
+        response = self.handler(environ, lambda status, headers: statuses.append(status))
+        try:
+            for _ in response:
+                pass
+        finally:
+            # sends request_finished, which closes or keeps the connection
+            response.close()
+        return statuses[0].split()[0]
+
+    def run(self, path, threads, requests, pools=()):
+        """
+        Time `requests` requests from `threads` threads. connection_created
+        is sent for every connect(), which for a pooled alias is a checkout
+        from the pool, so with `pools` the connections actually opened are
+        taken from the pools' own counters instead
+        """
+        created = sum(pool.stats()['connections_created'] for pool in pools)
+        timings, statuses = [], {}
+        opened = []
+        lock = threading.Lock()
+        remaining = iter(range(requests))
+
+        def on_connect(sender, **kwargs):
+            with lock:
+                opened.append(1)
+
+        def worker():
+            try:
+                while True:
+                    with lock:
+                        if next(remaining, None) is None:
+                            return
+                    start = time.perf_counter()
+                    status = self.request(path)
+                    elapsed = (time.perf_counter() - start) * 1000
+                    with lock:
+                        timings.append(elapsed)
+                        statuses[status] = statuses.get(status, 0) + 1
+            finally:
+                # persistent connections belong to the thread
+                connections.close_all()
+
+        connection_created.connect(on_connect)
+        try:
+            started = time.perf_counter()
+            workers = [threading.Thread(target=worker) for _ in range(threads)]
+            for thread in workers:
+                thread.start()
+            for thread in workers:
+                thread.join()
+            wall = time.perf_counter() - started
+        finally:
+            connection_created.disconnect(on_connect)
+
+        timings.sort()
+        result = {
+            'throughput_rps': round(len(timings) / wall, 1),
+            'p50_ms': round(percentile(timings, 0.50), 3),
+            'p95_ms': round(percentile(timings, 0.95), 3),
+            'p99_ms': round(percentile(timings, 0.99), 3),
+            'connections_opened': len(opened),
+            'statuses': statuses,
+        }
+        if pools:
+            result['connections_opened'] = (
+                sum(pool.stats()['connections_created'] for pool in pools) - created
+            )
+            result['pool_checkouts'] = len(opened)
+        return result
@@ -0,0 +1,235 @@
+import json
+import time
+from itertools import count
+from urllib.parse import urlencode
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from taggit.models import Tag
+
+from blog.models import Comment, Review
+from blog.views import comment_page
+
+User = get_user_model()
+
+BENCH_USERNAME = 'bench_runner'
+BENCH_PASSWORD = 'benchpass123'
+
+
+def percentile(sorted_values, fraction):
+    """
+    Nearest-rank percentile of an already sorted list
+    """
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class Command(BaseCommand):
+    """
+    Drive every URL in blog/urls.py and account/urls.py in-process against
+    the configured database and report per-scenario latency percentiles,
+    throughput and queries per request as JSON, so runs can be compared.
+
+    Meant to be run against a dataset from generate_dataset. Write
+    scenarios (posting, editing and deleting comments, registering) change
+    the database, so do not point it at production data.
+
+    Usage: python manage.py bench_site --requests 200 --output before.json
+           python manage.py bench_site --only post_list post_detail
+    """
+    help = 'Benchmark every blog and account URL and report JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=100,
+            help='Measured requests per scenario (default 100)'
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=5,
+            help='Unmeasured requests per scenario first (default 5)'
+        )
+        parser.add_argument(
+            '--query',
+            default='lighthouse',
+            help='Search term for the post_search scenario (default lighthouse)'
+        )
+        parser.add_argument('--only', nargs='+', help='Only run these scenarios')
+        parser.add_argument('--output', help='Write the JSON report to this file')
+
+    def handle(self, *args, **options):
+        review = (
+            Review.published.order_by('-comment_count', '-created_on').first()
+        )
+        if review is None:
+            raise CommandError('No published reviews (run generate_dataset first)')
+        tag = Tag.objects.annotate(n=Count('taggit_taggeditem_items')).order_by('-n').first()
+        self.user, created = User.objects.get_or_create(username=BENCH_USERNAME)
+        if created:
+            self.user.set_password(BENCH_PASSWORD)
+            self.user.save()
+        self.sequence = count()
+
+        anonymous = Client(HTTP_HOST='localhost')
+        member = Client(HTTP_HOST='localhost')
+        member.force_login(self.user)
+        leaving = Client(HTTP_HOST='localhost')
+        last_page = max(1, Review.published.count() // 3)
+        detail_url = review.get_absolute_url()
+        search_url = f"{reverse('blog:post_search')}?{urlencode({'q': options['query']})}"
+
+        scenarios = {
+            'post_list': (anonymous, 'get', lambda: reverse('blog:post_list'), None),
+            'post_list_member': (member, 'get', lambda: reverse('blog:post_list'), None),
+            'post_list_deep_page': (
+                anonymous, 'get', lambda: f"{reverse('blog:post_list')}?page={last_page}", None
+            ),
+            'post_list_by_tag': (
+                anonymous, 'get',
+                lambda: reverse('blog:post_list_by_tag', args=[tag.slug if tag else 'none']),
+                None
+            ),
+            'post_detail': (anonymous, 'get', lambda: detail_url, None),
+            'post_detail_member': (member, 'get', lambda: detail_url, None),
+            'post_comments_page': (
+                anonymous, 'get',
+                lambda: comment_page(review.pk).next_url or reverse('blog:post_comments', args=[review.pk]),
+                None
+            ),
+            'post_search': (anonymous, 'get', lambda: search_url, None),
+            'post_comment': (
+                member, 'post', lambda: reverse('blog:post_comment', args=[review.pk]),
+                lambda: {'body': 'Benchmark comment'}
+            ),
+            'edit_comment': (
+                member, 'get', lambda: reverse('blog:edit_comment', args=[self.own_comment(review)]),
+                None
+            ),
+            'edit_comment_submit': (
+                member, 'post', lambda: reverse('blog:edit_comment', args=[self.own_comment(review)]),
+                lambda: {'body': 'Edited benchmark comment'}
+            ),
+            'delete_comment': (
+                member, 'get', lambda: reverse('blog:delete_comment', args=[self.own_comment(review)]),
+                None
+            ),
+            'delete_comment_submit': (
+                member, 'post',
+                lambda: reverse('blog:delete_comment', args=[self.own_comment(review, fresh=True)]),
+                lambda: {}
+            ),
+            'login': (anonymous, 'get', lambda: reverse('login'), None),
+            'login_submit': (
+                Client(HTTP_HOST='localhost'), 'post', lambda: reverse('login'),
+                lambda: {'username': BENCH_USERNAME, 'password': BENCH_PASSWORD}
+            ),
+            'register': (anonymous, 'get', lambda: reverse('register'), None),
+            'register_submit': (
+                Client(HTTP_HOST='localhost'), 'post', lambda: reverse('register'),
+                self.registration
+            ),
+            'logout': (leaving, 'get', self.logged_in(leaving, 'logout'), None),
+        }
+        only = options['only'] or list(scenarios)
+        unknown = set(only) - set(scenarios)
+        if unknown:
+            raise CommandError(f'Unknown scenarios: {", ".join(sorted(unknown))}')
+
+        report = {
+            'database': connection.vendor,
+            'reviews': Review.objects.count(),
+            'comments': Comment.objects.count(),
+            'requests_per_scenario': options['requests'],
+            'scenarios': {},
+        }
+        for name in only:
+            client, method, url, data = scenarios[name]
+            for _ in range(options['warmup']):
+                self.request(client, method, url, data)
+            report['scenarios'][name] = self.measure(
+                client, method, url, data, options['requests']
+            )
+            result = report['scenarios'][name]
+            self.stderr.write(
+                f"{name}: p50 {result['p50_ms']} ms, p95 {result['p95_ms']} ms, "
+                f"{result['queries_per_request']} queries"
+            )
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                handle.write(output + '\n')
+        self.stdout.write(output)
+
+    def own_comment(self, review, fresh=False):
+        """
+        A comment by the benchmark user to edit or delete; deleting needs a
+        new one every time
+        """
+        comment = None
+        if not fresh:
+            comment = Comment.objects.filter(user=self.user).only('pk').first()
+        if comment is None:
+            comment = Comment.objects.create(post=review, user=self.user, body='To be deleted')
+        return comment.pk
+
+    def logged_in(self, client, url_name):
+        def url():
+            client.force_login(self.user)
+            return reverse(url_name)
+        return url
+
+    def registration(self):
+        # usernames are limited to 12 characters
+        username = f'b{time.time_ns() // 10**6 % 10**8:08d}{next(self.sequence) % 1000:03d}'
+        return {
+            'username': username,
+            'first_name': 'Bench',
+            'email': f'{username}@example.com',
+            'password': 'benchpass123',
+            'password2': 'benchpass123',
+        }
+
+    def request(self, client, method, url, data):
+        # url and data are built before the clock starts, so setup queries
+        # (e.g. creating a comment to delete) are not measured
+        path = url()
+        payload = data() if data else None
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            if method == 'get':
+                response = client.get(path, secure=True)
+            else:
+                response = client.post(path, payload, secure=True)
+            elapsed = time.perf_counter() - start
+        return elapsed, len(queries), response.status_code
+
+    def measure(self, client, method, url, data, requests):
+        timings, query_counts, statuses = [], [], {}
+        for _ in range(requests):
+            elapsed, queries, status = self.request(client, method, url, data)
+            timings.append(elapsed * 1000)
+            query_counts.append(queries)
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        timings.sort()
+        total = sum(timings)
+        return {
+            'p50_ms': round(percentile(timings, 0.50), 3),
+            'p95_ms': round(percentile(timings, 0.95), 3),
+            'p99_ms': round(percentile(timings, 0.99), 3),
+            'mean_ms': round(total / len(timings), 3),
+            'throughput_rps': round(len(timings) / (total / 1000), 1) if total else None,
+            'queries_per_request': round(sum(query_counts) / len(query_counts), 2),
+            'max_queries': max(query_counts),
+            'statuses': statuses,
+        }
@@ -0,0 +1,269 @@
+import random
+import time
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.admin.models import LogEntry
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.text import slugify
+from taggit.models import TaggedItem
+
+from account.middleware import forget_users
+from blog.bulk import bulk_create_keeping_timestamps, delete_rows, invalidate_pages, resolve_tags
+from blog.models import Comment, Review
+from blog.rendering import render_review_body
+
+User = get_user_model()
+
+USERNAME_PREFIX = 'bench_user_'
+
+ADJECTIVES = [
+    'Crimson', 'Silent', 'Hollow', 'Forgotten', 'Howling', 'Drowned',
+    'Pale', 'Burning', 'Last', 'Hungry', 'Broken', 'Endless', 'Black',
+]
+NOUNS = [
+    'House', 'Lake', 'Harvest', 'Asylum', 'Carnival', 'Orphanage',
+    'Woods', 'Lighthouse', 'Cellar', 'Chapel', 'Hotel', 'Island', 'Mask',
+]
+DIRECTORS = [
+    'John Carpenter', 'Dario Argento', 'Wes Craven', 'Ari Aster',
+    'Jennifer Kent', 'Mike Flanagan', 'Robert Eggers', 'Julia Ducournau',
+]
+WORDS = (
+    'the dread fog creeps over a house where something waits in the dark '
+    'while the score hums and every shadow hides a scream the cast sells '
+    'the terror and the final act lingers long after the credits roll'
+).split()
+
+
+def zipf_cum_weights(n, exponent):
+    """
+    Cumulative weights for random.choices: item k (1-based) is picked with
+    probability proportional to 1 / k ** exponent
+    """
+    return list(accumulate(1 / k ** exponent for k in range(1, n + 1)))
+
+
+class Command(BaseCommand):
+    """
+    Generate a reproducible synthetic dataset for benchmarking: users,
+    reviews with a Zipf-distributed tag spread, and comments concentrated
+    on a Zipf-distributed set of popular reviews, some of them inactive.
+    The same --seed always produces the same rows.
+
+    Generated users are named bench_000001 and so on and all share the
+    --password, so the benchmark runner can log in as any of them.
+
+    Usage: python manage.py generate_dataset --users 1000 --reviews 100000 --comments 1000000
+    """
+    help = 'Generate a large reproducible dataset for benchmarking'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--reviews', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=100000)
+        parser.add_argument('--tags', type=int, default=300, help='Size of the tag vocabulary')
+        parser.add_argument(
+            '--zipf',
+            type=float,
+            default=1.1,
+            help='Zipf exponent for tag and comment popularity (default 1.1)'
+        )
+        parser.add_argument(
+            '--inactive',
+            type=float,
+            default=0.1,
+            help='Fraction of comments that are inactive (default 0.1)'
+        )
+        parser.add_argument(
+            '--drafts',
+            type=float,
+            default=0.05,
+            help='Fraction of reviews that are drafts (default 0.05)'
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=3650,
+            help='Spread review dates over this many past days (default 3650)'
+        )
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--password', default='benchpass123')
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Delete a previously generated dataset first'
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now().replace(microsecond=0)
+        generated = User.objects.filter(username__startswith=USERNAME_PREFIX)
+        if options['clear']:
+            self.clear(generated)
+        elif generated.exists():
+            raise CommandError(
+                'A generated dataset already exists (use --clear to replace it)'
+            )
+
+        start = time.perf_counter()
+        user_ids = self.create_users(options['users'], options['password'])
+        reviews = self.create_reviews(user_ids, options)
+        self.create_comments(user_ids, reviews, options)
+        # bulk_create sends no signals, so invalidate cached pages once here
+        invalidate_pages(self.tag_ids.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {len(user_ids)} users, {len(reviews)} reviews and '
+            f'{options["comments"]} comments in {time.perf_counter() - start:.1f}s'
+        ))
+
+    def clear(self, users):
+        """
+        Delete the generated users with their reviews, comments and tags.
+        A cascading delete() would send post_delete (and purge caches) once
+        per row, so the rows go with one DELETE per table instead and the
+        caches are invalidated once afterwards
+        """
+        user_ids = list(users.values_list('pk', flat=True))
+        reviews = Review.objects.filter(author__in=users)
+        comments = Comment.objects.filter(Q(user__in=users) | Q(post__in=reviews))
+        tagged = TaggedItem.objects.filter(
+            content_type=ContentType.objects.get_for_model(Review),
+            object_id__in=reviews.values('pk'),
+        )
+        review_ids = list(reviews.values_list('pk', flat=True))
+        tag_ids = list(tagged.order_by().values_list('tag', flat=True).distinct())
+        with transaction.atomic():
+            # reviews outside the dataset lose the generated users' comments
+            touched = list(
+                comments.exclude(post__in=reviews).order_by()
+                .values_list('post', flat=True).distinct()
+            )
+            for queryset in (
+                tagged,
+                comments,
+                reviews,
+                User.groups.through.objects.filter(user__in=users),
+                User.user_permissions.through.objects.filter(user__in=users),
+                LogEntry.objects.filter(user__in=users),
+                users,
+            ):
+                delete_rows(queryset)
+            Review.refresh_comment_stats(touched)
+        forget_users(user_ids)
+        invalidate_pages(tag_ids, review_ids + touched)
+        self.stdout.write(f'Deleted {len(user_ids)} generated users and their reviews')
+
+    def batches(self, items):
+        for offset in range(0, len(items), self.batch_size):
+            yield items[offset:offset + self.batch_size]
+
+    def create_users(self, count, password):
+        # hashing once keeps this fast; every user shares the password
+        password_hash = make_password(password)
+        users = [
+            User(
+                username=f'{USERNAME_PREFIX}{i:06d}',
+                email=f'{USERNAME_PREFIX}{i:06d}@example.com',
+                password=password_hash,
+            )
+            for i in range(1, count + 1)
+        ]
+        for batch in self.batches(users):
+            User.objects.bulk_create(batch)
+        self.stdout.write(f'Created {count} users')
+        return list(
+            User.objects.filter(username__startswith=USERNAME_PREFIX)
+            .order_by('username').values_list('pk', flat=True)
+        )
+
+    def create_reviews(self, user_ids, options):
+        rng = self.rng
+        tag_names = [f'tag-{i:04d}' for i in range(1, options['tags'] + 1)]
+        tag_weights = zipf_cum_weights(len(tag_names), options['zipf'])
+        tag_ids = self.tag_ids = resolve_tags(tag_names, {})
+        content_type = ContentType.objects.get_for_model(Review)
+
+        reviews = []
+        for i in range(1, options['reviews'] + 1):
+            film_title = f'The {rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {i}'
+            paragraphs = [
+                ' '.join(rng.choices(WORDS, k=rng.randint(20, 120))).capitalize() + '.'
+                for _ in range(rng.randint(1, 6))
+            ]
+            body = '\n\n'.join(paragraphs)
+            created_on = self.now - timedelta(seconds=rng.randint(0, options['days'] * 86400))
+            reviews.append(Review(
+                title=f'{film_title} Review',
+                slug=slugify(film_title),
+                author_id=rng.choice(user_ids),
+                film_title=film_title,
+                year=rng.randint(1920, 2025),
+                director=rng.choice(DIRECTORS),
+                rating=rng.randint(1, 5),
+                body=body,
+                status=(
+                    Review.Status.DRAFT if rng.random() < options['drafts']
+                    else Review.Status.PUBLISHED
+                ),
+                created_on=created_on,
+                updated_on=created_on,
+                **render_review_body(body),
+            ))
+
+        created = 0
+        for batch in self.batches(reviews):
+            with transaction.atomic():
+                bulk_create_keeping_timestamps(Review, batch)
+                TaggedItem.objects.bulk_create([
+                    TaggedItem(content_type=content_type, object_id=review.pk, tag_id=tag_ids[name])
+                    for review in batch
+                    for name in set(rng.choices(tag_names, cum_weights=tag_weights, k=rng.randint(1, 4)))
+                ])
+            created += len(batch)
+            self.stdout.write(f'Created {created} reviews...')
+        return reviews
+
+    def create_comments(self, user_ids, reviews, options):
+        rng = self.rng
+        # popularity rank is independent of age, author and rating
+        ranked = rng.sample(reviews, len(reviews))
+        review_weights = zipf_cum_weights(len(ranked), options['zipf'])
+        user_weights = zipf_cum_weights(len(user_ids), options['zipf'])
+
+        created = 0
+        remaining = options['comments']
+        while remaining:
+            count = min(remaining, self.batch_size)
+            comments = []
+            for review, user_id in zip(
+                rng.choices(ranked, cum_weights=review_weights, k=count),
+                rng.choices(user_ids, cum_weights=user_weights, k=count),
+            ):
+                age = (self.now - review.created_on).total_seconds()
+                created_on = review.created_on + timedelta(seconds=rng.uniform(0, age))
+                comments.append(Comment(
+                    post_id=review.pk,
+                    user_id=user_id,
+                    body=' '.join(rng.choices(WORDS, k=rng.randint(5, 60))).capitalize() + '.',
+                    created_on=created_on,
+                    updated_on=created_on,
+                    is_active=rng.random() >= options['inactive'],
+                ))
+            with transaction.atomic():
+                bulk_create_keeping_timestamps(Comment, comments)
+            remaining -= count
+            created += count
+            self.stdout.write(f'Created {created} comments...')
+
+        for batch in self.batches([review.pk for review in reviews]):
+            Review.refresh_comment_stats(batch)
+        self.stdout.write('Refreshed comment statistics')
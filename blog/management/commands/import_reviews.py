@@ -0,0 +1,283 @@
+import csv
+import json
+import sys
+import time
+from datetime import datetime, time as dt_time, timedelta
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.text import slugify
+from taggit.models import TaggedItem
+
+from blog.bulk import bulk_create_keeping_timestamps, invalidate_pages, resolve_tags
+from blog.models import Review
+from blog.rendering import render_review_body
+
+User = get_user_model()
+
+REQUIRED_FIELDS = ['film_title', 'year', 'director', 'body']
+LIMITED_FIELDS = ['title', 'slug', 'film_title', 'director']
+
+
+class Command(BaseCommand):
+    """
+    Stream reviews from a JSONL or CSV file into the database in batches.
+
+    Each record has film_title, year, director, body and optionally rating,
+    title, slug, author (username), status (draft or published), created_on
+    and tags (a list in JSONL, a comma-separated string in CSV). Lines that
+    are not valid JSON and records missing a required field or with an
+    invalid or too long value are reported with their line number and left
+    out. Per batch the command resolves
+    authors and existing (slug, created_on date) pairs with one query each,
+    inserts the reviews with bulk_create and links tags with bulk-created
+    TaggedItem rows. Records whose slug already exists for the same day are
+    skipped, so re-running an import is safe.
+
+    Usage: python manage.py import_reviews reviews.jsonl --batch-size 2000
+           python manage.py import_reviews - --format csv < reviews.csv
+    """
+    help = 'Bulk import reviews from a JSONL or CSV file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Input file, or '-' for stdin")
+        parser.add_argument(
+            '--format',
+            choices=['jsonl', 'csv'],
+            help='Input format (default: guessed from the file extension)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of reviews per insert batch (default 1000)'
+        )
+        parser.add_argument(
+            '--author',
+            default='admin',
+            help='Username for records without an author (default admin)'
+        )
+        parser.add_argument(
+            '--create-authors',
+            action='store_true',
+            help='Create missing authors (with unusable passwords)'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        input_format = options['format'] or ('csv' if path.endswith('.csv') else 'jsonl')
+        stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        self.default_author = options['author']
+        self.create_authors = options['create_authors']
+        self.authors = {}
+        self.tags = {}
+        self.used_tags = set()
+        self.content_type = ContentType.objects.get_for_model(Review)
+
+        created = skipped = rejected = 0
+        start = time.perf_counter()
+        try:
+            records = self.read(stream, input_format)
+            while True:
+                batch = list(islice(records, options['batch_size']))
+                if not batch:
+                    break
+                batch_created, batch_skipped, batch_rejected = self.import_batch(batch)
+                created += batch_created
+                skipped += batch_skipped
+                rejected += batch_rejected
+                elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    f'{created} imported, {skipped} skipped, {rejected} rejected '
+                    f'({(created + skipped + rejected) / elapsed:.0f} rows/sec)'
+                )
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        # bulk_create sends no signals, so invalidate cached pages once here
+        if created:
+            invalidate_pages(self.used_tags)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {created} reviews, skipped {skipped}, rejected {rejected} '
+            f'in {elapsed:.1f}s '
+            f'({(created + skipped + rejected) / elapsed if elapsed else 0:.0f} rows/sec)'
+        ))
+
+    def read(self, stream, input_format):
+        """
+        (line number, record) for every record in the input
+        """
+        if input_format == 'csv':
+            reader = csv.DictReader(stream)
+            for row in reader:
+                row['tags'] = [
+                    tag.strip() for tag in (row.get('tags') or '').split(',')
+                    if tag.strip()
+                ]
+                yield reader.line_num, row
+            return
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except json.JSONDecodeError as error:
+                # reported and skipped like any other invalid record
+                yield line_number, error
+
+    def clean_row(self, row):
+        """
+        The record with year, rating and status converted, or ValueError
+        naming what is wrong with it
+        """
+        if isinstance(row, json.JSONDecodeError):
+            raise ValueError(f'invalid JSON: {row}')
+        if not isinstance(row, dict):
+            raise ValueError('not an object')
+        missing = [field for field in REQUIRED_FIELDS if not row.get(field)]
+        if missing:
+            raise ValueError(f'missing {", ".join(missing)}')
+        try:
+            row['year'] = int(row['year'])
+        except (TypeError, ValueError):
+            raise ValueError(f'invalid year: {row["year"]!r}')
+        rating = row.get('rating') or Review.Rating.THREE_STARS
+        try:
+            row['rating'] = Review.Rating(int(rating))
+        except (TypeError, ValueError):
+            raise ValueError(f'invalid rating: {rating!r}')
+        status = row.get('status') or Review.Status.PUBLISHED
+        if isinstance(status, str) and status.upper() in Review.Status.names:
+            status = Review.Status[status.upper()]
+        if status not in Review.Status.values:
+            raise ValueError(f'unknown status: {status!r}')
+        row['status'] = status
+        row['title'] = row.get('title') or f"{row['film_title']} Review"
+        row['slug'] = row.get('slug') or slugify(f"{row['film_title']}-{row['year']}")
+        # one over-long value would fail the whole batch at the database
+        for field in LIMITED_FIELDS:
+            max_length = Review._meta.get_field(field).max_length
+            if len(str(row[field])) > max_length:
+                raise ValueError(f'{field} is longer than {max_length} characters')
+        return row
+
+    def parse_created_on(self, value):
+        if not value:
+            return None
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            if day is None:
+                raise ValueError(f'invalid created_on: {value!r}')
+            parsed = datetime.combine(day, dt_time.min)
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
+
+    def resolve_authors(self, usernames):
+        missing = set(usernames) - set(self.authors)
+        if not missing:
+            return
+        for pk, username in User.objects.filter(
+                username__in=missing).values_list('pk', 'username'):
+            self.authors[username] = pk
+        missing -= set(self.authors)
+        if missing and self.create_authors:
+            new_users = []
+            for username in missing:
+                user = User(username=username)
+                user.set_unusable_password()
+                new_users.append(user)
+            User.objects.bulk_create(new_users)
+            for pk, username in User.objects.filter(
+                    username__in=missing).values_list('pk', 'username'):
+                self.authors[username] = pk
+            missing -= set(self.authors)
+        if missing:
+            raise CommandError(
+                f'Unknown authors: {", ".join(sorted(missing))} '
+                '(use --create-authors to create them)'
+            )
+
+    def import_batch(self, batch):
+        now = timezone.now()
+        records = []
+        rejected = 0
+        for line_number, row in batch:
+            try:
+                row = self.clean_row(row)
+                created_on = self.parse_created_on(row.get('created_on')) or now
+            except ValueError as error:
+                self.stderr.write(f'Line {line_number}: {error}')
+                rejected += 1
+                continue
+            records.append((row, row['slug'], created_on))
+        if not records:
+            return 0, 0, rejected
+
+        self.resolve_authors({row.get('author') or self.default_author for row, _, _ in records})
+
+        # (slug, date) pairs already in the database for this batch's slugs
+        days = [timezone.localdate(created_on) for _, _, created_on in records]
+        start = timezone.make_aware(datetime.combine(min(days), dt_time.min))
+        end = timezone.make_aware(datetime.combine(max(days) + timedelta(days=1), dt_time.min))
+        existing = {
+            (slug, timezone.localdate(created_on))
+            for slug, created_on in Review.objects.filter(
+                slug__in={slug for _, slug, _ in records},
+                created_on__gte=start,
+                created_on__lt=end,
+            ).order_by().values_list('slug', 'created_on')
+        }
+
+        reviews, review_tags = [], []
+        skipped = 0
+        for (row, slug, created_on), day in zip(records, days):
+            # earlier batches are already committed, so only duplicates
+            # within this batch need tracking in memory
+            if (slug, day) in existing:
+                skipped += 1
+                continue
+            existing.add((slug, day))
+            review = Review(
+                title=row['title'],
+                slug=slug,
+                author_id=self.authors[row.get('author') or self.default_author],
+                film_title=row['film_title'],
+                year=row['year'],
+                director=row['director'],
+                rating=row['rating'],
+                body=row['body'],
+                status=row['status'],
+                created_on=created_on,
+                updated_on=now,
+                **render_review_body(row['body']),
+            )
+            reviews.append(review)
+            review_tags.append(row.get('tags') or [])
+
+        if not reviews:
+            return 0, skipped, rejected
+
+        names = {name for tags in review_tags for name in tags}
+        resolve_tags(names, self.tags)
+        self.used_tags.update(self.tags[name] for name in names)
+        with transaction.atomic():
+            bulk_create_keeping_timestamps(Review, reviews)
+            TaggedItem.objects.bulk_create([
+                TaggedItem(
+                    content_type=self.content_type,
+                    object_id=review.pk,
+                    tag_id=self.tags[name],
+                )
+                for review, names in zip(reviews, review_tags)
+                for name in set(names)
+            ])
+        return len(reviews), skipped, rejected
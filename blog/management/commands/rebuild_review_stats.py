@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import Review
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the stored comment statistics (comment_count, last_comment_on)
+    of every review. The signal handlers keep them current for normal saves
+    and deletes, but bulk operations such as QuerySet.update() bypass
+    signals, so this command recalculates them in batches of primary keys.
+
+    Usage: python manage.py rebuild_review_stats --batch-size 1000
+    """
+    help = 'Rebuild the denormalised comment statistics on every review'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of reviews to update per transaction (default 1000)'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_pk = 0
+        updated = 0
+        while True:
+            batch = list(
+                Review.objects.filter(pk__gt=last_pk)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not batch:
+                break
+            updated += Review.refresh_comment_stats(batch)
+            last_pk = batch[-1]
+            self.stdout.write(f'Updated {updated} reviews...')
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt comment statistics for {updated} reviews'
+        ))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import Review
+from blog.rendering import backfill_rendered_fields
+
+
+class Command(BaseCommand):
+    """
+    Re-render the stored excerpt, body HTML, word count and reading time of
+    every review in batches. Run it after changing the rendering rules in
+    blog/rendering.py, or after loading rows with bulk_create, which skips
+    Review.save().
+
+    Usage: python manage.py render_reviews --batch-size 500
+    """
+    help = 'Backfill the pre-rendered excerpt and body HTML of every review'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of reviews to render per batch (default 500)'
+        )
+
+    def handle(self, *args, **options):
+        updated = backfill_rendered_fields(
+            Review,
+            batch_size=options['batch_size'],
+            stdout=self.stdout
+        )
+        self.stdout.write(self.style.SUCCESS(f'Rendered {updated} reviews'))
@@ -0,0 +1,120 @@
+import time
+
+from django.contrib.messages import get_messages
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import parse_etags
+
+from mysite import routers
+
+from . import conditional, holes, page_cache
+
+
+class HoleMiddleware:
+    """
+    Fill the per-user hole markers (see blog/holes.py) in HTML and JSON
+    responses rendered with {% hole %} tags. Must come before
+    PageCacheMiddleware, so cached pages are stored with their holes still
+    open, and after the authentication middleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            not getattr(request, 'has_holes', False)
+            or response.streaming
+            or b'<!--hole:' not in response.content
+        ):
+            return response
+        content_type = response.get('Content-Type', '')
+        response.content = holes.fill(
+            request, response.content,
+            as_json=content_type.startswith('application/json')
+        )
+        if response.has_header('Content-Length'):
+            response['Content-Length'] = str(len(response.content))
+        return response
+
+
+class PageCacheMiddleware:
+    """
+    Serve GET requests for @cacheable views that set surrogate keys (see
+    blog/page_cache.py) from the cache, and store their responses.
+
+    Cached pages are shared by every visitor, logged in or not: anything
+    that depends on the user is a hole filled in afterwards by
+    HoleMiddleware. Responses are not cached when rendering them used the
+    CSRF token, set a cookie or consumed messages, and pending messages
+    bypass the cache entirely, so per-visitor output never ends up shared.
+    Must come after the session, CSRF, authentication and messages
+    middleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def cacheable_request(self, request):
+        if not page_cache.enabled() or request.method != 'GET':
+            return False
+        # a page that would display pending messages is not shared
+        return not len(get_messages(request))
+
+    def __call__(self, request):
+        if not self.cacheable_request(request):
+            return self.get_response(request)
+
+        entry = page_cache.fetch(request)
+        if entry is not None:
+            # the view did not run, so carry over whether it rendered holes
+            request.has_holes = entry.get('has_holes', False)
+            return self.cached_response(request, entry)
+
+        started = time.time_ns()
+        request._page_cache_miss = True
+        try:
+            response = self.get_response(request)
+        finally:
+            primary_reads = getattr(request, '_page_cache_primary_reads', None)
+            if primary_reads is not None:
+                primary_reads.__exit__(None, None, None)
+        if (
+            getattr(request, 'surrogate_keys', None)
+            and response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+            and not get_messages(request).used
+        ):
+            stored = page_cache.store(request, response, started)
+            response['X-Page-Cache'] = 'MISS' if stored else 'SKIP'
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # a page stored now is served to everyone until its keys are
+        # purged, so it must not be rendered from a lagging replica; views
+        # that are never stored keep reading from the replica
+        if getattr(request, '_page_cache_miss', False) and page_cache.is_cacheable(view_func):
+            request._page_cache_primary_reads = routers.primary_reads()
+            request._page_cache_primary_reads.__enter__()
+
+    def cached_response(self, request, entry):
+        headers = dict(entry['headers'])
+        if entry['viewer'] != conditional.viewer(request):
+            # the validators were computed for whoever rendered the page,
+            # and the filled holes differ for this visitor
+            headers.pop('ETag', None)
+            headers.pop('Last-Modified', None)
+        etag = headers.get('ETag')
+        if etag and etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+            for name in ('ETag', 'Last-Modified', 'Cache-Control', 'Vary'):
+                if name in headers:
+                    response[name] = headers[name]
+        else:
+            response = HttpResponse(entry['content'], status=entry['status'])
+            for name, value in headers.items():
+                response[name] = value
+        response['X-Page-Cache'] = 'HIT'
+        return response
@@ -0,0 +1,53 @@
+# Generated by Django 5.0.7 on 2026-10-17 18:36
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_comment_stats(apps, schema_editor):
+    Review = apps.get_model('blog', 'Review')
+    Comment = apps.get_model('blog', 'Comment')
+    active = Comment.objects.filter(post=OuterRef('pk'), is_active=True)
+    Review.objects.update(
+        comment_count=Coalesce(Subquery(
+            active.order_by().values('post').annotate(
+                total=Count('pk')).values('total')
+        ), 0),
+        last_comment_on=Subquery(
+            active.order_by().values('post').annotate(
+                latest=Max('created_on')).values('latest')
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_remove_post_author_remove_post_tags_review_and_more'),
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='last_comment_on',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['status', '-comment_count', '-created_on'], name='blog_review_status_749b4e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['status', '-rating', '-created_on'], name='blog_review_status_9e1069_idx'),
+        ),
+        migrations.RunPython(populate_comment_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.0.7 on 2026-10-17 18:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_review_comment_stats'),
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['status', '-created_on', '-id'], name='blog_review_status_3f3d46_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations
+
+
+def create_search_schema(apps, schema_editor):
+    from blog.search import create_search_schema
+    create_search_schema(schema_editor.connection)
+
+
+def drop_search_schema(apps, schema_editor):
+    from blog.search import drop_search_schema
+    drop_search_schema(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+    """
+    PostgreSQL: stored weighted tsvector column with a GIN index.
+    SQLite: FTS5 external-content table kept in sync by triggers.
+    See blog/search.py for the statements.
+    """
+
+    dependencies = [
+        ('blog', '0008_review_cursor_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_schema, drop_search_schema),
+    ]
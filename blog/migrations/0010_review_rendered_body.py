@@ -0,0 +1,39 @@
+# Generated by Django 5.0.7 on 2026-10-17 18:42
+
+from django.db import migrations, models
+
+
+def render_existing_reviews(apps, schema_editor):
+    from blog.rendering import backfill_rendered_fields
+    backfill_rendered_fields(apps.get_model('blog', 'Review'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_review_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='body_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='excerpt',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='reading_time',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, help_text='Estimated reading time in minutes'),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(render_existing_reviews, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.7 on 2026-10-17 19:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0011_comment_access_indexes'),
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['slug', 'status', 'created_on'], name='blog_review_slug_0ff383_idx'),
+        ),
+        migrations.AlterField(
+            model_name='review',
+            name='slug',
+            field=models.SlugField(db_index=False, max_length=210, unique_for_date='created_on'),
+        ),
+    ]
@@ -1,10 +1,17 @@
 """ imports """
+from datetime import date, datetime, time, timedelta
+
 from django.conf import settings
-from django.db import models
-from django.db.models import Count, Avg
+from django.db import models, transaction
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.urls import reverse
+from django.utils import timezone
 from taggit.managers import TaggableManager
 
+from .fields import TimestampField
+from .rendering import RENDERED_FIELDS, render_review_body
+
 
 class PublishedManager(models.Manager):
     """
@@ -18,11 +25,19 @@ class PublishedManager(models.Manager):
         return super().get_queryset().filter(status=Review.Status.PUBLISHED)
 
     def most_commented(self):
-        return self.get_queryset().annotate(comment_count=Count(
-            'comments')).order_by('-comment_count')[:3]
+        """
+        comment_count is a stored counter (see Review.refresh_comment_stats)
+        so this is a plain indexed ORDER BY ... LIMIT instead of a GROUP BY
+        over the whole comments table
+        """
+        return self.get_queryset().order_by('-comment_count', '-created_on')[:3]
 
     def highest_rated(self):
-        return self.get_queryset().annotate(avg_rating=Avg('rating')).order_by('-avg_rating')[:5]
+        """
+        A review carries a single rating, so the old Avg('rating') per review
+        was always equal to the stored rating column itself
+        """
+        return self.get_queryset().order_by('-rating', '-created_on')[:5]
 
 
 class Review(models.Model):
@@ -39,9 +54,11 @@ class Review(models.Model):
         FIVE_STARS = 5, '⭐⭐⭐⭐⭐'
 
     title = models.CharField(max_length=200, help_text="Film title")
+    # indexed together with created_on in Meta.indexes
     slug = models.SlugField(
         max_length=210,
-        unique_for_date='created_on'
+        unique_for_date='created_on',
+        db_index=False
     )
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -58,13 +75,25 @@ class Review(models.Model):
     )
     body = models.TextField(help_text="Your review")
     tags = TaggableManager(help_text="Tags like 'slasher', 'psychological', 'gore', etc.")
-    created_on = models.DateTimeField(auto_now_add=True)
-    updated_on = models.DateTimeField(auto_now=True)
+    created_on = TimestampField(auto_now_add=True)
+    updated_on = TimestampField(auto_now=True)
     status = models.CharField(
         max_length=2,
         choices=Status,
         default=Status.DRAFT
     )
+    # denormalised comment statistics, kept up to date by blog/signals.py
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    last_comment_on = models.DateTimeField(null=True, blank=True, editable=False)
+    # pre-rendered from body on save, see blog/rendering.py
+    excerpt = models.TextField(blank=True, editable=False)
+    body_html = models.TextField(blank=True, editable=False)
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    reading_time = models.PositiveSmallIntegerField(
+        default=0,
+        editable=False,
+        help_text="Estimated reading time in minutes"
+    )
     # the default manager   ie Review.objects.all()
     objects = models.Manager()
     # our custom manager   ie Review.published.all()
@@ -81,18 +110,80 @@ class Review(models.Model):
         indexes = [
             models.Index(fields=['-updated_on']),
             models.Index(fields=['rating']),
+            models.Index(fields=['status', '-comment_count', '-created_on']),
+            models.Index(fields=['status', '-rating', '-created_on']),
+            # keyset pagination order, see blog/pagination.py
+            models.Index(fields=['status', '-created_on', '-id']),
+            # detail page lookup, see Review.date_lookup
+            models.Index(fields=['slug', 'status', 'created_on']),
         ]
 
     def __str__(self):
         return f'{self.film_title} ({self.year}) - {self.get_rating_display()}'
 
+    def save(self, *args, **kwargs):
+        """
+        Render the excerpt, body HTML and reading statistics whenever the
+        body is written, so list pages never need to load the body itself
+        """
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'body' in update_fields:
+            for field, value in render_review_body(self.body).items():
+                setattr(self, field, value)
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | set(RENDERED_FIELDS)
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def date_lookup(year, month, day):
+        """
+        Filter arguments matching reviews created on the given day, as a
+        half-open range on created_on that an index can serve. The day is
+        taken in the current time zone, like unique_for_date and the
+        created_on__year/__month/__day lookups this replaces. Raises
+        ValueError for dates that do not exist
+        """
+        try:
+            start = datetime.combine(date(year, month, day), time.min)
+            end = start + timedelta(days=1)
+        except OverflowError as error:
+            raise ValueError(str(error)) from error
+        return {
+            'created_on__gte': timezone.make_aware(start),
+            'created_on__lt': timezone.make_aware(end),
+        }
+
+    @classmethod
+    def refresh_comment_stats(cls, review_ids):
+        """
+        Recalculate the stored comment statistics for the given reviews.
+        This runs as a single UPDATE with correlated subqueries so the
+        counters are always consistent with the active comments at the time
+        of the write, no matter how many comments are added at once.
+        QuerySet.update() also leaves updated_on alone, so refreshing the
+        counters does not reorder the review list.
+        """
+        active = Comment.objects.filter(post=OuterRef('pk'), is_active=True)
+        with transaction.atomic():
+            return cls.objects.filter(pk__in=review_ids).update(
+                comment_count=Coalesce(Subquery(
+                    active.order_by().values('post').annotate(
+                        total=Count('pk')).values('total')
+                ), 0),
+                last_comment_on=Subquery(
+                    active.order_by().values('post').annotate(
+                        latest=Max('created_on')).values('latest')
+                ),
+            )
+
     def get_absolute_url(self):
+        created_on = timezone.localtime(self.created_on)
         return reverse(
             "blog:post_detail",
             args=[
-                self.created_on.year,
-                self.created_on.month,
-                self.created_on.day,
+                created_on.year,
+                created_on.month,
+                created_on.day,
                 self.slug
             ]
         )
@@ -100,25 +191,50 @@ class Review(models.Model):
 
 class Comment(models.Model):
 
+    # the composite indexes in Meta lead with post and user, so the
+    # single-column foreign key indexes would only slow down writes
     post = models.ForeignKey(
         Review,
         on_delete=models.CASCADE,
-        related_name="comments"
+        related_name="comments",
+        db_index=False
     )
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False
     )
     body = models.TextField(max_length=800)
-    created_on = models.DateTimeField(auto_now_add=True)
-    updated_on = models.DateTimeField(auto_now=True)
+    created_on = TimestampField(auto_now_add=True)
+    updated_on = TimestampField(auto_now=True)
     is_active = models.BooleanField(default=True)
 
     class Meta:
         ordering = ['created_on']
         indexes = [
             models.Index(fields=['created_on']),
+            # a review's visible comments in page order, and the stored
+            # comment statistics (count / latest) over the same rows
+            models.Index(
+                fields=['post', 'created_on', 'id'],
+                condition=models.Q(is_active=True),
+                name='blog_comment_post_active_idx',
+            ),
+            # the newest updated_on per review for the detail page ETag,
+            # and cascading deletes of a review's comments
+            models.Index(fields=['post', 'updated_on'], name='blog_comment_post_updated_idx'),
+            # a user's comments, newest first
+            models.Index(fields=['user', 'created_on'], name='blog_comment_user_created_idx'),
         ]
 
     def __str__(self):
         return f'Comment by {self.user.username} on {self.post.film_title}'
+
+    def save(self, *args, **kwargs):
+        """
+        The review's comment statistics are refreshed by a post_save signal
+        (blog/signals.py); wrapping the save keeps both writes in one
+        transaction
+        """
+        with transaction.atomic():
+            super().save(*args, **kwargs)
@@ -0,0 +1,159 @@
+"""
+Full-page cache, purged by surrogate keys.
+
+A view opts in with the @cacheable decorator and by naming what its page
+depends on with add_surrogate_keys(request, ...):
+
+    review:<id>   a review shown on the page (its fields, tags, comments)
+    tag:<slug>    a tag-filtered list
+    list          the main review list (any published review can move it)
+    sidebar       the "Most Commented" / "Highest Rated" sidebar
+
+Every surrogate key has a version in the cache: a nanosecond timestamp
+that purge() replaces. A cached page records the version of each of its
+keys when it was stored and is only served while all of them are
+unchanged, so a purge invalidates exactly the pages carrying that key and
+nothing else. blog/signals.py purges on Review and Comment changes; the
+sidebar key only when the rendered sidebar actually changes.
+
+Cached pages are shared between all visitors, so the templates of these
+views must not use `user` (or anything else per-visitor) outside a
+{% hole %} (blog/holes.py).
+
+The cache is used by blog.middleware.PageCacheMiddleware.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from . import conditional, sidebar
+
+PAGE_KEY = 'blog:page:{digest}'
+VERSION_KEY = 'blog:page:version:{key}'
+SIDEBAR_DIGEST_KEY = 'blog:page:sidebar-digest'
+
+
+def enabled():
+    return getattr(settings, 'BLOG_PAGE_CACHE_ENABLED', True)
+
+
+def get_cache():
+    return caches[getattr(settings, 'BLOG_PAGE_CACHE', 'default')]
+
+
+def cacheable(view):
+    """
+    Mark a view (function or class) whose responses may be stored, so
+    PageCacheMiddleware renders it from the primary database
+    """
+    view.page_cacheable = True
+    return view
+
+
+def is_cacheable(view_func):
+    view_class = getattr(view_func, 'view_class', None)
+    return getattr(view_func, 'page_cacheable', False) or getattr(
+        view_class, 'page_cacheable', False
+    )
+
+
+def add_surrogate_keys(request, *keys):
+    """
+    Mark the response to this request as cacheable under the given keys
+    """
+    if not hasattr(request, 'surrogate_keys'):
+        request.surrogate_keys = set()
+    request.surrogate_keys.update(keys)
+
+
+def review_keys(reviews):
+    return [f'review:{review.pk}' for review in reviews]
+
+
+def page_key(request):
+    raw = f'{request.scheme}://{request.get_host()}{request.get_full_path()}'
+    return PAGE_KEY.format(digest=hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest())
+
+
+def purge(*keys):
+    """
+    Invalidate every cached page carrying any of the given keys
+    """
+    if not enabled():
+        return
+    stamp = time.time_ns()
+    get_cache().set_many(
+        {VERSION_KEY.format(key=key): stamp for key in keys}, None
+    )
+
+
+def sync_sidebar():
+    """
+    Purge the sidebar key only if the sidebar now renders differently, so
+    the usual comment or edit does not invalidate every page on the site
+    """
+    if not enabled():
+        return
+    html = sidebar.get_sidebar()['html']
+    digest = hashlib.md5(html.encode(), usedforsecurity=False).hexdigest()
+    cache = get_cache()
+    if cache.get(SIDEBAR_DIGEST_KEY) != digest:
+        cache.set(SIDEBAR_DIGEST_KEY, digest, None)
+        purge('sidebar')
+
+
+def fetch(request):
+    """
+    Return the cached page entry for this request if none of its surrogate
+    keys were purged since it was stored
+    """
+    cache = get_cache()
+    entry = cache.get(page_key(request))
+    if entry is None:
+        return None
+    names = [VERSION_KEY.format(key=key) for key in entry['versions']]
+    current = cache.get_many(names)
+    for name, version in zip(names, entry['versions'].values()):
+        if current.get(name) != version:
+            return None
+    return entry
+
+
+def store(request, response, started):
+    """
+    Cache the response under the request's surrogate keys. `started` is
+    the version stamp taken before the view ran: if a key was purged after
+    that, the page may show data from before the purge and is not stored
+    """
+    cache = get_cache()
+    keys = sorted(request.surrogate_keys)
+    names = [VERSION_KEY.format(key=key) for key in keys]
+    current = cache.get_many(names)
+    versions = {}
+    for key, name in zip(keys, names):
+        version = current.get(name)
+        if version is None:
+            # never purged or evicted: start the key at this request
+            cache.add(name, started, None)
+            version = cache.get(name)
+        if version is None or version > started:
+            return False
+        versions[key] = version
+    cache.set(
+        page_key(request),
+        {
+            'content': response.content,
+            'status': response.status_code,
+            'headers': [
+                (name, value) for name, value in response.items()
+                if name.lower() != 'set-cookie'
+            ],
+            'versions': versions,
+            'viewer': conditional.viewer(request),
+            'has_holes': getattr(request, 'has_holes', False),
+        },
+        getattr(settings, 'BLOG_PAGE_CACHE_TIMEOUT', 60),
+    )
+    return True
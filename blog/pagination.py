@@ -0,0 +1,157 @@
+"""
+Keyset (cursor) pagination.
+
+Django's Paginator runs a COUNT(*) and then OFFSET n, so deep pages get
+slower the further in they are, and rows shift between pages when the
+ordering column changes. CursorPaginator instead remembers the ordering
+values of the last row on a page and asks for the rows after it:
+
+    WHERE (created_on, id) < (:created_on, :id)
+    ORDER BY created_on DESC, id DESC LIMIT per_page + 1
+
+which is a single index range scan whatever the page. There is no total
+count, so a CursorPage only knows whether a next/previous page exists.
+Cursors are opaque url-safe strings.
+"""
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class CursorPage:
+    """
+    A page of results from CursorPaginator. It exposes the parts of
+    django.core.paginator.Page that pagination.html relies on
+    """
+    is_cursor_page = True
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self.object_list)} items>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Paginate a queryset by a unique ordering, e.g. ('-created_on', '-id').
+    All ordering fields must sort in the same direction and the last one
+    must be unique so every row has a distinct position
+    """
+
+    def __init__(self, queryset, per_page, ordering=('-created_on', '-id')):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.fields = [name.lstrip('-') for name in self.ordering]
+        self.descending = self.ordering[0].startswith('-')
+        if any(name.startswith('-') != self.descending for name in self.ordering):
+            raise ValueError('All cursor ordering fields must share a direction')
+
+    def encode_cursor(self, obj, direction):
+        model = self.queryset.model
+        values = [
+            model._meta.get_field(name).value_to_string(obj)
+            for name in self.fields
+        ]
+        payload = json.dumps({'d': direction, 'v': values}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            direction, values = payload['d'], payload['v']
+            if direction not in ('n', 'p') or len(values) != len(self.fields):
+                raise ValueError(cursor)
+            model = self.queryset.model
+            values = [
+                model._meta.get_field(name).to_python(value)
+                for name, value in zip(self.fields, values)
+            ]
+        except (TypeError, ValueError, KeyError, ValidationError) as error:
+            raise InvalidCursor(cursor) from error
+        return direction, values
+
+    def _after(self, values, forward):
+        """
+        Build the row-value comparison (a, b) < (x, y) as
+        a < x OR (a = x AND b < y), which every backend can run against a
+        composite index
+        """
+        lookup = 'lt' if forward == self.descending else 'gt'
+        condition = Q()
+        for i, name in enumerate(self.fields):
+            clause = Q(**{f'{name}__{lookup}': values[i]})
+            for prev_name, prev_value in zip(self.fields[:i], values[:i]):
+                clause &= Q(**{prev_name: prev_value})
+            condition |= clause
+        return condition
+
+    def page(self, cursor=None):
+        """
+        Return the CursorPage after (or before) the given cursor; a missing
+        or invalid cursor returns the first page
+        """
+        direction, values = 'n', None
+        if cursor:
+            try:
+                direction, values = self.decode_cursor(cursor)
+            except InvalidCursor:
+                direction, values = 'n', None
+
+        forward = direction == 'n'
+        queryset = self.queryset
+        if values is not None:
+            queryset = queryset.filter(self._after(values, forward))
+        if forward:
+            queryset = queryset.order_by(*self.ordering)
+        else:
+            queryset = queryset.order_by(*[
+                name[1:] if name.startswith('-') else f'-{name}'
+                for name in self.ordering
+            ])
+
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not forward:
+            rows.reverse()
+        if not rows:
+            return CursorPage(rows)
+
+        if forward:
+            has_next, has_previous = has_more, values is not None
+        else:
+            has_next, has_previous = True, has_more
+        return CursorPage(
+            rows,
+            next_cursor=self.encode_cursor(rows[-1], 'n') if has_next else None,
+            previous_cursor=self.encode_cursor(rows[0], 'p') if has_previous else None,
+        )
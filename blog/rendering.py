@@ -0,0 +1,60 @@
+"""
+Pre-rendered review text.
+
+The list page used to run {{ post.body|truncatewords:50|linebreaks }} on
+every card, which meant loading the whole body column and re-tokenising it
+on every request. These fields are now produced once, when a review is
+saved, and the list queryset defers body entirely.
+"""
+import math
+
+from django.utils.html import linebreaks
+from django.utils.text import Truncator
+
+EXCERPT_WORDS = 50
+WORDS_PER_MINUTE = 200
+
+RENDERED_FIELDS = ['excerpt', 'body_html', 'word_count', 'reading_time']
+
+
+def render_review_body(body):
+    """
+    Return the derived field values for a review body. The HTML matches the
+    truncatewords and linebreaks template filters with autoescaping on
+    """
+    word_count = len(body.split())
+    return {
+        'excerpt': linebreaks(
+            Truncator(body).words(EXCERPT_WORDS, truncate=' …'),
+            autoescape=True
+        ),
+        'body_html': linebreaks(body, autoescape=True),
+        'word_count': word_count,
+        'reading_time': max(1, math.ceil(word_count / WORDS_PER_MINUTE)),
+    }
+
+
+def backfill_rendered_fields(model, batch_size=500, stdout=None):
+    """
+    Render the derived fields of every row of `model` (the Review model, or
+    its historical version inside a migration) in batches of primary keys
+    """
+    last_pk = 0
+    updated = 0
+    while True:
+        batch = list(
+            model.objects.filter(pk__gt=last_pk)
+            .order_by('pk')
+            .only('pk', 'body')[:batch_size]
+        )
+        if not batch:
+            break
+        for review in batch:
+            for field, value in render_review_body(review.body).items():
+                setattr(review, field, value)
+        model.objects.bulk_update(batch, RENDERED_FIELDS)
+        updated += len(batch)
+        last_pk = batch[-1].pk
+        if stdout is not None:
+            stdout.write(f'Rendered {updated} reviews...')
+    return updated
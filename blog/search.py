@@ -0,0 +1,256 @@
+"""
+Full-text search over reviews.
+
+PostgreSQL: blog_review carries a stored, generated tsvector column
+(search_vector) weighting film_title (A) over director (B) over body (C),
+with a GIN index. The database keeps it current on every insert/update.
+
+SQLite: an FTS5 external-content table (blog_review_fts) mirrors the same
+three columns and is kept in sync by triggers on blog_review. Results are
+ranked with bm25() using the same column weighting.
+
+Any other backend falls back to icontains filters.
+
+The schema is created by migration 0009_review_search. SQLite drops a
+table's triggers whenever Django rebuilds the table during a migration, so
+ensure_search_schema() also runs after every migrate (see BlogConfig).
+"""
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+from .models import Review
+
+SEARCH_CONFIG = 'english'
+
+# bm25 weights for (film_title, director, body)
+FTS5_WEIGHTS = (10.0, 4.0, 1.0)
+
+POSTGRES_SCHEMA = [
+    f"""
+    ALTER TABLE blog_review ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(film_title, '')), 'A') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(director, '')), 'B') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(body, '')), 'C')
+    ) STORED
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS blog_review_search_vector_idx
+    ON blog_review USING GIN (search_vector)
+    """,
+]
+
+POSTGRES_DROP = [
+    'DROP INDEX IF EXISTS blog_review_search_vector_idx',
+    'ALTER TABLE blog_review DROP COLUMN IF EXISTS search_vector',
+]
+
+SQLITE_SCHEMA = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS blog_review_fts USING fts5(
+        film_title, director, body,
+        content='blog_review', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS blog_review_fts_insert
+    AFTER INSERT ON blog_review BEGIN
+        INSERT INTO blog_review_fts(rowid, film_title, director, body)
+        VALUES (new.id, new.film_title, new.director, new.body);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS blog_review_fts_delete
+    AFTER DELETE ON blog_review BEGIN
+        INSERT INTO blog_review_fts(blog_review_fts, rowid, film_title, director, body)
+        VALUES ('delete', old.id, old.film_title, old.director, old.body);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS blog_review_fts_update
+    AFTER UPDATE OF film_title, director, body ON blog_review BEGIN
+        INSERT INTO blog_review_fts(blog_review_fts, rowid, film_title, director, body)
+        VALUES ('delete', old.id, old.film_title, old.director, old.body);
+        INSERT INTO blog_review_fts(rowid, film_title, director, body)
+        VALUES (new.id, new.film_title, new.director, new.body);
+    END
+    """,
+]
+
+SQLITE_REBUILD = "INSERT INTO blog_review_fts(blog_review_fts) VALUES ('rebuild')"
+
+SQLITE_DROP = [
+    'DROP TRIGGER IF EXISTS blog_review_fts_insert',
+    'DROP TRIGGER IF EXISTS blog_review_fts_delete',
+    'DROP TRIGGER IF EXISTS blog_review_fts_update',
+    'DROP TABLE IF EXISTS blog_review_fts',
+]
+
+
+def create_search_schema(connection, rebuild=True):
+    """
+    Create the search column/index or FTS table for this connection
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            for statement in POSTGRES_SCHEMA:
+                cursor.execute(statement)
+        elif connection.vendor == 'sqlite':
+            for statement in SQLITE_SCHEMA:
+                cursor.execute(statement)
+            if rebuild:
+                cursor.execute(SQLITE_REBUILD)
+
+
+def drop_search_schema(connection):
+    statements = {
+        'postgresql': POSTGRES_DROP,
+        'sqlite': SQLITE_DROP,
+    }.get(connection.vendor, [])
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def ensure_search_schema(using='default', **kwargs):
+    """
+    post_migrate hook: put back SQLite triggers dropped by a table rebuild
+    and resync the FTS index. Does nothing until migration 0009 has run
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    tables = connection.introspection.table_names()
+    if 'blog_review' not in tables or 'blog_review_fts' not in tables:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name IN "
+            "('blog_review_fts_insert', 'blog_review_fts_delete', 'blog_review_fts_update')"
+        )
+        if cursor.fetchone()[0] == 3:
+            return
+    create_search_schema(connection, rebuild=True)
+
+
+def fts5_query(query):
+    """
+    Turn free text into a safe FTS5 MATCH expression: every word must
+    match, and the last one may be a prefix of a longer word
+    """
+    terms = re.findall(r'\w+', query)
+    if not terms:
+        return ''
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+class FTS5Results:
+    """
+    Ranked SQLite search results. It supports count() and slicing, so it
+    can be handed straight to django.core.paginator.Paginator; each slice
+    runs one ranked query over the FTS index for the ids and one query for
+    the reviews themselves
+    """
+
+    def __init__(self, query, queryset):
+        self.match = fts5_query(query)
+        self.queryset = queryset
+        self.connection = connections[queryset.db]
+        self._count = None
+
+    def _execute(self, sql, params):
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def count(self):
+        if self._count is None:
+            self._count = 0
+            if self.match:
+                self._count = self._execute(
+                    'SELECT count(*) FROM blog_review_fts '
+                    'JOIN blog_review ON blog_review.id = blog_review_fts.rowid '
+                    'WHERE blog_review_fts MATCH %s AND blog_review.status = %s',
+                    [self.match, Review.Status.PUBLISHED],
+                )[0][0]
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        start = key.start or 0
+        stop = key.stop if key.stop is not None else self.count()
+        if not self.match or stop <= start:
+            return []
+        weights = ', '.join(str(weight) for weight in FTS5_WEIGHTS)
+        ranked = self._execute(
+            f'SELECT blog_review.id, bm25(blog_review_fts, {weights}) AS score '
+            'FROM blog_review_fts '
+            'JOIN blog_review ON blog_review.id = blog_review_fts.rowid '
+            'WHERE blog_review_fts MATCH %s AND blog_review.status = %s '
+            'ORDER BY score, blog_review.created_on DESC LIMIT %s OFFSET %s',
+            [self.match, Review.Status.PUBLISHED, stop - start, start],
+        )
+        reviews = self.queryset.in_bulk([pk for pk, score in ranked])
+        results = []
+        for pk, score in ranked:
+            if pk in reviews:
+                # bm25 scores are negative, lower is better
+                reviews[pk].rank = -score
+                results.append(reviews[pk])
+        return results
+
+
+def filter_reviews(queryset, query):
+    """
+    Restrict a Review queryset to rows matching the search query, without
+    ranking. Used by the admin search box
+    """
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        return queryset.alias(search_match=RawSQL(
+            f"blog_review.search_vector @@ websearch_to_tsquery('{SEARCH_CONFIG}', %s)",
+            [query],
+            output_field=BooleanField(),
+        )).filter(search_match=True)
+    if vendor == 'sqlite':
+        match = fts5_query(query)
+        if not match:
+            return queryset.none()
+        return queryset.filter(pk__in=RawSQL(
+            'SELECT rowid FROM blog_review_fts WHERE blog_review_fts MATCH %s',
+            [match],
+        ))
+    return queryset.filter(
+        Q(film_title__icontains=query)
+        | Q(director__icontains=query)
+        | Q(body__icontains=query)
+    )
+
+
+def search_reviews(query):
+    """
+    Return published reviews matching the query, best matches first. The
+    result supports count() and slicing for use with Paginator
+    """
+    queryset = Review.published.select_related(
+        'author').prefetch_related('tags').defer('body', 'body_html')
+    vendor = connections[queryset.db].vendor
+    if vendor == 'sqlite':
+        return FTS5Results(query, queryset)
+    if vendor == 'postgresql':
+        return filter_reviews(queryset, query).annotate(rank=RawSQL(
+            f"ts_rank(blog_review.search_vector, websearch_to_tsquery('{SEARCH_CONFIG}', %s))",
+            [query],
+            output_field=FloatField(),
+        )).order_by('-rank', '-created_on')
+    return filter_reviews(queryset, query).order_by('-created_on')
@@ -0,0 +1,142 @@
+"""
+Cached "Most Commented Reviews" / "Highest Rated" sidebar fragment.
+
+The sidebar is identical on every list and detail page and only changes when
+a review or comment changes, so the computed rows and the rendered HTML are
+stored together under a versioned cache key. The signal handlers in
+blog/signals.py bump the version after a Review or Comment is saved or
+deleted, which makes every previously cached fragment unreachable; old
+entries simply expire. On a cache hit no database queries are run at all.
+
+Settings:
+    BLOG_SIDEBAR_CACHE          cache alias from CACHES (default 'default')
+    BLOG_SIDEBAR_CACHE_TIMEOUT  seconds a fragment is kept (default 15 min)
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .models import Review
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'blog:sidebar:version'
+FRAGMENT_KEY = 'blog:sidebar:{version}'
+
+
+class SidebarCacheStats:
+    """
+    Hit/miss counters for the sidebar cache in this process
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def as_dict(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+
+stats = SidebarCacheStats()
+
+
+def get_cache():
+    return caches[getattr(settings, 'BLOG_SIDEBAR_CACHE', 'default')]
+
+
+def get_version():
+    """
+    Return the current sidebar version. Versions are nanosecond timestamps,
+    so if the version key is ever evicted the replacement is always newer
+    than anything cached before it
+    """
+    cache = get_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    """
+    Invalidate every cached sidebar fragment
+    """
+    get_cache().set(VERSION_KEY, time.time_ns(), None)
+
+
+def _rows(reviews):
+    return [
+        {
+            'film_title': review.film_title,
+            'year': review.year,
+            'url': review.get_absolute_url(),
+            'comment_count': review.comment_count,
+            'rating_display': review.get_rating_display(),
+        }
+        for review in reviews
+    ]
+
+
+def build_sidebar():
+    """
+    Run the two sidebar queries and render the fragment
+    """
+    fields = ['film_title', 'year', 'slug', 'created_on', 'rating', 'comment_count']
+    # the fragment is shared and cached, so read the primary, never a
+    # replica that may not have the write which invalidated it yet
+    published = Review.published.db_manager(DEFAULT_DB_ALIAS)
+    most_commented = _rows(published.most_commented().only(*fields))
+    highest_rated = _rows(published.highest_rated().only(*fields))
+    html = render_to_string('blog/includes/sidebar.html', {
+        'most_commented_posts': most_commented,
+        'highest_rated': highest_rated,
+    })
+    return {
+        'most_commented_posts': most_commented,
+        'highest_rated': highest_rated,
+        'html': str(html),
+    }
+
+
+def get_sidebar():
+    """
+    Return the sidebar rows and rendered HTML, from the cache if possible
+    """
+    cache = get_cache()
+    key = FRAGMENT_KEY.format(version=get_version())
+    sidebar = cache.get(key)
+    stats.record(hit=sidebar is not None)
+    if sidebar is None:
+        logger.debug('Sidebar cache miss for %s', key)
+        sidebar = build_sidebar()
+        cache.set(
+            key,
+            sidebar,
+            getattr(settings, 'BLOG_SIDEBAR_CACHE_TIMEOUT', 60 * 15)
+        )
+    return {**sidebar, 'html': mark_safe(sidebar['html'])}
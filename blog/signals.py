@@ -0,0 +1,151 @@
+"""
+Signal handlers for the blog app. They are connected in BlogConfig.ready()
+"""
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_delete, pre_save,
+)
+from django.dispatch import receiver
+from taggit.models import Tag
+
+from . import page_cache, sidebar
+from .models import Comment, Review
+
+
+def after_commit_too(func, *args):
+    """
+    Run func now and, inside a transaction, once more after commit so a
+    concurrent request cannot re-cache the old data in between
+    """
+    func(*args)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: func(*args))
+
+
+@receiver(pre_save, sender=Comment)
+def remember_previous_post(sender, instance, update_fields=None, **kwargs):
+    """
+    If an existing comment is moved to a different review (only possible
+    through the admin) both reviews need their statistics refreshed
+    """
+    instance._previous_post_id = None
+    if instance.pk and (update_fields is None or 'post' in update_fields):
+        instance._previous_post_id = (
+            Comment.objects.filter(pk=instance.pk)
+            .values_list('post_id', flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, **kwargs):
+    """
+    Creating, editing or toggling is_active on a comment refreshes the
+    stored statistics of its review
+    """
+    review_ids = {instance.post_id}
+    previous_post_id = getattr(instance, '_previous_post_id', None)
+    if previous_post_id:
+        review_ids.add(previous_post_id)
+    Review.refresh_comment_stats(review_ids)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    Review.refresh_comment_stats([instance.post_id])
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_sidebar(sender, **kwargs):
+    """
+    Any review or comment change can reorder the sidebar. The version is
+    bumped straight away and, inside a transaction, once more after commit
+    so a concurrent request cannot re-cache the old rows under the new
+    version before the write is visible. The sidebar is only rebuilt (and
+    cached pages purged if it differs) once the write is committed, never
+    from rows that may still be rolled back
+    """
+    if transaction.get_connection().in_atomic_block:
+        sidebar.bump_version()
+        transaction.on_commit(refresh_sidebar)
+    else:
+        refresh_sidebar()
+
+
+def refresh_sidebar():
+    sidebar.bump_version()
+    page_cache.sync_sidebar()
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_status(sender, instance, update_fields=None, **kwargs):
+    """
+    Unpublishing a review must purge the list pages it was on
+    """
+    instance._previous_status = None
+    if page_cache.enabled() and instance.pk:
+        instance._previous_status = (
+            Review.objects.filter(pk=instance.pk)
+            .values_list('status', flat=True)
+            .first()
+        )
+
+
+@receiver(pre_delete, sender=Review)
+def remember_tags(sender, instance, **kwargs):
+    # the tagged items are deleted before post_delete is sent
+    instance._tag_slugs = list(instance.tags.values_list('slug', flat=True))
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def purge_review_pages(sender, instance, **kwargs):
+    """
+    Purge the review's own pages, the tag lists it appears on and, if it
+    is or was published, the main list (ordered by updated_on, so any
+    save can move it)
+    """
+    if not page_cache.enabled():
+        return
+    tag_slugs = getattr(instance, '_tag_slugs', None)
+    if tag_slugs is None:
+        tag_slugs = instance.tags.values_list('slug', flat=True)
+    keys = [f'review:{instance.pk}', *(f'tag:{slug}' for slug in tag_slugs)]
+    published = Review.Status.PUBLISHED
+    if published in (instance.status, getattr(instance, '_previous_status', None)):
+        keys.append('list')
+    after_commit_too(page_cache.purge, *keys)
+
+
+@receiver(m2m_changed, sender=Review.tags.through)
+def purge_tagged_pages(sender, instance, action, pk_set=None, **kwargs):
+    """
+    Adding or removing tags changes the review's pages and the lists of
+    the tags involved
+    """
+    if not page_cache.enabled() or not isinstance(instance, Review):
+        return
+    if action == 'pre_clear':
+        instance._tag_slugs = list(instance.tags.values_list('slug', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if action == 'post_clear':
+        tag_slugs = getattr(instance, '_tag_slugs', [])
+    else:
+        tag_slugs = Tag.objects.filter(pk__in=pk_set or []).values_list('slug', flat=True)
+    after_commit_too(
+        page_cache.purge,
+        f'review:{instance.pk}', *(f'tag:{slug}' for slug in tag_slugs)
+    )
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def purge_comment_pages(sender, instance, **kwargs):
+    review_ids = {instance.post_id, getattr(instance, '_previous_post_id', None)}
+    keys = [f'review:{review_id}' for review_id in review_ids if review_id]
+    after_commit_too(page_cache.purge, *keys)
@@ -105,6 +105,33 @@ document.addEventListener('visibilitychange', function() {
     }
 });
 
+// Load further pages of comments on the review detail page. Each page
+// arrives as JSON with its rendered HTML, which ends with the next
+// "Load more" button if there are more comments after it
+document.addEventListener('click', function(event) {
+    const button = event.target.closest('.load-more-comments');
+    if (!button) {
+        return;
+    }
+    button.disabled = true;
+    button.textContent = 'Loading...';
+    fetch(button.dataset.url, {headers: {'Accept': 'application/json'}})
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}`);
+            }
+            return response.json();
+        })
+        .then(data => {
+            button.closest('.comments-more').outerHTML = data.html;
+        })
+        .catch(error => {
+            console.error('Could not load comments:', error);
+            button.disabled = false;
+            button.textContent = 'Load more comments';
+        });
+});
+
 // Add any other JavaScript functionality here as needed
 console.log('Horror Haven JavaScript loaded successfully!');
 
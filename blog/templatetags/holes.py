@@ -0,0 +1,18 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from .. import holes
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def hole(context, name, **kwargs):
+    """
+    Mark a per-user fragment, filled in by blog.middleware.HoleMiddleware
+    """
+    request = context.get('request')
+    if request is not None:
+        # only responses that asked for holes get them filled
+        request.has_holes = True
+    return mark_safe(holes.marker(name, **kwargs))
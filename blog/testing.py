@@ -0,0 +1,55 @@
+"""
+Test helpers for the blog app.
+
+query_budget enforces an upper bound on the number of SQL queries a block of
+code (usually a view request) may run. Unlike TestCase.assertNumQueries it
+does not pin an exact number, so a view that gets cheaper keeps passing, but
+one that starts issuing a query per row fails straight away and lists the
+queries it ran.
+
+    with query_budget(5):
+        self.client.get(reverse('blog:post_list'))
+
+    @query_budget(5)
+    def test_post_list(self):
+        ...
+"""
+from contextlib import ContextDecorator
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class query_budget(ContextDecorator):
+    """
+    Fail with QueryBudgetExceeded if more than `budget` queries run on the
+    given database alias inside the block
+    """
+
+    def __init__(self, budget, using=DEFAULT_DB_ALIAS):
+        self.budget = budget
+        self.using = using
+
+    def __enter__(self):
+        self.context = CaptureQueriesContext(connections[self.using])
+        self.context.__enter__()
+        return self.context
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.context.__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None:
+            return False
+        executed = len(self.context)
+        if executed > self.budget:
+            queries = '\n'.join(
+                f'{i}. {query["sql"]}'
+                for i, query in enumerate(self.context.captured_queries, start=1)
+            )
+            raise QueryBudgetExceeded(
+                f'{executed} queries executed, budget is {self.budget}\n{queries}'
+            )
+        return False
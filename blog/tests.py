@@ -1,10 +1,35 @@
-from django.test import TestCase, Client
-from django.contrib.auth.models import User
+from django.test import TestCase, Client, RequestFactory, override_settings
+from django.contrib.auth.models import AnonymousUser, User
+from django.contrib.messages.storage import default_storage
+from django.template import Context, Template
+from django.http import HttpResponse
+from django.middleware.csrf import CsrfViewMiddleware, get_token
 from django.urls import reverse
 from django.utils import timezone
-from datetime import datetime
+from datetime import datetime, timezone as dt_timezone
+from io import StringIO
+import json
+import os
+import shutil
+import tempfile
+import threading
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.models import Max
+from django.db.models.signals import post_delete
+from django.test.utils import CaptureQueriesContext
 from .models import Review, Comment
+from . import holes, page_cache, sidebar
+from .fields import keep_timestamps
 from .forms import CommentForm
+from .middleware import PageCacheMiddleware
+from .pagination import CursorPaginator
+from .search import search_reviews
+from .testing import QueryBudgetExceeded, query_budget
+from .views import PostListView
 
 
 class ReviewModelTest(TestCase):
@@ -91,6 +116,515 @@ class ReviewModelTest(TestCase):
         self.assertEqual(most_commented[0], self.review)
 
 
+class ReviewCommentStatsTest(TestCase):
+    """Test cases for the stored comment statistics on Review"""
+    
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.review = Review.objects.create(
+            title='Test Horror Film',
+            slug='test-horror-film',
+            author=self.user,
+            film_title='Test Film',
+            year=2024,
+            director='Test Director',
+            rating=4,
+            body='This is a test horror film review.',
+            status=Review.Status.PUBLISHED
+        )
+        self.other_review = Review.objects.create(
+            title='Other Horror Film',
+            slug='other-horror-film',
+            author=self.user,
+            film_title='Other Film',
+            year=2023,
+            director='Other Director',
+            rating=5,
+            body='This is another test horror film review.',
+            status=Review.Status.PUBLISHED
+        )
+    
+    def test_comment_create_updates_stats(self):
+        """Test that creating a comment increments the stored count"""
+        comment = Comment.objects.create(
+            post=self.review,
+            user=self.user,
+            body='First comment'
+        )
+        self.review.refresh_from_db()
+        self.assertEqual(self.review.comment_count, 1)
+        self.assertEqual(self.review.last_comment_on, comment.created_on)
+    
+    def test_comment_toggle_and_delete_updates_stats(self):
+        """Test that deactivating and deleting comments update the count"""
+        first = Comment.objects.create(post=self.review, user=self.user, body='One')
+        second = Comment.objects.create(post=self.review, user=self.user, body='Two')
+        
+        second.is_active = False
+        second.save()
+        self.review.refresh_from_db()
+        self.assertEqual(self.review.comment_count, 1)
+        self.assertEqual(self.review.last_comment_on, first.created_on)
+        
+        first.delete()
+        self.review.refresh_from_db()
+        self.assertEqual(self.review.comment_count, 0)
+        self.assertIsNone(self.review.last_comment_on)
+    
+    def test_moving_comment_updates_both_reviews(self):
+        """Test that moving a comment refreshes the old and new review"""
+        comment = Comment.objects.create(post=self.review, user=self.user, body='One')
+        comment.post = self.other_review
+        comment.save()
+        self.review.refresh_from_db()
+        self.other_review.refresh_from_db()
+        self.assertEqual(self.review.comment_count, 0)
+        self.assertEqual(self.other_review.comment_count, 1)
+    
+    def test_rebuild_command_fixes_bulk_updates(self):
+        """Test the rebuild command after a signal-bypassing update"""
+        Comment.objects.create(post=self.review, user=self.user, body='One')
+        Comment.objects.create(post=self.review, user=self.user, body='Two')
+        Comment.objects.filter(post=self.review).update(is_active=False)
+        self.review.refresh_from_db()
+        self.assertEqual(self.review.comment_count, 2)  # stale
+        
+        call_command('rebuild_review_stats', batch_size=1, stdout=StringIO())
+        self.review.refresh_from_db()
+        self.assertEqual(self.review.comment_count, 0)
+    
+    def test_sidebar_queries_use_stored_values(self):
+        """Test the sidebar managers order by the stored columns"""
+        Comment.objects.create(post=self.other_review, user=self.user, body='One')
+        self.assertEqual(Review.published.most_commented()[0], self.other_review)
+        self.assertEqual(Review.published.highest_rated()[0], self.other_review)
+        with self.assertNumQueries(1):
+            list(Review.published.most_commented())
+
+
+class SidebarCacheTest(TestCase):
+    """Test cases for the cached sidebar fragment"""
+    
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        sidebar.stats.reset()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.review = Review.objects.create(
+            title='Test Horror Film',
+            slug='test-horror-film',
+            author=self.user,
+            film_title='Test Film',
+            year=2024,
+            director='Test Director',
+            rating=4,
+            body='This is a test horror film review.',
+            status=Review.Status.PUBLISHED
+        )
+    
+    def test_cache_hit_runs_no_queries(self):
+        """Test that a warm sidebar does not touch the database"""
+        sidebar.get_sidebar()
+        with self.assertNumQueries(0):
+            data = sidebar.get_sidebar()
+        self.assertIn('Test Film', data['html'])
+        self.assertEqual(sidebar.stats.as_dict()['hits'], 1)
+        self.assertEqual(sidebar.stats.as_dict()['misses'], 1)
+    
+    def test_comment_invalidates_sidebar(self):
+        """Test that saving a comment bumps the sidebar version"""
+        self.assertIn('0 comments', sidebar.get_sidebar()['html'])
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(post=self.review, user=self.user, body='Boo')
+        self.assertIn('1 comments', sidebar.get_sidebar()['html'])
+    
+    def test_review_delete_invalidates_sidebar(self):
+        """Test that deleting a review removes it from the sidebar"""
+        self.assertIn('Test Film', sidebar.get_sidebar()['html'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.review.delete()
+        self.assertNotIn('Test Film', sidebar.get_sidebar()['html'])
+    
+    def test_views_render_cached_sidebar(self):
+        """Test that list and detail pages share the cached fragment"""
+        response = self.client.get(reverse('blog:post_list'))
+        self.assertContains(response, 'Most Commented Reviews')
+        response = self.client.get(self.review.get_absolute_url())
+        self.assertContains(response, 'Highest Rated')
+        self.assertEqual(sidebar.stats.as_dict()['misses'], 1)
+        self.assertEqual(sidebar.stats.as_dict()['hits'], 1)
+
+
+@override_settings(BLOG_PAGE_CACHE_ENABLED=True)
+class PageCacheTest(TestCase):
+    """Test cases for the anonymous full-page cache"""
+    
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.review = Review.objects.create(
+            title='Test Horror Film',
+            slug='test-horror-film',
+            author=self.user,
+            film_title='Test Film',
+            year=2024,
+            director='Test Director',
+            rating=4,
+            body='This is a test horror film review.',
+            status=Review.Status.PUBLISHED
+        )
+        self.review.tags.add('slasher')
+        self.comment = Comment.objects.create(
+            post=self.review, user=self.user, body='First scream'
+        )
+        self.other_review = Review.objects.create(
+            title='Another Horror Film',
+            slug='another-horror-film',
+            author=self.user,
+            film_title='Another Film',
+            year=2023,
+            director='Another Director',
+            rating=3,
+            body='Another review.',
+            status=Review.Status.PUBLISHED
+        )
+    
+    def test_second_request_is_served_from_cache(self):
+        """Test that a repeated anonymous request runs no queries"""
+        url = self.review.get_absolute_url()
+        self.assertEqual(self.client.get(url)['X-Page-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'HIT')
+        self.assertContains(response, 'Test Film')
+    
+    def test_comment_edit_purges_only_its_review(self):
+        """Test that editing a comment purges its review but not other pages"""
+        url = self.review.get_absolute_url()
+        other_url = self.other_review.get_absolute_url()
+        for page in (url, other_url):
+            self.client.get(page)
+        self.comment.body = 'Second scream'
+        self.comment.save()
+        response = self.client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+        self.assertContains(response, 'Second scream')
+        self.assertEqual(self.client.get(other_url)['X-Page-Cache'], 'HIT')
+    
+    def test_sidebar_is_rebuilt_only_after_commit(self):
+        """Test that uncommitted rows never reach the cached sidebar"""
+        with self.captureOnCommitCallbacks() as callbacks:
+            Comment.objects.create(post=self.other_review, user=self.user, body='Boo')
+            key = sidebar.FRAGMENT_KEY.format(version=sidebar.get_version())
+            self.assertIsNone(cache.get(key))
+        self.assertTrue(callbacks)
+        for callback in callbacks:
+            callback()
+        key = sidebar.FRAGMENT_KEY.format(version=sidebar.get_version())
+        self.assertIsNotNone(cache.get(key))
+    
+    def test_review_save_purges_lists(self):
+        """Test that editing a review purges the lists showing it"""
+        list_url = reverse('blog:post_list')
+        tag_url = reverse('blog:post_list_by_tag', args=['slasher'])
+        for page in (list_url, tag_url):
+            self.client.get(page)
+        self.review.director = 'Renamed Director'
+        self.review.save()
+        for page in (list_url, tag_url):
+            self.assertContains(self.client.get(page), 'Renamed Director')
+    
+    def test_unpublishing_purges_list(self):
+        """Test that a review moved back to draft leaves the list"""
+        list_url = reverse('blog:post_list')
+        self.assertIn(self.other_review, self.client.get(list_url).context['posts'])
+        self.other_review.status = Review.Status.DRAFT
+        self.other_review.save()
+        response = self.client.get(list_url)
+        self.assertNotIn(self.other_review, response.context['posts'])
+    
+    def test_tagging_purges_tag_list(self):
+        """Test that adding a tag purges that tag's list"""
+        tag_url = reverse('blog:post_list_by_tag', args=['slasher'])
+        self.assertNotIn(self.other_review, self.client.get(tag_url).context['posts'])
+        self.other_review.tags.add('slasher')
+        response = self.client.get(tag_url)
+        self.assertIn(self.other_review, response.context['posts'])
+    
+    def test_authenticated_users_share_cached_body(self):
+        """Test that a cached page is served with each user's own holes"""
+        url = self.review.get_absolute_url()
+        self.assertContains(self.client.get(url), 'Login')
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'HIT')
+        self.assertContains(response, 'Logout (testuser)')
+        self.assertContains(response, 'Welcome, testuser!')
+        self.assertContains(
+            response, reverse('blog:edit_comment', args=[self.comment.id])
+        )
+        self.assertContains(response, 'Add a new comment')
+        self.assertNotContains(response, '<!--hole:')
+    
+    def test_validators_are_not_shared_between_viewers(self):
+        """Test that another viewer's ETag never gets a 304"""
+        url = self.review.get_absolute_url()
+        etag = self.client.get(url)['ETag']
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+    
+    def test_conditional_get_on_hit(self):
+        """Test that a cached page answers If-None-Match with a 304"""
+        url = self.review.get_absolute_url()
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['X-Page-Cache'], 'HIT')
+    
+    def test_pages_using_csrf_token_are_not_stored(self):
+        """Test that a page rendering a CSRF token is never shared"""
+        def view(request):
+            page_cache.add_surrogate_keys(request, 'list')
+            return HttpResponse(get_token(request))
+        
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        request.session = {}
+        request._messages = default_storage(request)
+        CsrfViewMiddleware(view).process_request(request)
+        response = PageCacheMiddleware(view)(request)
+        self.assertNotIn('X-Page-Cache', response)
+        self.assertIsNone(page_cache.fetch(request))
+
+
+class HoleTest(TestCase):
+    """Test cases for the per-user fragments filled into shared pages"""
+    
+    def setUp(self):
+        """Set up test data"""
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.other_user = User.objects.create_user(
+            username='otheruser',
+            password='testpass123'
+        )
+        self.review = Review.objects.create(
+            title='Test Horror Film',
+            slug='test-horror-film',
+            author=self.user,
+            film_title='Test Film',
+            year=2024,
+            director='Test Director',
+            rating=4,
+            body='This is a test horror film review.',
+            status=Review.Status.PUBLISHED
+        )
+        self.comment = Comment.objects.create(
+            post=self.review, user=self.user, body='First scream'
+        )
+        self.edit_url = reverse('blog:edit_comment', args=[self.comment.id])
+    
+    def test_marker_renders_nothing_per_user(self):
+        """Test that the hole tag only leaves a marker in the page"""
+        html = Template(
+            '{% load holes %}{% hole "comment_actions" comment_id=3 author_id=7 %}'
+        ).render(Context({}))
+        self.assertEqual(html, '<!--hole:comment_actions?comment_id=3&author_id=7-->')
+    
+    def test_comment_actions_only_for_author(self):
+        """Test that only the author sees Edit and Delete"""
+        url = self.review.get_absolute_url()
+        self.assertNotContains(self.client.get(url), self.edit_url)
+        self.client.login(username='otheruser', password='testpass123')
+        self.assertNotContains(self.client.get(url), self.edit_url)
+        self.client.login(username='testuser', password='testpass123')
+        self.assertContains(self.client.get(url), self.edit_url)
+    
+    def test_json_holes_are_escaped(self):
+        """Test that holes in the comments endpoint are filled as JSON"""
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get(
+            reverse('blog:post_comments', args=[self.review.id])
+        )
+        html = response.json()['html']
+        self.assertIn(self.edit_url, html)
+        self.assertNotIn('<!--hole:', html)
+    
+    def test_invalid_comment_shows_errors_in_hole(self):
+        """Test that the view's bound form reaches the comment form hole"""
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.post(
+            reverse('blog:post_comment', args=[self.review.id]), {'body': ''}
+        )
+        self.assertContains(response, 'This field is required')
+    
+    def test_echoed_markers_are_not_filled(self):
+        """Test that markers in user input never render a fragment"""
+        self.client.login(username='testuser', password='testpass123')
+        for name in ('user_nav', 'nope'):
+            response = self.client.post(
+                reverse('booking:reserve'), {'slot': f'<!--hole:{name}?-->'}
+            )
+            self.assertEqual(response.status_code, 400)
+            self.assertNotIn(b'Logout', response.content)
+    
+    def test_unknown_hole_names(self):
+        """Test that only whitelisted holes can be marked or filled"""
+        with self.assertRaises(ValueError):
+            holes.marker('nope')
+        request = RequestFactory().get('/')
+        request.user = self.user
+        content = b'<!--hole:nope?-->'
+        self.assertEqual(holes.fill(request, content), content)
+
+
+class QueryBudgetTest(TestCase):
+    """Test that list and detail pages run a fixed number of queries"""
+    
+    def setUp(self):
+        """Set up reviews with tags and comments"""
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        for i in range(12):
+            author = User.objects.create(username=f'author{i}')
+            review = Review.objects.create(
+                title=f'Test Horror Film {i}',
+                slug=f'test-horror-film-{i}',
+                author=author,
+                film_title=f'Test Film {i}',
+                year=2024,
+                director='Test Director',
+                rating=4,
+                body='This is a test horror film review.',
+                status=Review.Status.PUBLISHED
+            )
+            review.tags.add('slasher', f'tag-{i}')
+            Comment.objects.create(post=review, user=author, body='Creepy')
+        self.review = review
+        # warm the sidebar cache so only the page's own queries are counted
+        sidebar.get_sidebar()
+    
+    def get_with_page_size(self, url, page_size):
+        original = PostListView.paginate_by
+        PostListView.paginate_by = page_size
+        try:
+            return self.client.get(url)
+        finally:
+            PostListView.paginate_by = original
+    
+    def test_post_list_query_budget(self):
+        """Test the list page cost does not grow with the page size"""
+        for page_size in (3, 12):
+            # validators for conditional GET + count + page + tags
+            with query_budget(4):
+                response = self.get_with_page_size(reverse('blog:post_list'), page_size)
+            self.assertEqual(len(response.context['posts']), page_size)
+    
+    def test_tag_list_query_budget(self):
+        """Test the tag-filtered list page cost"""
+        url = reverse('blog:post_list_by_tag', args=['slasher'])
+        for page_size in (3, 12):
+            with query_budget(5):
+                self.get_with_page_size(url, page_size)
+    
+    def test_post_detail_query_budget(self):
+        """Test the detail page cost does not grow with the comments"""
+        for i in range(10):
+            Comment.objects.create(
+                post=self.review,
+                user=User.objects.create(username=f'commenter{i}'),
+                body='So scary'
+            )
+        sidebar.get_sidebar()
+        # validators for conditional GET + review + tags + comments
+        with query_budget(4):
+            response = self.client.get(self.review.get_absolute_url())
+        self.assertContains(response, '11 comments')
+    
+    def test_query_budget_reports_overrun(self):
+        """Test that going over the budget fails with the queries listed"""
+        with self.assertRaises(QueryBudgetExceeded) as error:
+            with query_budget(1):
+                list(Review.objects.all())
+                list(Comment.objects.all())
+        self.assertIn('2 queries executed, budget is 1', str(error.exception))
+
+
+class ReviewRenderingTest(TestCase):
+    """Test cases for the pre-rendered review text"""
+    
+    def setUp(self):
+        """Set up test data"""
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.review = Review.objects.create(
+            title='Test Horror Film',
+            slug='test-horror-film',
+            author=self.user,
+            film_title='Test Film',
+            year=2024,
+            director='Test Director',
+            rating=4,
+            body='First <b>paragraph</b>.\n\n' + 'word ' * 450,
+            status=Review.Status.PUBLISHED
+        )
+    
+    def test_rendered_fields_on_save(self):
+        """Test that saving a review renders its excerpt and statistics"""
+        self.assertTrue(self.review.excerpt.startswith('<p>First &lt;b&gt;paragraph'))
+        self.assertTrue(self.review.excerpt.rstrip().endswith('…</p>'))
+        self.assertIn('&lt;b&gt;', self.review.body_html)
+        self.assertEqual(self.review.word_count, 452)
+        self.assertEqual(self.review.reading_time, 3)
+    
+    def test_update_fields_body_renders(self):
+        """Test that saving only the body still refreshes derived fields"""
+        self.review.body = 'Short and sweet.'
+        self.review.save(update_fields=['body'])
+        self.review.refresh_from_db()
+        self.assertEqual(self.review.excerpt, '<p>Short and sweet.</p>')
+        self.assertEqual(self.review.reading_time, 1)
+    
+    def test_list_view_never_loads_body(self):
+        """Test that the list page defers the body columns"""
+        response = self.client.get(reverse('blog:post_list'))
+        post = response.context['posts'][0]
+        self.assertEqual(post.get_deferred_fields(), {'body', 'body_html'})
+        self.assertContains(response, '3 min')
+    
+    def test_render_reviews_command(self):
+        """Test the backfill command renders stale rows"""
+        Review.objects.update(excerpt='', body_html='', word_count=0, reading_time=0)
+        call_command('render_reviews', batch_size=1, stdout=StringIO())
+        self.review.refresh_from_db()
+        self.assertEqual(self.review.word_count, 452)
+        self.assertIn('paragraph', self.review.body_html)
+
+
 class CommentModelTest(TestCase):
     """Test cases for Comment model functionality"""
     
@@ -192,6 +726,272 @@ class ReviewViewsTest(TestCase):
         self.assertEqual(response.status_code, 404)
 
 
+class ConditionalGetTest(TestCase):
+    """Test cases for ETag / Last-Modified on the review pages"""
+    
+    def setUp(self):
+        """Set up test data"""
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.review = Review.objects.create(
+            title='Test Horror Film',
+            slug='test-horror-film',
+            author=self.user,
+            film_title='Test Film',
+            year=2024,
+            director='Test Director',
+            rating=4,
+            body='This is a test horror film review.',
+            status=Review.Status.PUBLISHED
+        )
+    
+    def test_matching_etag_returns_304(self):
+        """Test that list and detail pages answer If-None-Match with 304"""
+        for url in (reverse('blog:post_list'), self.review.get_absolute_url()):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('Cookie', response['Vary'])
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(response.status_code, 304)
+    
+    def test_if_modified_since_for_anonymous(self):
+        """Test that anonymous readers can revalidate with Last-Modified"""
+        url = self.review.get_absolute_url()
+        response = self.client.get(url)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+    
+    def test_new_comment_changes_etag(self):
+        """Test that a comment invalidates the detail page validators"""
+        url = self.review.get_absolute_url()
+        etag = self.client.get(url)['ETag']
+        Comment.objects.create(post=self.review, user=self.user, body='Boo')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Boo')
+    
+    def test_etag_differs_per_user(self):
+        """Test that logging in does not reuse the anonymous page"""
+        url = self.review.get_absolute_url()
+        etag = self.client.get(url)['ETag']
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Last-Modified'))
+    
+    def test_missing_review_is_still_404(self):
+        """Test that validators do not mask a missing review"""
+        url = reverse('blog:post_detail', args=[2024, 1, 1, 'missing'])
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class ReviewDateLookupTest(TestCase):
+    """Test cases for the range-based detail page date lookup"""
+    
+    def setUp(self):
+        """Set up test data"""
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.review = self.create_review(datetime(2024, 3, 10, 3, 30, tzinfo=dt_timezone.utc))
+    
+    def create_review(self, created_on, slug='late-night-film'):
+        review = Review.objects.create(
+            title='Late Night Film',
+            slug=slug,
+            author=self.user,
+            film_title='Late Night Film',
+            year=2024,
+            director='Test Director',
+            rating=4,
+            body='This is a test horror film review.',
+            status=Review.Status.PUBLISHED
+        )
+        Review.objects.filter(pk=review.pk).update(created_on=created_on)
+        review.refresh_from_db()
+        return review
+    
+    def test_day_follows_current_time_zone(self):
+        """Test that URL and lookup use the same local day"""
+        url = self.review.get_absolute_url()
+        self.assertIn('/2024/3/10/', url)
+        self.assertEqual(self.client.get(url).status_code, 200)
+        with override_settings(TIME_ZONE='America/New_York'):
+            url = self.review.get_absolute_url()
+            self.assertIn('/2024/3/9/', url)
+            self.assertEqual(self.client.get(url).status_code, 200)
+            self.assertEqual(
+                self.client.get(url.replace('/2024/3/9/', '/2024/3/10/')).status_code, 404
+            )
+    
+    def test_half_open_range(self):
+        """Test that a review at midnight belongs to the new day only"""
+        midnight = self.create_review(
+            datetime(2024, 3, 11, 0, 0, tzinfo=dt_timezone.utc), slug='midnight'
+        )
+        lookup = Review.date_lookup(2024, 3, 10)
+        self.assertEqual(list(Review.objects.filter(**lookup)), [self.review])
+        self.assertIn(midnight, Review.objects.filter(**Review.date_lookup(2024, 3, 11)))
+    
+    def test_same_slug_on_different_days(self):
+        """Test unique_for_date: the date picks between equal slugs"""
+        later = self.create_review(datetime(2024, 3, 11, 12, 0, tzinfo=dt_timezone.utc))
+        response = self.client.get(later.get_absolute_url())
+        self.assertEqual(response.context['post'], later)
+        duplicate = Review(
+            title='Late Night Film',
+            slug='late-night-film',
+            author=self.user,
+            film_title='Late Night Film',
+            year=2024,
+            director='Test Director',
+            created_on=later.created_on,
+        )
+        with self.assertRaises(ValidationError):
+            duplicate.validate_unique()
+    
+    def test_invalid_dates_return_404(self):
+        """Test dates that do not exist"""
+        for args in ([2024, 2, 30], [2024, 13, 1], [0, 1, 1], [99999999, 1, 1], [9999, 12, 31]):
+            url = reverse('blog:post_detail', args=[*args, 'late-night-film'])
+            self.assertEqual(self.client.get(url).status_code, 404)
+    
+    def test_lookup_uses_index(self):
+        """Test that the detail query is an index search"""
+        queryset = Review.published.filter(
+            slug='late-night-film', **Review.date_lookup(2024, 3, 10)
+        )
+        plan = queryset.explain()
+        if connection.vendor == 'sqlite':
+            self.assertIn('blog_review_slug_0ff383_idx', plan)
+            self.assertIn('slug=? AND status=? AND created_on>? AND created_on<?', plan)
+
+
+@override_settings(BLOG_COMMENTS_PER_PAGE=10)
+class CommentPaginationTest(TestCase):
+    """Test cases for paginated, lazily loaded comments"""
+    
+    def setUp(self):
+        """Set up a review with more comments than fit on a page"""
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.review = Review.objects.create(
+            title='Test Horror Film',
+            slug='test-horror-film',
+            author=self.user,
+            film_title='Test Film',
+            year=2024,
+            director='Test Director',
+            rating=4,
+            body='This is a test horror film review.',
+            status=Review.Status.PUBLISHED
+        )
+        for i in range(25):
+            Comment.objects.create(post=self.review, user=self.user, body=f'Comment body {i}')
+        Comment.objects.create(
+            post=self.review, user=self.user, body='Hidden comment', is_active=False
+        )
+    
+    def test_first_page_inline(self):
+        """Test that the detail page shows the first page and the stored count"""
+        response = self.client.get(self.review.get_absolute_url())
+        self.assertContains(response, '25 comments')
+        self.assertEqual(len(response.context['comments']), 10)
+        self.assertContains(response, 'Comment body 9')
+        self.assertNotContains(response, 'Comment body 10')
+        self.assertNotContains(response, 'Hidden comment')
+        self.assertContains(response, 'load-more-comments')
+    
+    def test_load_remaining_pages(self):
+        """Test following the next links through every page"""
+        url = self.client.get(self.review.get_absolute_url()).context['comments'].next_url
+        bodies, pages = [], 0
+        while url:
+            with self.assertNumQueries(2):
+                data = self.client.get(url).json()
+            bodies.extend(
+                line for line in data['html'].split('<p>')
+                if line.startswith('Comment body')
+            )
+            url = data['next']
+            pages += 1
+        self.assertEqual(pages, 2)
+        self.assertEqual(len(bodies), 15)
+        self.assertIn('Comment 25 by testuser', data['html'])
+        self.assertNotIn('load-more-comments', data['html'])
+    
+    def test_endpoint_edge_cases(self):
+        """Test invalid cursors and unpublished reviews"""
+        url = reverse('blog:post_comments', args=[self.review.id])
+        data = self.client.get(url, {'cursor': 'garbage', 'start': 'x'}).json()
+        self.assertEqual(data['count'], 10)
+        self.assertIn('Comment 1 by', data['html'])
+        self.review.status = Review.Status.DRAFT
+        self.review.save()
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class CommentIndexTest(TestCase):
+    """Test that the comment access patterns are served by indexes"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        """Generate a synthetic dataset and refresh the planner statistics"""
+        call_command(
+            'generate_dataset', '--users', '50', '--reviews', '200',
+            '--comments', '10000', stdout=StringIO()
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        cls.review = Review.published.order_by('-comment_count').first()
+        cls.user_id = Comment.objects.values_list('user_id', flat=True).first()
+    
+    def setUp(self):
+        """Set up test data"""
+        if connection.vendor == 'postgresql':
+            # the test tables are still small enough that a sequential
+            # scan can be cheaper; check the index is usable for the query
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+    
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+        if connection.vendor == 'sqlite':
+            # no separate sort step
+            self.assertNotIn('TEMP B-TREE', plan)
+        return plan
+    
+    def test_comment_page_query(self):
+        """Test a page of a review's visible comments"""
+        queryset = (
+            Comment.objects.filter(post=self.review, is_active=True)
+            .order_by('created_on', 'id')[:20]
+        )
+        self.assertUsesIndex(queryset, 'blog_comment_post_active_idx')
+    
+    def test_latest_comment_for_validators(self):
+        """Test the newest comment lookup used by the detail page ETag"""
+        queryset = (
+            Comment.objects.filter(post=self.review)
+            .order_by().values('post').annotate(latest=Max('updated_on'))
+        )
+        self.assertUsesIndex(queryset, 'blog_comment_post_updated_idx')
+    
+    def test_user_comments_query(self):
+        """Test a user's comments, newest first"""
+        queryset = Comment.objects.filter(user_id=self.user_id).order_by('-created_on')[:20]
+        self.assertUsesIndex(queryset, 'blog_comment_user_created_idx')
+
+
 class CommentViewsTest(TestCase):
     """Test cases for comment functionality"""
     
@@ -326,6 +1126,389 @@ class PaginationTest(TestCase):
         self.assertGreaterEqual(reviews_in_response, 2)
 
 
+class CursorPaginationTest(TestCase):
+    """Test cases for keyset (cursor) pagination"""
+    
+    def setUp(self):
+        """Set up test data with multiple reviews"""
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.reviews = [
+            Review.objects.create(
+                title=f'Test Horror Film {i}',
+                slug=f'test-horror-film-{i}',
+                author=self.user,
+                film_title=f'Cursor Film {i}',
+                year=2024,
+                director=f'Test Director {i}',
+                rating=4,
+                body=f'This is test horror film review {i}.',
+                status=Review.Status.PUBLISHED
+            )
+            for i in range(7)
+        ]
+        # newest first, as ordered by (created_on, id) descending
+        self.expected = list(reversed(self.reviews))
+    
+    def test_walk_forward_and_back(self):
+        """Test that next and previous cursors cover every review once"""
+        paginator = CursorPaginator(Review.published.all(), 3)
+        first = paginator.page()
+        self.assertEqual(list(first), self.expected[:3])
+        self.assertFalse(first.has_previous())
+        
+        second = paginator.page(first.next_cursor)
+        self.assertEqual(list(second), self.expected[3:6])
+        third = paginator.page(second.next_cursor)
+        self.assertEqual(list(third), self.expected[6:])
+        self.assertFalse(third.has_next())
+        
+        back = paginator.page(third.previous_cursor)
+        self.assertEqual(list(back), self.expected[3:6])
+        self.assertEqual(list(paginator.page(back.previous_cursor)), self.expected[:3])
+        self.assertFalse(paginator.page(back.previous_cursor).has_previous())
+    
+    def test_edits_do_not_shift_pages(self):
+        """Test that editing a review keeps its place in cursor order"""
+        paginator = CursorPaginator(Review.published.all(), 3)
+        first = paginator.page()
+        self.expected[4].save()  # bumps updated_on only
+        self.assertEqual(list(paginator.page(first.next_cursor)), self.expected[3:6])
+    
+    def test_invalid_cursor_returns_first_page(self):
+        """Test that a tampered cursor falls back to the first page"""
+        paginator = CursorPaginator(Review.published.all(), 3)
+        self.assertEqual(list(paginator.page('not-a-cursor')), self.expected[:3])
+    
+    def test_list_view_cursor_mode(self):
+        """Test the list view with a cursor skips the COUNT query"""
+        page = CursorPaginator(Review.published.all(), 3).page()
+        sidebar.get_sidebar()
+        url = reverse('blog:post_list') + f'?cursor={page.next_cursor}'
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(list(response.context['posts']), self.expected[3:6])
+        self.assertNotContains(response, 'Page 2 of')
+        self.assertContains(response, '?cursor=')
+        self.assertFalse(any('COUNT(' in q['sql'] for q in queries.captured_queries))
+
+    def test_cursor_pagination_setting(self):
+        """Test that BLOG_CURSOR_PAGINATION is read on every request"""
+        with override_settings(BLOG_CURSOR_PAGINATION=True):
+            response = self.client.get(reverse('blog:post_list'))
+        self.assertNotContains(response, 'Page 1 of')
+        self.assertContains(response, '?cursor=')
+        response = self.client.get(reverse('blog:post_list'))
+        self.assertContains(response, 'Page 1 of')
+
+
+class SearchTest(TestCase):
+    """Test cases for full-text review search"""
+    
+    def setUp(self):
+        """Set up reviews to search"""
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            is_staff=True,
+            is_superuser=True
+        )
+        self.title_match = Review.objects.create(
+            title='Suspiria Review',
+            slug='suspiria',
+            author=self.user,
+            film_title='Suspiria',
+            year=1977,
+            director='Dario Argento',
+            rating=5,
+            body='A dance academy hides a coven of witches.',
+            status=Review.Status.PUBLISHED
+        )
+        self.body_match = Review.objects.create(
+            title='Inferno Review',
+            slug='inferno',
+            author=self.user,
+            film_title='Inferno',
+            year=1980,
+            director='Dario Argento',
+            rating=3,
+            body='The second film in the trilogy that began with Suspiria.',
+            status=Review.Status.PUBLISHED
+        )
+        self.draft = Review.objects.create(
+            title='Draft Review',
+            slug='draft',
+            author=self.user,
+            film_title='Suspiria Remake',
+            year=2018,
+            director='Luca Guadagnino',
+            rating=4,
+            body='Draft notes.',
+            status=Review.Status.DRAFT
+        )
+    
+    def test_results_ranked_by_field_weight(self):
+        """Test that a film title match ranks above a body match"""
+        results = search_reviews('suspiria')
+        self.assertEqual(results.count(), 2)
+        self.assertEqual(list(results[0:10]), [self.title_match, self.body_match])
+    
+    def test_index_follows_saves(self):
+        """Test that edits and deletes are reflected in the index"""
+        self.body_match.body = 'A sequel about an alchemist and three mothers.'
+        self.body_match.save()
+        self.assertEqual(list(search_reviews('alchemist')[0:10]), [self.body_match])
+        self.assertEqual(search_reviews('trilogy').count(), 0)
+        self.body_match.delete()
+        self.assertEqual(search_reviews('alchemist').count(), 0)
+    
+    def test_search_view(self):
+        """Test the public search page"""
+        response = self.client.get(reverse('blog:post_search'), {'q': 'argento'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'blog/post/search.html')
+        self.assertEqual(len(response.context['results']), 2)
+        self.assertNotIn(self.draft, response.context['results'])
+    
+    def test_search_view_handles_syntax(self):
+        """Test that FTS operators in user input are treated as text"""
+        response = self.client.get(reverse('blog:post_search'), {'q': '"(NEAR* OR'})
+        self.assertEqual(response.status_code, 200)
+    
+    def test_admin_search_uses_index(self):
+        """Test the admin changelist search hook"""
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get(reverse('admin:blog_review_changelist'), {'q': 'guadagnino'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['cl'].result_list), [self.draft])
+
+
+class ImportReviewsTest(TestCase):
+    """Test cases for the import_reviews management command"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(username='admin', password='testpass123')
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as handle:
+            handle.write(content)
+        return path
+
+    def import_reviews(self, path, *args):
+        out = StringIO()
+        call_command('import_reviews', path, *args, stdout=out)
+        return out.getvalue()
+
+    def test_import_jsonl(self):
+        """Test a JSONL import with tags, authors and dates"""
+        records = [
+            {'film_title': 'The Thing', 'year': 1982, 'director': 'John Carpenter',
+             'rating': 5, 'body': 'Paranoia in the Antarctic.', 'tags': ['creature', 'classic'],
+             'created_on': '2020-10-31T21:00:00'},
+            {'film_title': 'Halloween', 'year': 1978, 'director': 'John Carpenter',
+             'rating': 4, 'body': 'The shape is out there.', 'tags': ['slasher', 'classic'],
+             'author': 'critic', 'status': 'draft'},
+        ]
+        path = self.write('reviews.jsonl', '\n'.join(json.dumps(r) for r in records))
+        with self.assertNumQueries(12):
+            output = self.import_reviews(path, '--create-authors')
+        self.assertIn('rows/sec', output)
+        thing = Review.objects.get(slug='the-thing-1982')
+        self.assertEqual(thing.title, 'The Thing Review')
+        self.assertEqual(thing.author, self.user)
+        self.assertEqual(thing.status, Review.Status.PUBLISHED)
+        self.assertEqual(timezone.localtime(thing.created_on).isoformat()[:19], '2020-10-31T21:00:00')
+        self.assertTrue(Review._meta.get_field('created_on').auto_now_add)
+        self.assertEqual(thing.excerpt, '<p>Paranoia in the Antarctic.</p>')
+        self.assertEqual(sorted(thing.tags.names()), ['classic', 'creature'])
+        halloween = Review.objects.get(slug='halloween-1978')
+        self.assertEqual(halloween.author.username, 'critic')
+        self.assertEqual(halloween.status, Review.Status.DRAFT)
+        self.assertEqual(Review.objects.filter(tags__name='classic').count(), 2)
+        self.assertEqual(list(search_reviews('antarctic')[0:10]), [thing])
+
+    @override_settings(BLOG_PAGE_CACHE_ENABLED=True)
+    def test_import_purges_cached_pages(self):
+        """Test that the main list, tag lists and sidebar are purged after an import"""
+        cache.clear()
+        path = self.write('reviews.jsonl', json.dumps({
+            'film_title': 'Alien', 'year': 1979, 'director': 'Ridley Scott',
+            'body': 'In space no one can hear you scream.', 'tags': ['space', 'creature'],
+        }))
+        self.import_reviews(path)
+        versions = page_cache.get_cache().get_many([
+            page_cache.VERSION_KEY.format(key=key)
+            for key in ('list', 'sidebar', 'tag:space', 'tag:creature')
+        ])
+        self.assertEqual(len(versions), 4)
+
+    def test_keep_timestamps_is_per_thread(self):
+        """Test that a bulk load keeps its timestamps without affecting other threads"""
+        field = Review._meta.get_field('created_on')
+        supplied = timezone.make_aware(datetime(2020, 10, 31, 21))
+        seen = {}
+
+        def other_thread():
+            seen['other'] = field.pre_save(Review(created_on=supplied), add=True)
+        with keep_timestamps():
+            seen['loader'] = field.pre_save(Review(created_on=supplied), add=True)
+            thread = threading.Thread(target=other_thread)
+            thread.start()
+            thread.join()
+        self.assertEqual(seen['loader'], supplied)
+        self.assertNotEqual(seen['other'], supplied)
+
+    def test_import_is_idempotent(self):
+        """Test that re-running an import skips existing (slug, date) pairs"""
+        path = self.write(
+            'reviews.csv',
+            'film_title,year,director,rating,body,tags,created_on\n'
+            'Alien,1979,Ridley Scott,5,In space no one can hear you scream.,"space, creature",2021-01-01\n'
+            'Alien,1979,Ridley Scott,5,Duplicate row in the same file.,,2021-01-01\n'
+            'Alien,1979,Ridley Scott,4,A rewatch a year later.,space,2022-01-01\n'
+        )
+        output = self.import_reviews(path, '--batch-size', '2')
+        self.assertIn('Imported 2 reviews, skipped 1', output)
+        output = self.import_reviews(path)
+        self.assertIn('Imported 0 reviews, skipped 3', output)
+        self.assertEqual(Review.objects.filter(slug='alien-1979').count(), 2)
+        self.assertEqual(Review.objects.filter(tags__name='space').count(), 2)
+
+    def test_invalid_rows_are_reported(self):
+        """Test that rows with missing fields or unknown statuses are left out"""
+        records = [
+            {'film_title': 'The Fog', 'year': 1980, 'director': 'John Carpenter',
+             'body': 'Something in the fog.'},
+            {'film_title': 'Suspiria', 'year': 1977, 'body': 'No director given.'},
+            {'film_title': 'Hereditary', 'year': 2018, 'director': 'Ari Aster',
+             'body': 'Grief.', 'status': 'archived'},
+            {'film_title': 'Possession', 'year': 'soon', 'director': 'Andrzej Zulawski',
+             'body': 'Subway.'},
+            {'film_title': 'Martyrs', 'year': 2008, 'director': 'P' * 201, 'body': 'Too long.'},
+        ]
+        lines = [json.dumps(r) for r in records]
+        lines.insert(4, '{"film_title": "Broken')
+        path = self.write('reviews.jsonl', '\n'.join(lines))
+        err = StringIO()
+        out = StringIO()
+        call_command('import_reviews', path, stdout=out, stderr=err)
+        self.assertIn('Imported 1 reviews, skipped 0, rejected 5', out.getvalue())
+        self.assertIn('Line 2: missing director', err.getvalue())
+        self.assertIn("Line 3: unknown status: 'archived'", err.getvalue())
+        self.assertIn("Line 4: invalid year: 'soon'", err.getvalue())
+        self.assertIn('Line 5: invalid JSON', err.getvalue())
+        self.assertIn('Line 6: director is longer than 200 characters', err.getvalue())
+        self.assertEqual(list(Review.objects.values_list('slug', flat=True)), ['the-fog-1980'])
+
+    def test_unknown_author(self):
+        """Test that unknown authors are rejected without --create-authors"""
+        path = self.write('reviews.jsonl', json.dumps({
+            'film_title': 'Audition', 'year': 1999, 'director': 'Takashi Miike',
+            'body': 'Kiri kiri kiri.', 'author': 'nobody',
+        }))
+        with self.assertRaises(CommandError):
+            self.import_reviews(path)
+        self.assertFalse(Review.objects.exists())
+
+
+class BenchmarkCommandsTest(TestCase):
+    """Test cases for the dataset generator and benchmark runner"""
+
+    def generate(self, *args):
+        call_command(
+            'generate_dataset', '--users', '5', '--reviews', '30',
+            '--comments', '200', '--tags', '10', *args, stdout=StringIO()
+        )
+
+    def test_generate_dataset(self):
+        """Test the generated dataset shape and reproducibility"""
+        self.generate()
+        self.assertEqual(User.objects.filter(username__startswith='bench_user_').count(), 5)
+        self.assertEqual(Review.objects.count(), 30)
+        self.assertEqual(Comment.objects.count(), 200)
+        self.assertTrue(Comment.objects.filter(is_active=False).exists())
+        # stored counters match the active comments
+        top = Review.objects.order_by('-comment_count').first()
+        self.assertEqual(top.comment_count, top.comments.filter(is_active=True).count())
+        self.assertGreater(top.comment_count, 200 / 30)
+        snapshot = list(Review.objects.order_by('slug').values_list('slug', 'rating', 'comment_count'))
+
+        with self.assertRaises(CommandError):
+            self.generate()
+        self.generate('--clear')
+        self.assertEqual(
+            list(Review.objects.order_by('slug').values_list('slug', 'rating', 'comment_count')),
+            snapshot
+        )
+
+    def test_clear_without_per_row_signals(self):
+        """Test that --clear deletes the dataset without post_delete per row"""
+        self.generate()
+        author = User.objects.create_user(username='realauthor', password='pass12345')
+        review = Review.objects.create(
+            title='Real Review', slug='real-review', author=author, film_title='Real',
+            year=2000, director='Someone', body='Real body.', status=Review.Status.PUBLISHED
+        )
+        bench_user = User.objects.filter(username__startswith='bench_user_').first()
+        Comment.objects.create(post=review, user=bench_user, body='Generated comment')
+        deleted = []
+        post_delete.connect(
+            lambda sender, **kwargs: deleted.append(sender), weak=False, dispatch_uid='clear_test'
+        )
+        self.addCleanup(post_delete.disconnect, dispatch_uid='clear_test')
+        self.generate('--clear')
+        self.assertEqual(deleted, [])
+        self.assertEqual(Review.objects.count(), 31)
+        review.refresh_from_db()
+        self.assertEqual(review.comment_count, 0)
+        self.assertFalse(User.objects.filter(pk=bench_user.pk).exists())
+
+    def test_bench_site_reports_every_scenario(self):
+        """Test that the runner drives each URL and reports JSON"""
+        self.generate()
+        out = StringIO()
+        call_command(
+            'bench_site', '--requests', '2', '--warmup', '0',
+            stdout=out, stderr=StringIO()
+        )
+        report = json.loads(out.getvalue())
+        self.assertEqual(report['reviews'], 30)
+        for name in ['post_list', 'post_list_by_tag', 'post_detail', 'post_search',
+                     'post_comment', 'edit_comment', 'delete_comment_submit',
+                     'login_submit', 'register_submit', 'logout']:
+            result = report['scenarios'][name]
+            self.assertEqual(sum(result['statuses'].values()), 2)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+        for result in report['scenarios'].values():
+            self.assertTrue(set(result['statuses']) <= {'200', '302'}, result)
+        # the runner's own user is not part of the generated dataset
+        self.generate('--clear')
+        self.assertTrue(User.objects.filter(username='bench_runner').exists())
+        self.assertEqual(User.objects.filter(username__startswith='bench_user_').count(), 5)
+
+    def test_bench_connections_compares_modes(self):
+        """Test that both modes serve every request and settings are restored"""
+        max_age = connection.settings_dict['CONN_MAX_AGE']
+        out = StringIO()
+        call_command(
+            'bench_connections', '--threads', '2', '--requests', '6',
+            '--modes', 'close', 'persistent', stdout=out, stderr=StringIO()
+        )
+        report = json.loads(out.getvalue())
+        self.assertEqual(set(report['modes']), {'close', 'persistent'})
+        for result in report['modes'].values():
+            self.assertEqual(result['statuses'], {'200': 6})
+        self.assertEqual(connection.settings_dict['CONN_MAX_AGE'], max_age)
+
+
 class ResponsiveDesignTest(TestCase):
     """Test cases for responsive design functionality"""
     
@@ -25,6 +25,16 @@ urlpatterns = [
         views.post_detail,
         name='post_detail'
     ),
+    path(
+        'search/',
+        views.post_search,
+        name='post_search'
+    ),
+    path(
+        '<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'
+    ),
     path(
         '<int:post_id>/comment/',
         views.post_comment,
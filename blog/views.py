@@ -1,11 +1,22 @@
+from django.conf import settings
 from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
 from django.contrib.auth.decorators import login_required
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, render, redirect
-from django.views.decorators.http import require_POST
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.http import urlencode
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition, require_POST
+from django.views.decorators.vary import vary_on_cookie
 from django.views.generic import ListView
 from taggit.models import Tag
-from .forms import CommentForm
+from . import conditional, page_cache
+from .forms import CommentForm, SearchForm
 from .models import Review, Comment
+from .pagination import CursorPaginator
+from .search import search_reviews
+from .sidebar import get_sidebar
 
 
 def post_list(request):
@@ -15,6 +26,10 @@ def post_list(request):
     It retrieves all reviews with a status of PUBLISHED
     """
     review_list = Review.published.all()
+    if 'cursor' in request.GET:
+        # keyset pagination, see blog/pagination.py
+        reviews = CursorPaginator(review_list, 3).page(request.GET['cursor'])
+        return render(request, 'blog/post/list.html', {'posts': reviews})
     # Pagination with 3 reviews per page
     paginator = Paginator(review_list, 3)
     page_number = request.GET.get('page', 1)
@@ -34,39 +49,95 @@ def post_list(request):
     )
 
 
+@page_cache.cacheable
+@vary_on_cookie
+@condition(
+    etag_func=conditional.detail_etag,
+    last_modified_func=conditional.detail_last_modified
+)
 def post_detail(request, year, month, day, post):
     """
     This review detail view takes the id arguement of a review. It uses the
     get_object_or_404 shortcut.
     If the review is not found a HTTP 404 exception is raised.
     """
+    try:
+        created_on = Review.date_lookup(year, month, day)
+    except ValueError:
+        raise Http404('No review found for that date')
     post = get_object_or_404(
-        Review,
+        Review.objects.select_related('author').prefetch_related('tags').defer('body'),
         status=Review.Status.PUBLISHED,
         slug=post,
-        created_on__year=year,
-        created_on__month=month,
-        created_on__day=day
+        **created_on
     )
+    page_cache.add_surrogate_keys(request, f'review:{post.pk}', 'sidebar')
 
-    comments = post.comments.filter(is_active=True)
-    form = CommentForm()
-    most_commented_posts = Review.published.most_commented()
-    highest_rated = Review.published.highest_rated()
-
+    # the comment form is a hole (blog/holes.py), rendered per user
     return render(
         request,
         'blog/post/detail.html',
         {
             'post': post,
-            'comments': comments,
-            'form': form,
-            'most_commented_posts': most_commented_posts,
-            'highest_rated': highest_rated
+            'comments': comment_page(post.id),
+            'sidebar': get_sidebar()
         }
     )
 
 
+def comment_page(post_id, cursor=None, start=1):
+    """
+    One page of a review's active comments, oldest first, by keyset on
+    (created_on, id) so later pages cost the same as the first. `start` is
+    the position of the first comment on the page, used for numbering
+    """
+    comments = (
+        Comment.objects.filter(post_id=post_id, is_active=True)
+        .select_related('user')
+        .only('id', 'post_id', 'body', 'created_on', 'user__id', 'user__username')
+    )
+    paginator = CursorPaginator(
+        comments, settings.BLOG_COMMENTS_PER_PAGE, ordering=('created_on', 'id')
+    )
+    page = paginator.page(cursor)
+    page.start = start
+    page.next_url = None
+    if page.has_next():
+        page.next_url = '{}?{}'.format(
+            reverse('blog:post_comments', args=[post_id]),
+            urlencode({'cursor': page.next_cursor, 'start': start + len(page)})
+        )
+    return page
+
+
+@page_cache.cacheable
+def post_comments(request, post_id):
+    """
+    Later pages of comments for the detail page's "Load more" button, as
+    JSON: the rendered comments (including the next button) and the URL of
+    the page after them
+    """
+    get_object_or_404(Review.published.only('id'), id=post_id)
+    try:
+        start = max(1, int(request.GET.get('start', 1)))
+    except ValueError:
+        start = 1
+    page = comment_page(post_id, request.GET.get('cursor'), start)
+    page_cache.add_surrogate_keys(request, f'review:{post_id}')
+    html = render_to_string(
+        'blog/post/includes/comment_page.html',
+        {'comments': page},
+        request=request
+    )
+    return JsonResponse({'html': html, 'count': len(page), 'next': page.next_url})
+
+
+@page_cache.cacheable
+@method_decorator(vary_on_cookie, name='dispatch')
+@method_decorator(condition(
+    etag_func=conditional.list_etag,
+    last_modified_func=conditional.list_last_modified
+), name='dispatch')
 class PostListView(ListView):
     """
     Alternative review list view
@@ -77,7 +148,11 @@ class PostListView(ListView):
     template_name = 'blog/post/list.html'
 
     def get_queryset(self):
-        queryset = Review.published.all()
+        # authors and tags are rendered on every card, so load them up front
+        # instead of issuing two extra queries per review. Cards show the
+        # pre-rendered excerpt, so the body columns are never loaded
+        queryset = Review.published.select_related(
+            'author').prefetch_related('tags').defer('body', 'body_html')
         tag_slug = self.kwargs.get('tag_slug')
         if tag_slug:
             self.tag = get_object_or_404(Tag, slug=tag_slug)
@@ -86,14 +161,55 @@ class PostListView(ListView):
             self.tag = None
         return queryset
 
+    def paginate_queryset(self, queryset, page_size):
+        # keyset pagination on (created_on, id) instead of COUNT + OFFSET. It can
+        # be switched on for every request with BLOG_CURSOR_PAGINATION, and any
+        # request carrying a ?cursor= parameter uses it regardless
+        cursor_pagination = getattr(settings, 'BLOG_CURSOR_PAGINATION', False)
+        if not (cursor_pagination or 'cursor' in self.request.GET):
+            return super().paginate_queryset(queryset, page_size)
+        paginator = CursorPaginator(queryset, page_size)
+        page = paginator.page(self.request.GET.get('cursor'))
+        return (paginator, page, page.object_list, page.has_other_pages())
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['tag'] = self.tag
-        context['most_commented_posts'] = Review.published.most_commented()
-        context['highest_rated'] = Review.published.highest_rated()
+        context['sidebar'] = get_sidebar()
+        page_cache.add_surrogate_keys(
+            self.request,
+            f'tag:{self.tag.slug}' if self.tag else 'list',
+            'sidebar',
+            *page_cache.review_keys(context['posts'])
+        )
         return context
 
 
+def post_search(request):
+    """
+    Full-text search over published reviews, best matches first.
+    See blog/search.py for the PostgreSQL and SQLite index backends
+    """
+    form = SearchForm(request.GET or None)
+    query = ''
+    results = None
+    if form.is_valid():
+        query = form.cleaned_data['q']
+        paginator = Paginator(search_reviews(query), 10)
+        results = paginator.get_page(request.GET.get('page'))
+
+    return render(
+        request,
+        'blog/post/search.html',
+        {
+            'form': form,
+            'query': query,
+            'results': results,
+            'sidebar': get_sidebar()
+        }
+    )
+
+
 @login_required
 @require_POST
 def post_comment(request, post_id):
@@ -106,14 +222,15 @@ def post_comment(request, post_id):
         comment.save()
         return redirect(post.get_absolute_url())
     else:
-        comments = post.comments.filter(is_active=True)
+        # show the errors in the comment form hole
+        request.hole_context = {'form': form}
         return render(
             request,
             'blog/post/detail.html',
             {
                 'post': post,
-                'comments': comments,
-                'form': form
+                'comments': comment_page(post.id),
+                'sidebar': get_sidebar()
             }
         )
 
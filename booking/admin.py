@@ -1,3 +1,27 @@
 from django.contrib import admin
+from .feeds import csv_response
+from .models import Booking, Table, Timeslot
 
-# Register your models here.
+
+@admin.register(Booking)
+class BookingAdmin(admin.ModelAdmin):
+    list_display = ['slot_start', 'table', 'party_size', 'preferred_table']
+    list_filter = ['table', 'party_size']
+    list_select_related = ['table', 'preferred_table']
+    date_hierarchy = 'slot_start'
+    ordering = ['-slot_start']
+    actions = ['export_csv']
+
+    @admin.action(description='Export selected bookings as CSV')
+    def export_csv(self, request, queryset):
+        return csv_response(queryset)
+
+
+@admin.register(Timeslot)
+class TimeslotAdmin(admin.ModelAdmin):
+    list_display = ['start', 'label']
+
+
+@admin.register(Table)
+class TableAdmin(admin.ModelAdmin):
+    list_display = ['number', 'name', 'capacity']
@@ -0,0 +1,263 @@
+"""
+Automatic table assignment.
+
+Each request is a Party: a party size, an optional preferred table kind
+and a slot. Every table seats one party per slot. The goal is to seat as
+many covers (guests) as possible, and after that to give as many parties
+as possible the kind of table they asked for.
+
+assign_slot() seats the parties of one slot in two passes:
+
+    greedy  largest party first, each at the smallest free table it fits,
+            preferring its kind among tables of that size. A table fits
+            every party up to its seats, so the tables a party fits shrink
+            as the party grows; seating the largest first in the smallest
+            fitting table therefore seats the most covers possible.
+    repair  a party not at its preferred kind swaps tables with a party
+            that is at that kind without having asked for it, when both
+            still fit. Every swap meets one more preference.
+
+Table kinds are Table.name ("Window"); a booking's preferred_table stands
+for its kind. place() seats one new party around bookings that already
+have a table, moving at most one of them to a free table to make room.
+
+reoptimise() re-runs assign_slot() over a day's stored bookings and moves
+them when that meets more preferences or leaves bigger tables free.
+"""
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+
+from . import availability
+from .models import Booking
+
+
+class Table:
+    def __init__(self, id, kind, seats):
+        self.id = id
+        self.kind = kind
+        self.seats = seats
+
+    def __repr__(self):
+        return f'<Table {self.id} {self.kind} {self.seats}>'
+
+
+class Party:
+    """
+    One request for a table. `ref` is whatever the caller needs to map the
+    result back, such as the Booking
+    """
+
+    def __init__(self, size, preferred='', slot=None, ref=None):
+        self.size = size
+        self.preferred = preferred
+        self.slot = slot
+        self.ref = ref
+
+    def __repr__(self):
+        return f'<Party {self.size} {self.preferred or "-"} {self.slot}>'
+
+
+class Assignment:
+    """
+    The tables given to the parties of one slot
+    """
+
+    def __init__(self, seated, unseated):
+        self.seated = seated
+        self.unseated = unseated
+
+    @property
+    def covers(self):
+        return sum(party.size for party in self.seated)
+
+    @property
+    def preferences_met(self):
+        return sum(1 for party, table in self.seated.items() if party.preferred == table.kind)
+
+    @property
+    def seats_used(self):
+        return sum(table.seats for table in self.seated.values())
+
+
+def site_tables(layout):
+    return [
+        Table(table, layout.names[table], layout.capacity[table]) for table in layout.tables
+    ]
+
+
+def party_for(layout, booking):
+    preferred = layout.numbers.get(booking.preferred_table_id)
+    return Party(
+        booking.party_size, layout.names.get(preferred, ''), booking.slot, booking
+    )
+
+
+class FreeTables:
+    """
+    Free tables grouped by seats and kind, for best-fit lookups
+    """
+
+    def __init__(self, tables):
+        self.by_seats = defaultdict(lambda: defaultdict(list))
+        for table in tables:
+            self.by_seats[table.seats][table.kind].append(table)
+        self.seats = sorted(self.by_seats)
+
+    def take(self, size, preferred=''):
+        """
+        Remove and return the smallest free table seating `size`, of the
+        preferred kind if one of that size is free, or None
+        """
+        for seats in self.seats[bisect_left(self.seats, size):]:
+            kinds = self.by_seats[seats]
+            if kinds.get(preferred):
+                return kinds[preferred].pop()
+            for tables in kinds.values():
+                if tables:
+                    return tables.pop()
+        return None
+
+
+def _repair_preferences(seated):
+    at_kind = defaultdict(dict)
+    for party, table in seated.items():
+        at_kind[table.kind][party] = None
+    for party in list(seated):
+        mine = seated[party]
+        if not party.preferred or mine.kind == party.preferred:
+            continue
+        for other in at_kind[party.preferred]:
+            theirs = seated[other]
+            if (
+                theirs.seats >= party.size
+                and mine.seats >= other.size
+                and other.preferred != theirs.kind
+            ):
+                break
+        else:
+            continue
+        seated[party], seated[other] = theirs, mine
+        del at_kind[theirs.kind][other]
+        del at_kind[mine.kind][party]
+        at_kind[theirs.kind][party] = None
+        at_kind[mine.kind][other] = None
+
+
+def assign_slot(tables, parties):
+    """
+    Seat the parties of one slot at `tables`. Parties of the same size
+    keep their order, so earlier requests win ties
+    """
+    free = FreeTables(tables)
+    seated = {}
+    unseated = []
+    for party in sorted(parties, key=lambda party: -party.size):
+        table = free.take(party.size, party.preferred)
+        if table is None:
+            unseated.append(party)
+        else:
+            seated[party] = table
+    _repair_preferences(seated)
+    return Assignment(seated, unseated)
+
+
+def assign(tables, parties):
+    """
+    {slot: Assignment} for a day's parties
+    """
+    by_slot = defaultdict(list)
+    for party in parties:
+        by_slot[party.slot].append(party)
+    return {slot: assign_slot(tables, slot_parties) for slot, slot_parties in by_slot.items()}
+
+
+def _best(tables, party):
+    fitting = [table for table in tables if table.seats >= party.size]
+    if not fitting:
+        return None
+    return min(fitting, key=lambda table: (table.seats, table.kind != party.preferred))
+
+
+def place(tables, occupied, party):
+    """
+    A table for `party` at a slot where `occupied` maps table ids to the
+    parties already seated there. Returns (table, moves), where moves is
+    a list of (party, from table, to table) to apply first, or (None, [])
+    """
+    free = [table for table in tables if table.id not in occupied]
+    table = _best(free, party)
+    if table is not None:
+        return table, []
+    options = []
+    for table in tables:
+        if table.id not in occupied or table.seats < party.size:
+            continue
+        other = occupied[table.id]
+        target = _best(free, other)
+        if target is not None:
+            options.append((table, other, target))
+    if not options:
+        return None, []
+    table, other, target = min(
+        options, key=lambda option: (option[0].seats, option[0].kind != party.preferred)
+    )
+    return table, [(other, table, target)]
+
+
+def _score(assignment):
+    return (
+        -len(assignment.unseated),
+        assignment.preferences_met,
+        -assignment.seats_used,
+    )
+
+
+def reoptimise(day, apply=True):
+    """
+    Reassign the tables of the day's bookings slot by slot, keeping the
+    current layout unless the new one is better. Returns the moves as
+    (booking, new table number); with apply=False nothing is saved
+    """
+    layout = availability.get_layout()
+    tables = site_tables(layout)
+    by_number = {table.id: table for table in tables}
+    moves = []
+    with transaction.atomic():
+        bookings = [
+            booking for booking in
+            Booking.objects.select_for_update().on(day).order_by('pk')
+            if booking.table_id in layout.numbers
+        ]
+        for slot in layout.slots:
+            parties = [
+                party_for(layout, booking) for booking in bookings if booking.slot == slot
+            ]
+            current = Assignment(
+                {party: by_number[layout.numbers[party.ref.table_id]] for party in parties}, []
+            )
+            proposed = assign_slot(tables, parties)
+            if _score(proposed) <= _score(current):
+                continue
+            moves += [
+                (party.ref, table.id) for party, table in proposed.seated.items()
+                if layout.table_ids[table.id] != party.ref.table_id
+            ]
+        if apply and moves:
+            # tables are swapped, so park the moved bookings a few
+            # microseconds off their slot first to keep (slot_start, table)
+            # unique; nothing outside this transaction sees them there
+            for index, (booking, table) in enumerate(moves, 1):
+                Booking.objects.filter(pk=booking.pk).update(
+                    slot_start=booking.slot_start + timedelta(microseconds=index)
+                )
+            for booking, table in moves:
+                booking.table_id = layout.table_ids[table]
+                Booking.objects.filter(pk=booking.pk).update(
+                    slot_start=booking.slot_start, table_id=booking.table_id
+                )
+    if apply and moves:
+        availability.invalidate(day)
+    return moves
@@ -0,0 +1,218 @@
+"""
+Table availability from a precomputed occupancy grid.
+
+Bookable slots and tables are rows of Timeslot and Table; together they
+form the Layout, cached until one of them changes (booking/signals.py).
+Slots are named by their start time ("18:00") and tables by their number
+("1").
+
+Bookings for a whole date range are loaded with one index range scan on
+slot_start into one integer bitmask per day. Bit
+`slot_index * len(tables) + table_index` is set when that table is taken
+at that slot, so "which tables are free on day D" and "what is the first
+free slot after T" are answered in memory.
+
+Per-day masks are cached under the layout's version, so masks built for
+other slots or tables are never read back. get_grid() only queries the
+days missing from the cache, in one range query. booking/signals.py drops
+a day's mask when a booking on it is created, moved or cancelled, which
+also gives the day a new version stamp (day_versions(), used by the
+calendar feeds in booking/feeds.py as their validators).
+
+Settings:
+    BOOKING_GRID_CACHE          cache alias from CACHES (default 'default')
+    BOOKING_GRID_CACHE_TIMEOUT  seconds a day's mask is kept (default 5 min)
+"""
+import hashlib
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+
+from .models import Booking, Table, Timeslot
+
+LAYOUT_KEY = 'booking:layout'
+DAY_KEY = 'booking:grid:{version}:{day}'
+DAY_VERSION_KEY = 'booking:version:{day}'
+
+
+def get_cache():
+    return caches[getattr(settings, 'BOOKING_GRID_CACHE', 'default')]
+
+
+class Layout:
+    """
+    The slots and tables that can be booked, in display order
+    """
+
+    def __init__(self, timeslots, tables):
+        self.slot_times = [timeslot.start for timeslot in timeslots]
+        self.slots = [start.strftime('%H:%M') for start in self.slot_times]
+        self.labels = {
+            slot: timeslot.label for slot, timeslot in zip(self.slots, timeslots)
+        }
+        self.tables = [str(table.number) for table in tables]
+        self.names = {str(table.number): table.name for table in tables}
+        self.capacity = {str(table.number): table.capacity for table in tables}
+        self.table_ids = {str(table.number): table.pk for table in tables}
+        self.numbers = {table.pk: str(table.number) for table in tables}
+        self.day_size = len(self.slots) * len(self.tables)
+        self.full_day = (1 << self.day_size) - 1
+        self.version = hashlib.md5(
+            repr((
+                self.labels, sorted(self.table_ids.items()),
+                sorted(self.names.items()), sorted(self.capacity.items()),
+            )).encode(),
+            usedforsecurity=False
+        ).hexdigest()[:12]
+
+    def bit(self, slot, table):
+        return 1 << (self.slots.index(slot) * len(self.tables) + self.tables.index(table))
+
+    def slot_start(self, day, slot):
+        return timezone.make_aware(
+            datetime.combine(day, self.slot_times[self.slots.index(slot)])
+        )
+
+
+def get_layout():
+    cache = get_cache()
+    layout = cache.get(LAYOUT_KEY)
+    if layout is None:
+        layout = Layout(
+            list(Timeslot.objects.using(DEFAULT_DB_ALIAS)),
+            list(Table.objects.using(DEFAULT_DB_ALIAS)),
+        )
+        cache.set(LAYOUT_KEY, layout, None)
+    return layout
+
+
+def invalidate_layout():
+    get_cache().delete(LAYOUT_KEY)
+
+
+class OccupancyGrid:
+    """
+    Occupancy of every (slot, table) for the days start .. end - 1
+    """
+
+    def __init__(self, start, masks, layout):
+        self.start = start
+        self.masks = masks
+        self.layout = layout
+
+    @property
+    def end(self):
+        return self.start + timedelta(days=len(self.masks))
+
+    def days(self):
+        return [self.start + timedelta(days=offset) for offset in range(len(self.masks))]
+
+    def mask(self, day):
+        offset = (day - self.start).days
+        if not 0 <= offset < len(self.masks):
+            raise ValueError(f'{day} is outside the grid')
+        return self.masks[offset]
+
+    def is_free(self, day, slot, table):
+        return not self.mask(day) & self.layout.bit(slot, table)
+
+    def free_tables(self, day, slot):
+        mask = self.mask(day)
+        return [
+            table for table in self.layout.tables
+            if not mask & self.layout.bit(slot, table)
+        ]
+
+    def free_slots(self, day):
+        """
+        {slot: [free tables]} for the day, fully booked slots left out
+        """
+        free = {slot: self.free_tables(day, slot) for slot in self.layout.slots}
+        return {slot: tables for slot, tables in free.items() if tables}
+
+    def free_count(self, day):
+        return self.layout.day_size - self.mask(day).bit_count()
+
+    def first_free(self, after):
+        """
+        (slot start, table) of the first free table at a slot starting at
+        or after the aware datetime `after`, or None within the grid
+        """
+        for day in self.days():
+            mask = self.mask(day)
+            if mask == self.layout.full_day:
+                continue
+            for slot in self.layout.slots:
+                start = self.layout.slot_start(day, slot)
+                if start < after:
+                    continue
+                for table in self.layout.tables:
+                    if not mask & self.layout.bit(slot, table):
+                        return start, table
+        return None
+
+
+def load_grid(start, end, layout=None):
+    """
+    Build the grid for start .. end - 1 with a single range query, on the
+    primary because the result is cached for everyone
+    """
+    layout = layout or get_layout()
+    masks = [0] * (end - start).days
+    bookings = Booking.objects.using(DEFAULT_DB_ALIAS).between(start, end).order_by().values_list(
+        'slot_start', 'table_id'
+    )
+    for slot_start, table_id in bookings:
+        local = timezone.localtime(slot_start)
+        slot = local.strftime('%H:%M')
+        table = layout.numbers.get(table_id)
+        if slot in layout.labels and table is not None:
+            # bookings at a retired slot or table no longer block anything
+            masks[(local.date() - start).days] |= layout.bit(slot, table)
+    return OccupancyGrid(start, masks, layout)
+
+
+def get_grid(start, end):
+    """
+    The grid for start .. end - 1, from the per-day cache where possible
+    """
+    layout = get_layout()
+    days = [start + timedelta(days=offset) for offset in range((end - start).days)]
+    keys = {
+        day: DAY_KEY.format(version=layout.version, day=day.isoformat()) for day in days
+    }
+    cache = get_cache()
+    cached = cache.get_many(keys.values())
+    missing = [day for day in days if keys[day] not in cached]
+    if missing:
+        loaded = load_grid(missing[0], missing[-1] + timedelta(days=1), layout)
+        fresh = {keys[day]: loaded.mask(day) for day in missing}
+        cache.set_many(fresh, getattr(settings, 'BOOKING_GRID_CACHE_TIMEOUT', 60 * 5))
+        cached.update(fresh)
+    return OccupancyGrid(start, [cached[keys[day]] for day in days], layout)
+
+
+def invalidate(day):
+    cache = get_cache()
+    cache.delete(DAY_KEY.format(version=get_layout().version, day=day.isoformat()))
+    cache.set(DAY_VERSION_KEY.format(day=day.isoformat()), time.time_ns(), None)
+
+
+def day_versions(days):
+    """
+    The version stamp (nanoseconds) of each day, replaced whenever a
+    booking on it changes. A day without one, never changed or evicted,
+    starts with the current time
+    """
+    cache = get_cache()
+    keys = [DAY_VERSION_KEY.format(day=day.isoformat()) for day in days]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
@@ -0,0 +1,186 @@
+"""
+Streaming exports of bookings and iCalendar feeds.
+
+Bookings are read with QuerySet.iterator(chunk_size=...) as plain value
+tuples and written out one line at a time through a
+StreamingHttpResponse, so memory stays flat however many rows there are:
+at most one chunk of rows is held at a time (PostgreSQL uses a
+server-side cursor for it).
+
+Formats:
+    csv    one header line, then one line per booking
+    jsonl  one JSON object per line
+    ics    an iCalendar (RFC 5545) feed with one event per booking
+
+The .ics feeds are polled by calendar clients every few minutes, so they
+come with an ETag and Last-Modified built from the day version stamps in
+booking/availability.py: answering a matching conditional GET with a 304
+takes a cache lookup and no query.
+
+Settings:
+    BOOKING_EXPORT_CHUNK_SIZE  rows fetched per round trip (default 2000)
+"""
+import csv
+import hashlib
+import json
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
+
+from . import availability
+
+FIELDS = ['id', 'date', 'slot', 'slot_start', 'table', 'table_name', 'party_size', 'preferred_table']
+# Timeslots only have a start; an event is shown as one sitting long
+EVENT_LENGTH = timedelta(hours=1)
+ICS_TIME = '%Y%m%dT%H%M%SZ'
+
+
+def rows(queryset):
+    """
+    One dict per booking in `queryset`, in slot order, read in chunks
+    """
+    layout = availability.get_layout()
+    values = queryset.order_by('slot_start', 'table_id').values_list(
+        'pk', 'slot_start', 'table_id', 'party_size', 'preferred_table_id'
+    )
+    chunk_size = getattr(settings, 'BOOKING_EXPORT_CHUNK_SIZE', 2000)
+    for pk, slot_start, table_id, party_size, preferred_id in values.iterator(chunk_size=chunk_size):
+        local = timezone.localtime(slot_start)
+        table = layout.numbers.get(table_id, '')
+        yield {
+            'id': pk,
+            'date': local.date().isoformat(),
+            'slot': local.strftime('%H:%M'),
+            'slot_start': slot_start.isoformat(),
+            'table': table,
+            'table_name': layout.names.get(table, ''),
+            'party_size': party_size,
+            'preferred_table': layout.numbers.get(preferred_id, ''),
+        }
+
+
+class Echo:
+    """
+    A file-like object for csv.writer that hands each line back instead
+    of buffering it
+    """
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(queryset):
+    writer = csv.writer(Echo())
+    yield writer.writerow(FIELDS)
+    for row in rows(queryset):
+        yield writer.writerow([row[field] for field in FIELDS])
+
+
+def jsonl_lines(queryset):
+    for row in rows(queryset):
+        yield json.dumps(row) + '\n'
+
+
+def _ics_text(value):
+    return (
+        str(value).replace('\\', '\\\\').replace(';', '\\;')
+        .replace(',', '\\,').replace('\n', '\\n')
+    )
+
+
+def ics_lines(queryset, name, stamp):
+    """
+    The iCalendar feed. `stamp` (an aware datetime) is the DTSTAMP of every
+    event, so the body only changes when the bookings do
+    """
+    dtstamp = stamp.astimezone(dt_timezone.utc).strftime(ICS_TIME)
+    yield (
+        'BEGIN:VCALENDAR\r\n'
+        'VERSION:2.0\r\n'
+        'PRODID:-//Horror Haven//Bookings//EN\r\n'
+        'CALSCALE:GREGORIAN\r\n'
+        f'X-WR-CALNAME:{_ics_text(name)}\r\n'
+    )
+    for row in rows(queryset):
+        start = datetime.fromisoformat(row['slot_start']).astimezone(dt_timezone.utc)
+        summary = f'Table {row["table"]} ({row["table_name"]}), party of {row["party_size"]}'
+        yield (
+            'BEGIN:VEVENT\r\n'
+            f'UID:booking-{row["id"]}@horror-haven\r\n'
+            f'DTSTAMP:{dtstamp}\r\n'
+            f'DTSTART:{start.strftime(ICS_TIME)}\r\n'
+            f'DTEND:{(start + EVENT_LENGTH).strftime(ICS_TIME)}\r\n'
+            f'SUMMARY:{_ics_text(summary)}\r\n'
+            'END:VEVENT\r\n'
+        )
+    yield 'END:VCALENDAR\r\n'
+
+
+def csv_response(queryset, filename='bookings.csv'):
+    response = StreamingHttpResponse(csv_lines(queryset), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def jsonl_response(queryset, filename='bookings.jsonl'):
+    response = StreamingHttpResponse(jsonl_lines(queryset), content_type='application/x-ndjson')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def ics_response(queryset, name, stamp):
+    return StreamingHttpResponse(
+        ics_lines(queryset, name, stamp), content_type='text/calendar; charset=utf-8'
+    )
+
+
+def day_range(year, month, day):
+    try:
+        start = date(year, month, day)
+        return start, start + timedelta(days=1)
+    except (ValueError, OverflowError):
+        raise Http404('No such day')
+
+
+def week_range(year, week):
+    try:
+        start = date.fromisocalendar(year, week, 1)
+        return start, start + timedelta(days=7)
+    except (ValueError, OverflowError):
+        raise Http404('No such week')
+
+
+def feed_validators(request, start, end):
+    """
+    (etag, last_modified) of the bookings on the days start .. end - 1.
+    condition() asks for each separately, so they are kept on the request
+    """
+    if not hasattr(request, '_booking_validators'):
+        days = [start + timedelta(days=offset) for offset in range((end - start).days)]
+        versions = availability.day_versions(days)
+        raw = '|'.join(str(part) for part in (
+            start.isoformat(), end.isoformat(), availability.get_layout().version, *versions
+        ))
+        request._booking_validators = (
+            hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest(),
+            datetime.fromtimestamp(max(versions) / 1e9, tz=dt_timezone.utc),
+        )
+    return request._booking_validators
+
+
+def day_etag(request, year, month, day):
+    return feed_validators(request, *day_range(year, month, day))[0]
+
+
+def day_last_modified(request, year, month, day):
+    return feed_validators(request, *day_range(year, month, day))[1]
+
+
+def week_etag(request, year, week):
+    return feed_validators(request, *week_range(year, week))[0]
+
+
+def week_last_modified(request, year, week):
+    return feed_validators(request, *week_range(year, week))[1]
@@ -0,0 +1,51 @@
+from django import forms
+from django.utils import timezone
+
+from . import availability
+
+
+class ReservationForm(forms.Form):
+    date = forms.DateField()
+    slot = forms.ChoiceField()
+    # several tables book them together for a group, all or none
+    tables = forms.MultipleChoiceField(required=False)
+    # without tables, one is chosen to fit the party
+    party_size = forms.IntegerField(min_value=1, required=False)
+    preferred_table = forms.ChoiceField(required=False)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # slots and tables are rows in the database, not fixed choices
+        self.layout = availability.get_layout()
+        tables = [
+            (table, self.layout.names[table]) for table in self.layout.tables
+        ]
+        self.fields['slot'].choices = list(self.layout.labels.items())
+        self.fields['tables'].choices = tables
+        self.fields['preferred_table'].choices = [('', 'No preference')] + tables
+
+    def clean_date(self):
+        date = self.cleaned_data['date']
+        if date < timezone.localdate():
+            raise forms.ValidationError('Bookings cannot be made for past dates.')
+        return date
+
+    def clean_tables(self):
+        tables = self.cleaned_data['tables']
+        if len(set(tables)) != len(tables):
+            raise forms.ValidationError('Each table can only be chosen once.')
+        return tables
+
+    def clean_party_size(self):
+        party_size = self.cleaned_data['party_size']
+        largest = max(self.layout.capacity.values(), default=0)
+        if party_size and party_size > largest:
+            raise forms.ValidationError(f'Our largest table seats {largest}.')
+        return party_size
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if not cleaned_data.get('tables') and not cleaned_data.get('party_size'):
+            if not self.has_error('tables') and not self.has_error('party_size'):
+                raise forms.ValidationError('Choose tables or give a party size.')
+        return cleaned_data
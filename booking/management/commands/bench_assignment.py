@@ -0,0 +1,117 @@
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from booking import assignment
+
+# party sizes 1..8 and how common each is
+PARTY_WEIGHTS = [4, 30, 12, 20, 6, 12, 4, 6]
+TABLE_SEATS = [2, 2, 4, 4, 4, 6, 8]
+TABLE_KINDS = ['Window', 'Quiet', 'Music']
+SLOTS = ['18:00', '19:00', '20:00']
+
+
+def hand_picked(tables, parties):
+    """
+    The current behaviour: in order of arrival each guest takes the first
+    free table of the kind they want that fits, or any table that fits,
+    or is turned away
+    """
+    seated = {}
+    unseated = []
+    free = list(tables)
+    for party in parties:
+        fitting = [table for table in free if table.seats >= party.size]
+        chosen = next(
+            (table for table in fitting if table.kind == party.preferred),
+            fitting[0] if fitting else None
+        )
+        if chosen is None:
+            unseated.append(party)
+        else:
+            free.remove(chosen)
+            seated[party] = chosen
+    return assignment.Assignment(seated, unseated)
+
+
+def optimised(tables, parties):
+    return assignment.assign_slot(tables, parties)
+
+
+class Command(BaseCommand):
+    """
+    Compare hand-picked tables with the assignment of
+    booking/assignment.py on synthetic days: a restaurant of --tables
+    tables of mixed sizes and kinds, and --requests requests per day
+    spread over the slots, with random party sizes and preferences.
+    Nothing touches the database. Reports requests seated, covers, turned
+    away, preferences met and milliseconds per day for both as JSON.
+
+    Usage: python manage.py bench_assignment --requests 3000 --tables 400 --days 5
+    """
+    help = 'Benchmark automatic table assignment on synthetic requests'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help='Requests per day (default 2000)')
+        parser.add_argument('--tables', type=int, default=300, help='Tables in the restaurant (default 300)')
+        parser.add_argument('--days', type=int, default=3, help='Synthetic days (default 3)')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed (default 42)')
+        parser.add_argument('--output', help='Write the JSON report to this file')
+
+    def handle(self, *args, **options):
+        if min(options['requests'], options['tables'], options['days']) < 1:
+            raise CommandError('--requests, --tables and --days must be at least 1')
+        rng = random.Random(options['seed'])
+        tables = [
+            assignment.Table(
+                index, TABLE_KINDS[index % len(TABLE_KINDS)], rng.choice(TABLE_SEATS)
+            )
+            for index in range(options['tables'])
+        ]
+        days = []
+        for _ in range(options['days']):
+            days.append([
+                assignment.Party(
+                    rng.choices(range(1, 9), PARTY_WEIGHTS)[0],
+                    rng.choice(TABLE_KINDS + ['']),
+                    rng.choice(SLOTS),
+                )
+                for _ in range(options['requests'])
+            ])
+
+        report = {
+            'requests_per_day': options['requests'],
+            'tables': options['tables'],
+            'seats_per_slot': sum(table.seats for table in tables),
+            'days': options['days'],
+        }
+        for name, strategy in (('hand_picked', hand_picked), ('optimised', optimised)):
+            totals = {'seated': 0, 'covers': 0, 'turned_away': 0, 'preferences_met': 0}
+            elapsed = 0
+            for parties in days:
+                started = time.perf_counter()
+                by_slot = {}
+                for party in parties:
+                    by_slot.setdefault(party.slot, []).append(party)
+                results = [strategy(tables, slot_parties) for slot_parties in by_slot.values()]
+                elapsed += time.perf_counter() - started
+                for result in results:
+                    totals['seated'] += len(result.seated)
+                    totals['covers'] += result.covers
+                    totals['turned_away'] += len(result.unseated)
+                    totals['preferences_met'] += result.preferences_met
+            report[name] = {
+                **{key: round(value / options['days'], 1) for key, value in totals.items()},
+                'ms_per_day': round(elapsed * 1000 / options['days'], 2),
+            }
+        report['extra_covers'] = round(
+            report['optimised']['covers'] - report['hand_picked']['covers'], 1
+        )
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+        self.stdout.write(output)
@@ -0,0 +1,44 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from booking import assignment
+
+
+class Command(BaseCommand):
+    """
+    Re-run the table assignment (booking/assignment.py) over the bookings
+    of the coming days. A slot's tables are only changed when the new
+    layout meets more preferences or leaves bigger tables free, and every
+    booking stays seated. Run it after the evening's bookings pile up, or
+    nightly from cron.
+
+    Usage: python manage.py optimise_tables --days 7
+           python manage.py optimise_tables --start 2026-12-24 --days 2 --dry-run
+    """
+    help = 'Reassign tables for the bookings of the next N days'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7, help='Days to optimise (default 7)')
+        parser.add_argument('--start', type=date.fromisoformat, help='First day, YYYY-MM-DD (default today)')
+        parser.add_argument('--dry-run', action='store_true', help='Report the moves without saving them')
+
+    def handle(self, *args, **options):
+        if options['days'] < 1:
+            raise CommandError('--days must be at least 1')
+        start = options['start'] or timezone.localdate()
+        total = 0
+        for offset in range(options['days']):
+            day = start + timedelta(days=offset)
+            moves = assignment.reoptimise(day, apply=not options['dry_run'])
+            for booking, table in moves:
+                self.stdout.write(
+                    f'{day} {booking.slot}: booking {booking.pk} '
+                    f'(party of {booking.party_size}) to table {table}'
+                )
+            total += len(moves)
+        verb = 'Would move' if options['dry_run'] else 'Moved'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {total} booking(s) over {options["days"]} day(s)'
+        ))
@@ -0,0 +1,112 @@
+import json
+import random
+import threading
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connections
+from django.db.models import Count
+from django.utils import timezone
+
+from booking import availability, reservations
+from booking.models import Booking
+
+
+class Command(BaseCommand):
+    """
+    Fire many concurrent reservations at the same few slots and check that
+    no table ends up booked twice. Each thread books random
+    (day, slot, table) combinations through booking.reservations, so most
+    attempts collide. Reports successes, conflicts, errors, throughput per
+    second and any double bookings as JSON.
+
+    Bookings are made --offset days ahead (default a year), away from real
+    ones, and those days are cleared first. Do not point it at production.
+
+    Usage: python manage.py stress_reservations --threads 200 --attempts 5
+    """
+    help = 'Stress test concurrent reservations for double bookings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=200, help='Concurrent threads (default 200)')
+        parser.add_argument('--attempts', type=int, default=5, help='Reservations per thread (default 5)')
+        parser.add_argument('--days', type=int, default=2, help='Days the attempts are spread over (default 2)')
+        parser.add_argument('--offset', type=int, default=365, help='Days ahead of today (default 365)')
+        parser.add_argument('--group', type=int, default=1, help='Tables per reservation (default 1)')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed (default 42)')
+
+    def handle(self, *args, **options):
+        if options['threads'] < 1 or options['attempts'] < 1 or options['days'] < 1:
+            raise CommandError('--threads, --attempts and --days must be at least 1')
+        layout = availability.get_layout()
+        if not 1 <= options['group'] <= len(layout.tables):
+            raise CommandError(f'--group must be between 1 and {len(layout.tables)}')
+        first = timezone.localdate() + timedelta(days=options['offset'])
+        end = first + timedelta(days=options['days'])
+        in_range = Booking.objects.between(first, end)
+        for booking in in_range.all():
+            # one by one so the cached occupancy of each day is dropped
+            booking.delete()
+
+        days = [first + timedelta(days=offset) for offset in range(options['days'])]
+        results = {'booked': 0, 'taken': 0, 'errors': 0}
+        completed = []
+        lock = threading.Lock()
+        start_barrier = threading.Barrier(options['threads'])
+
+        def worker(seed):
+            rng = random.Random(seed)
+            try:
+                start_barrier.wait()
+                for _ in range(options['attempts']):
+                    day = rng.choice(days)
+                    slot = rng.choice(layout.slots)
+                    tables = rng.sample(layout.tables, options['group'])
+                    try:
+                        reservations.reserve_many(day, slot, tables)
+                        outcome = 'booked'
+                    except reservations.SlotTaken:
+                        outcome = 'taken'
+                    except DatabaseError:
+                        outcome = 'errors'
+                    with lock:
+                        results[outcome] += 1
+                        completed.append(time.perf_counter())
+            finally:
+                connections.close_all()
+
+        threads = [
+            threading.Thread(target=worker, args=(options['seed'] + index,))
+            for index in range(options['threads'])
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        per_second = {}
+        for finished in completed:
+            second = int(finished - started)
+            per_second[second] = per_second.get(second, 0) + 1
+        duplicates = list(
+            in_range.values('slot_start', 'table')
+            .annotate(n=Count('id')).filter(n__gt=1).order_by()
+        )
+        rows = in_range.count()
+        report = {
+            'threads': options['threads'],
+            'attempts': options['threads'] * options['attempts'],
+            **results,
+            'rows': rows,
+            'capacity': len(days) * layout.day_size,
+            'double_bookings': len(duplicates),
+            'seconds': round(elapsed, 3),
+            'attempts_per_second': round(len(completed) / elapsed, 1) if elapsed else None,
+            'completed_per_second': [per_second.get(second, 0) for second in range(int(elapsed) + 1)],
+        }
+        self.stdout.write(json.dumps(report, indent=2))
+        if duplicates or rows != results['booked'] * options['group']:
+            raise CommandError('Double bookings or lost reservations found')
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.7 on 2026-10-17 19:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Booking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('booking_date', models.DateTimeField()),
+                ('booking_time', models.CharField(choices=[('18:00', '6 PM'), ('19:00', '7 PM'), ('20:00', '8 PM')], max_length=5)),
+                ('table_booked', models.CharField(choices=[('1', 'Window'), ('2', 'Quiet'), ('3', 'Music')], max_length=10)),
+            ],
+            options={
+                'verbose_name': 'Booking',
+                'verbose_name_plural': 'Bookings',
+                'ordering': ['booking_date', 'booking_time'],
+                'unique_together': {('booking_date', 'booking_time', 'table_booked')},
+            },
+        ),
+    ]
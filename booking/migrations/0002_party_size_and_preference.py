@@ -0,0 +1,23 @@
+# Generated by Django 5.0.7 on 2026-10-17 19:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='party_size',
+            field=models.PositiveSmallIntegerField(default=2),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='preferred_table',
+            field=models.CharField(blank=True, choices=[('1', 'Window'), ('2', 'Quiet'), ('3', 'Music')], max_length=10),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.0.7 on 2026-10-17 19:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0002_party_size_and_preference'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Table',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveSmallIntegerField(unique=True)),
+                ('name', models.CharField(max_length=50)),
+                ('capacity', models.PositiveSmallIntegerField(help_text='Seats at the table')),
+            ],
+            options={
+                'ordering': ['number'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Timeslot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start', models.TimeField(unique=True)),
+                ('label', models.CharField(max_length=20)),
+            ],
+            options={
+                'ordering': ['start'],
+            },
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='slot_start',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='booking',
+            name='booking_date',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='booking',
+            name='booking_time',
+            field=models.CharField(blank=True, choices=[('18:00', '6 PM'), ('19:00', '7 PM'), ('20:00', '8 PM')], max_length=5),
+        ),
+        migrations.AlterField(
+            model_name='booking',
+            name='table_booked',
+            field=models.CharField(blank=True, choices=[('1', 'Window'), ('2', 'Quiet'), ('3', 'Music')], max_length=10),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='preferred',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='booking.table'),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='table',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='bookings', to='booking.table'),
+        ),
+    ]
@@ -0,0 +1,91 @@
+from datetime import datetime, time
+
+from django.db import migrations
+from django.utils import timezone
+
+# what used to be hard-coded choices on Booking
+TIMESLOTS = [
+    (time(18), '6 PM'),
+    (time(19), '7 PM'),
+    (time(20), '8 PM'),
+]
+TABLES = [
+    (1, 'Window', 2),
+    (2, 'Quiet', 4),
+    (3, 'Music', 6),
+]
+
+
+def to_slot_start(apps, schema_editor):
+    Timeslot = apps.get_model('booking', 'Timeslot')
+    Table = apps.get_model('booking', 'Table')
+    Booking = apps.get_model('booking', 'Booking')
+    for start, label in TIMESLOTS:
+        Timeslot.objects.get_or_create(start=start, defaults={'label': label})
+    tables = {}
+    for number, name, capacity in TABLES:
+        tables[str(number)], _ = Table.objects.get_or_create(
+            number=number, defaults={'name': name, 'capacity': capacity}
+        )
+    # booking_date used to carry a time of day as well, so two bookings
+    # for the same table on one day could both be stored. The first of
+    # them keeps (slot_start, table); the others move to a free table
+    # that seats the party once every booking has its own table
+    taken = set()
+    moved = []
+    for booking in Booking.objects.order_by('pk').iterator(chunk_size=2000):
+        day = timezone.localdate(booking.booking_date)
+        booking.slot_start = timezone.make_aware(
+            datetime.combine(day, time.fromisoformat(booking.booking_time))
+        )
+        booking.table = tables[booking.table_booked]
+        booking.preferred = tables.get(booking.preferred_table)
+        if (booking.slot_start, booking.table.pk) in taken:
+            moved.append(booking)
+            continue
+        taken.add((booking.slot_start, booking.table.pk))
+        booking.save(update_fields=['slot_start', 'table', 'preferred'])
+    by_size = sorted(tables.values(), key=lambda table: (table.capacity, table.number))
+    clashes = []
+    for booking in moved:
+        free = [
+            table for table in by_size
+            if table.capacity >= booking.party_size
+            and (booking.slot_start, table.pk) not in taken
+        ]
+        if not free:
+            clashes.append(str(booking.pk))
+            continue
+        booking.table = free[0]
+        taken.add((booking.slot_start, booking.table.pk))
+        booking.save(update_fields=['slot_start', 'table', 'preferred'])
+    if clashes:
+        raise RuntimeError(
+            'No free table for bookings that share a table and timeslot with '
+            'an earlier booking: %s. Move or delete them and migrate again'
+            % ', '.join(clashes)
+        )
+
+
+def from_slot_start(apps, schema_editor):
+    Booking = apps.get_model('booking', 'Booking')
+    for booking in Booking.objects.select_related('table', 'preferred').iterator(chunk_size=2000):
+        local = timezone.localtime(booking.slot_start)
+        booking.booking_date = timezone.make_aware(datetime.combine(local.date(), time.min))
+        booking.booking_time = local.strftime('%H:%M')
+        booking.table_booked = str(booking.table.number)
+        booking.preferred_table = str(booking.preferred.number) if booking.preferred else ''
+        booking.save(update_fields=[
+            'booking_date', 'booking_time', 'table_booked', 'preferred_table'
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0003_timeslot_table'),
+    ]
+
+    operations = [
+        migrations.RunPython(to_slot_start, from_slot_start),
+    ]
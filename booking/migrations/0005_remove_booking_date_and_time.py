@@ -0,0 +1,53 @@
+# Generated by Django 5.0.7 on 2026-10-17 19:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0004_slot_start_data'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='booking',
+            unique_together={('slot_start', 'table')},
+        ),
+        migrations.AlterModelOptions(
+            name='booking',
+            options={'ordering': ['slot_start', 'table_id'], 'verbose_name': 'Booking', 'verbose_name_plural': 'Bookings'},
+        ),
+        migrations.RemoveField(
+            model_name='booking',
+            name='booking_date',
+        ),
+        migrations.RemoveField(
+            model_name='booking',
+            name='booking_time',
+        ),
+        migrations.RemoveField(
+            model_name='booking',
+            name='table_booked',
+        ),
+        migrations.RemoveField(
+            model_name='booking',
+            name='preferred_table',
+        ),
+        migrations.RenameField(
+            model_name='booking',
+            old_name='preferred',
+            new_name='preferred_table',
+        ),
+        migrations.AlterField(
+            model_name='booking',
+            name='slot_start',
+            field=models.DateTimeField(),
+        ),
+        migrations.AlterField(
+            model_name='booking',
+            name='table',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='bookings', to='booking.table'),
+        ),
+    ]
@@ -1,28 +1,80 @@
+from datetime import datetime, time, timedelta
+
 from django.db import models
+from django.utils import timezone
+
+
+def day_start(day):
+    """
+    The aware datetime of local midnight at the start of a day
+    """
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+class Timeslot(models.Model):
+    """
+    A sitting that can be booked on every day. Adding or removing a row
+    changes what can be booked, no code change or migration needed
+    """
+    start = models.TimeField(unique=True)
+    label = models.CharField(max_length=20)
+
+    class Meta:
+        ordering = ["start"]
+
+    def __str__(self):
+        return self.label
+
+
+class Table(models.Model):
+    number = models.PositiveSmallIntegerField(unique=True)
+    # the kind of table guests ask for, e.g. "Window"
+    name = models.CharField(max_length=50)
+    capacity = models.PositiveSmallIntegerField(help_text="Seats at the table")
+
+    class Meta:
+        ordering = ["number"]
+
+    def __str__(self):
+        return f"Table {self.number} ({self.name})"
+
+
+class BookingQuerySet(models.QuerySet):
+    def between(self, start, end):
+        """
+        Bookings on the days start .. end - 1: a range scan on slot_start
+        """
+        return self.filter(slot_start__gte=day_start(start), slot_start__lt=day_start(end))
+
+    def on(self, day):
+        return self.between(day, day + timedelta(days=1))
 
 
 class Booking(models.Model):
-    TIMESLOT_CHOICES = [
-        ("18:00", "6 PM"),
-        ("19:00", "7 PM"),
-        ("20:00", "8 PM"),
-    ]
-
-    TABLE_CHOICES = [
-        ("1", "Window"),
-        ("2", "Quiet"),
-        ("3", "Music"),
-    ]
-
-    booking_date = models.DateTimeField()
-    booking_time = models.CharField(max_length=5, choices=TIMESLOT_CHOICES)
-    table_booked = models.CharField(max_length=10, choices=TABLE_CHOICES)
+    slot_start = models.DateTimeField()
+    table = models.ForeignKey(Table, on_delete=models.PROTECT, related_name="bookings")
+    party_size = models.PositiveSmallIntegerField(default=2)
+    preferred_table = models.ForeignKey(
+        Table, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+
+    objects = BookingQuerySet.as_manager()
 
     class Meta:
-        unique_together = [["booking_date", "booking_time", "table_booked"]]
-        ordering = ["booking_date", "booking_time"]
+        # slot_start leads the unique index, which makes every day, week
+        # or month of bookings an index range scan
+        unique_together = [["slot_start", "table"]]
+        ordering = ["slot_start", "table_id"]
         verbose_name = "Booking"
         verbose_name_plural = "Bookings"
 
     def __str__(self):
-        return f"Table {self.table_booked} booked on {self.booking_date} at {self.booking_time}"
\ No newline at end of file
+        return f"{self.table} booked for {timezone.localtime(self.slot_start):%Y-%m-%d %H:%M}"
+
+    @property
+    def day(self):
+        return timezone.localdate(self.slot_start)
+
+    @property
+    def slot(self):
+        return timezone.localtime(self.slot_start).strftime("%H:%M")
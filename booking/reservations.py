@@ -0,0 +1,191 @@
+"""
+Reserving tables without races.
+
+A reservation is a plain INSERT that relies on the unique constraint on
+(slot_start, table): there is no SELECT to check
+first, so two requests for the same table cannot both pass a check and
+then both insert. The loser's IntegrityError is caught inside a savepoint
+and turned into SlotTaken, which carries alternatives taken from the
+occupancy grid (booking/availability.py).
+
+reserve_many() books several tables for a group in one transaction:
+either every table is booked or none is. reserve_party() lets
+booking/assignment.py choose the table from the party size instead.
+"""
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+
+from . import assignment, availability
+from .models import Booking
+
+# how far ahead alternatives are looked for
+ALTERNATIVE_DAYS = 7
+# how often reserve_party() re-reads the slot after losing a race
+PARTY_ATTEMPTS = 3
+
+
+class SlotTaken(Exception):
+    def __init__(self, taken, alternatives):
+        super().__init__(f'Already booked: {", ".join(taken)}')
+        self.taken = taken
+        self.alternatives = alternatives
+
+
+def _describe(day, slot, table):
+    return f'table {table} at {slot} on {day.isoformat()}'
+
+
+def alternatives(day, slot, count=1, limit=5, seats=0):
+    """
+    Up to `limit` options for `count` tables of at least `seats` seats,
+    best first: the same slot on the same day, then other slots that day,
+    then the same slot on the following days, then anything later. Each
+    option is a dict with the date, slot and the tables to book
+    """
+    grid = availability.get_grid(day, day + timedelta(days=ALTERNATIVE_DAYS))
+    layout = grid.layout
+    slots = sorted(
+        layout.slots,
+        key=lambda other: abs(layout.slots.index(other) - layout.slots.index(slot))
+    )
+    candidates = [(day, other) for other in slots]
+    for offset in range(1, ALTERNATIVE_DAYS):
+        later = day + timedelta(days=offset)
+        candidates += [(later, other) for other in slots]
+    options = []
+    for option_day, option_slot in candidates:
+        free = [
+            table for table in grid.free_tables(option_day, option_slot)
+            if layout.capacity[table] >= seats
+        ]
+        if len(free) >= count:
+            options.append({
+                'date': option_day.isoformat(),
+                'slot': option_slot,
+                'tables': free[:count],
+            })
+            if len(options) == limit:
+                break
+    return options
+
+
+def _insert(layout, day, slot, table, **fields):
+    """
+    Insert one booking in its own savepoint so a conflict leaves any
+    surrounding transaction usable
+    """
+    try:
+        with transaction.atomic():
+            return Booking.objects.create(
+                slot_start=layout.slot_start(day, slot),
+                table_id=layout.table_ids[table],
+                **fields
+            )
+    except IntegrityError:
+        return None
+
+
+def _validate(layout, slot, tables):
+    if slot not in layout.slots:
+        raise ValueError(f'Unknown slot {slot!r}')
+    unknown = [table for table in tables if table not in layout.tables]
+    if unknown:
+        raise ValueError(f'Unknown table {unknown[0]!r}')
+    if len(set(tables)) != len(tables):
+        raise ValueError('A table is listed twice')
+
+
+def reserve(day, slot, table):
+    """
+    Book one table, or raise SlotTaken with alternatives
+    """
+    layout = availability.get_layout()
+    _validate(layout, slot, [table])
+    booking = _insert(layout, day, slot, table)
+    if booking is None:
+        raise SlotTaken([_describe(day, slot, table)], alternatives(day, slot))
+    return booking
+
+
+def reserve_many(day, slot, tables):
+    """
+    Book all of `tables` at one slot atomically, or none of them and raise
+    SlotTaken listing the ones that were already booked
+    """
+    layout = availability.get_layout()
+    _validate(layout, slot, tables)
+    taken = []
+    try:
+        with transaction.atomic():
+            bookings = []
+            for table in tables:
+                booking = _insert(layout, day, slot, table)
+                if booking is None:
+                    taken.append(_describe(day, slot, table))
+                bookings.append(booking)
+            if taken:
+                # roll back the tables that were booked
+                raise IntegrityError
+    except IntegrityError:
+        raise SlotTaken(taken, alternatives(day, slot, count=len(tables)))
+    return bookings
+
+
+def _seat_party(layout, day, slot, party, preferred):
+    """
+    One attempt at seating `party`: returns the booking, False when the
+    slot changed underneath us, or None when no table can take the party
+    """
+    bookings = Booking.objects.filter(slot_start=layout.slot_start(day, slot))
+    occupied = {
+        layout.numbers[booking.table_id]: assignment.party_for(layout, booking)
+        for booking in bookings
+    }
+    table, moves = assignment.place(assignment.site_tables(layout), occupied, party)
+    if table is None:
+        return None
+    try:
+        with transaction.atomic():
+            for other, old, new in moves:
+                # only move the booking if it is still where we saw it
+                moved = Booking.objects.filter(
+                    pk=other.ref.pk, table_id=layout.table_ids[old.id]
+                ).update(table_id=layout.table_ids[new.id])
+                if not moved:
+                    raise IntegrityError
+            # the insert's post_save drops the cached occupancy of the day,
+            # which also covers the moves
+            booking = _insert(
+                layout, day, slot, table.id,
+                party_size=party.size,
+                preferred_table_id=layout.table_ids.get(preferred),
+            )
+            if booking is None:
+                raise IntegrityError
+    except IntegrityError:
+        return False
+    return booking
+
+
+def reserve_party(day, slot, party_size, preferred=''):
+    """
+    Book a table for `party_size` guests, chosen by booking/assignment.py,
+    moving one existing booking to another free table if that makes room.
+    Raises SlotTaken with alternatives when the party cannot be seated
+    """
+    layout = availability.get_layout()
+    _validate(layout, slot, [preferred] if preferred else [])
+    if party_size < 1:
+        raise ValueError('A party needs at least one guest')
+    party = assignment.Party(party_size, layout.names.get(preferred, ''), slot)
+    for _ in range(PARTY_ATTEMPTS):
+        booking = _seat_party(layout, day, slot, party, preferred)
+        if booking is None:
+            break
+        if booking:
+            return booking
+    raise SlotTaken(
+        [f'no table for {party_size} at {slot} on {day.isoformat()}'],
+        alternatives(day, slot, seats=party_size),
+    )
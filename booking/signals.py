@@ -0,0 +1,58 @@
+"""
+Signal handlers for the booking app. They are connected in BookingConfig.ready()
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import availability
+from .models import Booking, Table, Timeslot
+
+
+@receiver(pre_save, sender=Booking)
+def remember_previous_day(sender, instance, **kwargs):
+    """
+    A booking moved to another day frees a table on the old one
+    """
+    instance._previous_start = None
+    if instance.pk:
+        instance._previous_start = (
+            Booking.objects.filter(pk=instance.pk)
+            .values_list('slot_start', flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def invalidate_grid(sender, instance, **kwargs):
+    """
+    Drop the cached occupancy of the booking's day straight away and,
+    inside a transaction, once more after commit so a concurrent request
+    cannot re-cache the old occupancy before the write is visible
+    """
+    starts = {instance.slot_start, getattr(instance, '_previous_start', None)}
+    days = {timezone.localdate(value) for value in starts if value}
+
+    def invalidate():
+        for day in days:
+            availability.invalidate(day)
+
+    invalidate()
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(invalidate)
+
+
+@receiver(post_save, sender=Timeslot)
+@receiver(post_delete, sender=Timeslot)
+@receiver(post_save, sender=Table)
+@receiver(post_delete, sender=Table)
+def invalidate_layout(sender, **kwargs):
+    """
+    New slots or tables change what can be booked. Grids cached for the
+    old layout are keyed by its version and simply stop being read
+    """
+    availability.invalidate_layout()
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(availability.invalidate_layout)
@@ -1,3 +1,495 @@
-from django.test import TestCase
+import json
+from datetime import time, timedelta
+from io import StringIO
+from django.test import TestCase, TransactionTestCase, Client, override_settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from . import assignment, availability, feeds, reservations
+from .models import Booking, Table, Timeslot
+
+
+def book(day, slot='18:00', table='1', **fields):
+    layout = availability.get_layout()
+    return Booking.objects.create(
+        slot_start=layout.slot_start(day, slot),
+        table_id=layout.table_ids[table],
+        **fields
+    )
+
+
+class AvailabilityTest(TestCase):
+    """Test cases for the occupancy grid"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.day = timezone.localdate() + timedelta(days=1)
+        book(self.day, '18:00', '1')
+        book(self.day, '18:00', '2')
+        book(self.day, '19:00', '3')
+        self.next_day = self.day + timedelta(days=1)
+
+    def test_grid_loads_range_in_one_query(self):
+        """Test that a month of occupancy costs a single query"""
+        with self.assertNumQueries(1):
+            grid = availability.get_grid(self.day, self.day + timedelta(days=31))
+        self.assertFalse(grid.is_free(self.day, '18:00', '1'))
+        self.assertEqual(grid.free_tables(self.day, '18:00'), ['3'])
+        self.assertEqual(grid.free_count(self.day), availability.get_layout().day_size - 3)
+        self.assertEqual(grid.free_count(self.next_day), availability.get_layout().day_size)
+
+    def test_grid_is_cached_per_day(self):
+        """Test that cached days are not queried again"""
+        availability.get_grid(self.day, self.next_day)
+        with self.assertNumQueries(0):
+            availability.get_grid(self.day, self.next_day)
+        with self.assertNumQueries(1):
+            grid = availability.get_grid(self.day, self.next_day + timedelta(days=1))
+        self.assertEqual(grid.free_count(self.day), availability.get_layout().day_size - 3)
+
+    def test_booking_and_cancelling_invalidate_the_day(self):
+        """Test that new, moved and deleted bookings update the cached grid"""
+        availability.get_grid(self.day, self.next_day + timedelta(days=1))
+        booking = book(self.day, '20:00', '1')
+        grid = availability.get_grid(self.day, self.next_day + timedelta(days=1))
+        self.assertFalse(grid.is_free(self.day, '20:00', '1'))
+        booking.slot_start = availability.get_layout().slot_start(self.next_day, '20:00')
+        booking.save()
+        grid = availability.get_grid(self.day, self.next_day + timedelta(days=1))
+        self.assertTrue(grid.is_free(self.day, '20:00', '1'))
+        self.assertFalse(grid.is_free(self.next_day, '20:00', '1'))
+        booking.delete()
+        grid = availability.get_grid(self.day, self.next_day + timedelta(days=1))
+        self.assertTrue(grid.is_free(self.next_day, '20:00', '1'))
+
+    def test_first_free_after(self):
+        """Test finding the first free table at or after a time"""
+        for table in availability.get_layout().tables:
+            book(self.day, '20:00', table)
+        grid = availability.get_grid(self.day, self.day + timedelta(days=7))
+        after = availability.get_layout().slot_start(self.day, '18:00')
+        self.assertEqual(grid.first_free(after), (after, '3'))
+        after = availability.get_layout().slot_start(self.day, '19:00') + timedelta(minutes=30)
+        self.assertEqual(
+            grid.first_free(after),
+            (availability.get_layout().slot_start(self.next_day, '18:00'), '1')
+        )
+
+
+class BookingCalendarTest(TestCase):
+    """Test cases for the booking calendar views"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.client = Client()
+        self.day = timezone.localdate() + timedelta(days=1)
+        book(self.day, '18:00', '1')
+
+    def test_month_view_costs_one_query(self):
+        """Test that the calendar shows free tables from one query"""
+        url = reverse('booking:calendar_month', args=[self.day.year, self.day.month])
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, f'{availability.get_layout().day_size - 1} of {availability.get_layout().day_size} free')
+
+    def test_invalid_month(self):
+        """Test that an impossible month is a 404"""
+        response = self.client.get(reverse('booking:calendar_month', args=[2025, 13]))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('booking:calendar_month', args=[9999, 12]))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('booking:day_availability', args=[9999, 12, 31]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_first_month(self):
+        """Test that January of year 1 renders without a previous month link"""
+        response = self.client.get(reverse('booking:calendar_month', args=[1, 1]))
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context['previous_month'])
+
+    def test_day_availability(self):
+        """Test the free tables per slot for one day"""
+        response = self.client.get(reverse(
+            'booking:day_availability', args=[self.day.year, self.day.month, self.day.day]
+        ))
+        data = response.json()
+        self.assertEqual(data['date'], self.day.isoformat())
+        self.assertEqual(data['slots']['18:00'], ['2', '3'])
+        self.assertEqual(data['first_free']['table'], '2')
+        self.assertEqual(
+            data['first_free']['start'],
+            availability.get_layout().slot_start(self.day, '18:00').isoformat()
+        )
+
+
+class ReservationTest(TestCase):
+    """Test cases for the insert-and-catch reservation service"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.day = timezone.localdate() + timedelta(days=1)
+
+    def test_reserve_without_select(self):
+        """Test that a reservation is a single insert in a savepoint"""
+        availability.get_grid(self.day, self.day + timedelta(days=1))
+        with self.assertNumQueries(3):
+            booking = reservations.reserve(self.day, '18:00', '1')
+        self.assertEqual(booking.table.number, 1)
+
+    def test_taken_slot_offers_alternatives(self):
+        """Test that a conflict suggests the other tables at that slot first"""
+        reservations.reserve(self.day, '18:00', '1')
+        with self.assertRaises(reservations.SlotTaken) as taken:
+            reservations.reserve(self.day, '18:00', '1')
+        self.assertEqual(taken.exception.alternatives[0], {
+            'date': self.day.isoformat(), 'slot': '18:00', 'tables': ['2'],
+        })
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_group_booking_is_all_or_nothing(self):
+        """Test that a batch with one taken table books nothing"""
+        reservations.reserve(self.day, '19:00', '3')
+        with self.assertRaises(reservations.SlotTaken) as taken:
+            reservations.reserve_many(self.day, '19:00', ['1', '2', '3'])
+        self.assertEqual(taken.exception.taken, [f'table 3 at 19:00 on {self.day.isoformat()}'])
+        self.assertEqual(taken.exception.alternatives[0]['tables'], ['1', '2', '3'])
+        self.assertNotEqual(taken.exception.alternatives[0]['slot'], '19:00')
+        self.assertEqual(Booking.objects.count(), 1)
+        bookings = reservations.reserve_many(self.day, '18:00', ['1', '2'])
+        self.assertEqual(len(bookings), 2)
+
+    def test_invalid_slot_or_table(self):
+        """Test that unknown values are rejected before any insert"""
+        with self.assertRaises(ValueError):
+            reservations.reserve(self.day, '17:00', '1')
+        with self.assertRaises(ValueError):
+            reservations.reserve_many(self.day, '18:00', ['1', '1'])
+
+
+class ReserveViewTest(TestCase):
+    """Test cases for the reservation endpoint"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.client = Client()
+        User.objects.create_user(username='testuser', password='testpass123')
+        self.client.login(username='testuser', password='testpass123')
+        self.day = timezone.localdate() + timedelta(days=1)
+        self.url = reverse('booking:reserve')
+
+    def test_reserve_and_conflict(self):
+        """Test a 201 for a free table and a 409 with alternatives after"""
+        data = {'date': self.day.isoformat(), 'slot': '20:00', 'tables': ['1', '2']}
+        response = self.client.post(self.url, data)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([b['table'] for b in response.json()['bookings']], ['1', '2'])
+        response = self.client.post(self.url, data)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(len(response.json()['taken']), 2)
+        self.assertTrue(response.json()['alternatives'])
+
+    def test_invalid_reservation(self):
+        """Test that past dates and unknown tables are a 400"""
+        yesterday = timezone.localdate() - timedelta(days=1)
+        response = self.client.post(
+            self.url, {'date': yesterday.isoformat(), 'slot': '18:00', 'tables': ['1']}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('date', response.json()['errors'])
+        response = self.client.post(
+            self.url, {'date': self.day.isoformat(), 'slot': '18:00', 'tables': ['9']}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_duplicate_tables(self):
+        """Test that listing a table twice is a form error, not a server error"""
+        response = self.client.post(
+            self.url, {'date': self.day.isoformat(), 'slot': '18:00', 'tables': ['1', '1']}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors']['tables'], ['Each table can only be chosen once.'])
+        self.assertFalse(Booking.objects.exists())
+
+    def test_login_required(self):
+        """Test that anonymous users are sent to the login page"""
+        self.client.logout()
+        response = self.client.post(self.url, {})
+        self.assertEqual(response.status_code, 302)
+
+
+class ReservationStressTest(TransactionTestCase):
+    """Test that concurrent reservations never double book"""
+
+    # keep the timeslots and tables created by the data migration
+    serialized_rollback = True
+
+    def test_concurrent_reservations(self):
+        """Test many threads racing for the same few tables"""
+        out = StringIO()
+        call_command(
+            'stress_reservations', '--threads', '30', '--attempts', '3', '--days', '1',
+            stdout=out
+        )
+        report = json.loads(out.getvalue())
+        self.assertEqual(report['double_bookings'], 0)
+        self.assertEqual(report['booked'], report['rows'])
+        self.assertLessEqual(report['rows'], availability.get_layout().day_size)
+        self.assertEqual(report['booked'] + report['taken'] + report['errors'], 90)
+
+
+class AssignmentTest(TestCase):
+    """Test cases for automatic table assignment"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.tables = [
+            assignment.Table('a', 'window', 2),
+            assignment.Table('b', 'quiet', 4),
+            assignment.Table('c', 'music', 6),
+        ]
+        self.day = timezone.localdate() + timedelta(days=1)
+
+    def test_largest_parties_first_in_smallest_table(self):
+        """Test that greedy seats the most covers whatever the arrival order"""
+        parties = [assignment.Party(2), assignment.Party(4), assignment.Party(6), assignment.Party(3)]
+        result = assignment.assign_slot(self.tables, parties)
+        self.assertEqual(result.covers, 12)
+        self.assertEqual(result.unseated, [parties[3]])
+        self.assertEqual(result.seated[parties[0]].id, 'a')
+
+    def test_repair_meets_preferences(self):
+        """Test that parties swap tables to get the kind they asked for"""
+        tables = [assignment.Table('a', 'window', 4), assignment.Table('b', 'quiet', 4)]
+        first = assignment.Party(4)
+        second = assignment.Party(2, preferred='window')
+        result = assignment.assign_slot(tables, [first, second])
+        self.assertEqual(result.seated[second].kind, 'window')
+        self.assertEqual(result.preferences_met, 1)
+
+    def test_place_moves_one_booking_to_make_room(self):
+        """Test seating a large party by moving a small one"""
+        small = assignment.Party(2)
+        occupied = {'c': small, 'b': assignment.Party(4)}
+        table, moves = assignment.place(self.tables, occupied, assignment.Party(5))
+        self.assertEqual(table.id, 'c')
+        self.assertEqual([(party, old.id, new.id) for party, old, new in moves], [(small, 'c', 'a')])
+        occupied['a'] = assignment.Party(1)
+        self.assertEqual(assignment.place(self.tables, occupied, assignment.Party(5)), (None, []))
+
+    def test_reserve_party_moves_existing_booking(self):
+        """Test that reserve_party frees the big table for a big party"""
+        small = book(self.day, '18:00', '3', party_size=2)
+        booking = reservations.reserve_party(self.day, '18:00', 5)
+        small.refresh_from_db()
+        self.assertEqual((booking.table.number, small.table.number), (3, 1))
+        with self.assertRaises(reservations.SlotTaken) as taken:
+            reservations.reserve_party(self.day, '18:00', 5)
+        self.assertEqual(taken.exception.alternatives[0]['slot'], '19:00')
+        self.assertEqual(taken.exception.alternatives[0]['tables'], ['3'])
+
+    def test_reoptimise_frees_bigger_tables(self):
+        """Test that the batch command repacks a day's bookings"""
+        first = book(self.day, '19:00', '2', party_size=2)
+        second = book(self.day, '19:00', '3', party_size=4)
+        out = StringIO()
+        call_command('optimise_tables', '--days', '2', '--dry-run', stdout=out)
+        self.assertIn('Would move 2 booking(s)', out.getvalue())
+        first.refresh_from_db()
+        self.assertEqual(first.table.number, 2)
+        call_command('optimise_tables', '--days', '2', stdout=StringIO())
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.table.number, second.table.number), (1, 2))
+        self.assertEqual(assignment.reoptimise(self.day), [])
+
+    def test_reserve_view_with_party_size(self):
+        """Test that the endpoint picks a table when given a party size"""
+        User.objects.create_user(username='testuser', password='testpass123')
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.post(reverse('booking:reserve'), {
+            'date': self.day.isoformat(), 'slot': '20:00',
+            'party_size': 3, 'preferred_table': '3',
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['bookings'][0]['table'], '2')
+        response = self.client.post(reverse('booking:reserve'), {
+            'date': self.day.isoformat(), 'slot': '20:00',
+        })
+        self.assertEqual(response.status_code, 400)
+
+    def test_bench_assignment(self):
+        """Test that the benchmark never seats fewer covers than picking by hand"""
+        out = StringIO()
+        call_command(
+            'bench_assignment', '--requests', '300', '--tables', '40', '--days', '2',
+            stdout=out
+        )
+        report = json.loads(out.getvalue())
+        self.assertGreaterEqual(report['optimised']['covers'], report['hand_picked']['covers'])
+
+
+class LayoutTest(TestCase):
+    """Test cases for timeslots and tables stored in the database"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.day = timezone.localdate() + timedelta(days=1)
+        book(self.day, '20:00', '1')
+
+    def test_new_timeslot_and_table_are_bookable(self):
+        """Test that adding rows changes what can be booked without code"""
+        availability.get_grid(self.day, self.day + timedelta(days=1))
+        Timeslot.objects.create(start=time(21), label='9 PM')
+        Table.objects.create(number=4, name='Crypt', capacity=10)
+        layout = availability.get_layout()
+        self.assertEqual(layout.slots[-1], '21:00')
+        self.assertEqual(layout.day_size, 4 * 4)
+        grid = availability.get_grid(self.day, self.day + timedelta(days=1))
+        self.assertEqual(grid.free_count(self.day), layout.day_size - 1)
+        booking = reservations.reserve_party(self.day, '21:00', 9)
+        self.assertEqual(booking.table.number, 4)
+        self.assertEqual(booking.slot, '21:00')
+
+    def test_day_is_a_range_on_slot_start(self):
+        """Test that a day's bookings are selected by a slot_start range"""
+        book(self.day + timedelta(days=1), '18:00', '1')
+        day = Booking.objects.on(self.day)
+        self.assertEqual([booking.slot for booking in day], ['20:00'])
+        sql = str(day.query)
+        self.assertIn('"slot_start" >=', sql)
+        self.assertIn('"slot_start" <', sql)
+
+
+class ExportTest(TestCase):
+    """Test cases for the streaming booking exports"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.client = Client()
+        User.objects.create_user(username='staff', password='testpass123', is_staff=True)
+        self.client.login(username='staff', password='testpass123')
+        self.day = timezone.localdate() + timedelta(days=1)
+        book(self.day, '19:00', '2', party_size=4)
+        book(self.day, '18:00', '1')
+        book(self.day + timedelta(days=3), '20:00', '3', party_size=6)
+        self.url = reverse('booking:export_bookings', args=['csv'])
+
+    def lines(self, response):
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode().splitlines()
+
+    def test_csv_export(self):
+        """Test a CSV export in slot order, optionally limited to days"""
+        lines = self.lines(self.client.get(self.url))
+        self.assertEqual(lines[0], ','.join(feeds.FIELDS))
+        self.assertEqual(len(lines), 4)
+        self.assertIn(f'{self.day.isoformat()},18:00,', lines[1])
+        end = self.day + timedelta(days=1)
+        lines = self.lines(self.client.get(self.url, {'start': self.day, 'end': end}))
+        self.assertEqual(len(lines), 3)
+
+    def test_jsonl_export(self):
+        """Test one JSON object per booking"""
+        url = reverse('booking:export_bookings', args=['jsonl'])
+        rows = [json.loads(line) for line in self.lines(self.client.get(url))]
+        self.assertEqual([row['table'] for row in rows], ['1', '2', '3'])
+        self.assertEqual(rows[1]['table_name'], 'Quiet')
+        self.assertEqual(rows[2]['party_size'], 6)
+
+    def test_export_is_for_staff(self):
+        """Test that other users need the feed token"""
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        with override_settings(BOOKING_FEED_TOKEN='secret'):
+            self.assertEqual(self.client.get(self.url, {'token': 'wrong'}).status_code, 403)
+            self.assertEqual(self.client.get(self.url, {'token': 'secret'}).status_code, 200)
+
+    def test_bad_requests(self):
+        """Test unknown formats and malformed dates"""
+        url = reverse('booking:export_bookings', args=['xml'])
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.get(self.url, {'start': 'soon'}).status_code, 400)
+
+    def test_admin_export_action(self):
+        """Test exporting selected bookings from the admin"""
+        User.objects.create_superuser(username='admin', password='testpass123')
+        self.client.login(username='admin', password='testpass123')
+        url = reverse('admin:booking_booking_changelist')
+        self.assertEqual(self.client.get(url).status_code, 200)
+        booking = Booking.objects.order_by('slot_start').first()
+        response = self.client.post(url, {
+            'action': 'export_csv', '_selected_action': [booking.pk],
+        })
+        self.assertEqual(len(self.lines(response)), 2)
+
+
+@override_settings(BOOKING_FEED_TOKEN='secret')
+class CalendarFeedTest(TestCase):
+    """Test cases for the iCalendar feeds"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.client = Client()
+        self.day = timezone.localdate() + timedelta(days=1)
+        self.booking = book(self.day, '19:00', '2', party_size=4)
+        self.url = reverse(
+            'booking:day_feed', args=[self.day.year, self.day.month, self.day.day]
+        )
+
+    def get(self, url=None, **headers):
+        return self.client.get(url or self.url, {'token': 'secret'}, headers=headers)
+
+    def test_day_feed(self):
+        """Test one event per booking"""
+        response = self.get()
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        body = b''.join(response.streaming_content).decode()
+        self.assertTrue(body.startswith('BEGIN:VCALENDAR\r\n'))
+        self.assertEqual(body.count('BEGIN:VEVENT'), 1)
+        self.assertIn(f'UID:booking-{self.booking.pk}@', body)
+        self.assertIn('SUMMARY:Table 2 (Quiet)\\, party of 4', body)
+
+    def test_week_feed(self):
+        """Test that the ISO week feed covers Monday to Sunday"""
+        year, week, weekday = self.day.isocalendar()
+        book(self.day - timedelta(days=weekday - 1), '18:00', '1')
+        book(self.day + timedelta(days=8 - weekday), '18:00', '1')
+        response = self.get(reverse('booking:week_feed', args=[year, week]))
+        self.assertEqual(b''.join(response.streaming_content).count(b'BEGIN:VEVENT'), 2)
+        self.assertEqual(self.get(reverse('booking:week_feed', args=[year, 54])).status_code, 404)
+
+    def test_feeds_past_year_9999(self):
+        """Test that feeds ending after the last representable day are a 404"""
+        self.assertEqual(self.get(reverse('booking:day_feed', args=[9999, 12, 31])).status_code, 404)
+        self.assertEqual(self.get(reverse('booking:week_feed', args=[9999, 52])).status_code, 404)
+
+    def test_polling_gets_304_without_queries(self):
+        """Test that an unchanged feed is a 304 and a change is not"""
+        etag = self.get()['ETag']
+        with self.assertNumQueries(0):
+            response = self.get(If_None_Match=etag)
+        self.assertEqual(response.status_code, 304)
+        book(self.day, '20:00', '3')
+        response = self.get(If_None_Match=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.booking.delete()
+        self.assertEqual(self.get(If_None_Match=etag).status_code, 200)
+
+    def test_other_days_do_not_change_the_feed(self):
+        """Test that bookings on other days keep the 304"""
+        etag = self.get()['ETag']
+        book(self.day + timedelta(days=1), '20:00', '3')
+        self.assertEqual(self.get(If_None_Match=etag).status_code, 304)
 
-# Create your tests here.
@@ -0,0 +1,42 @@
+from django.urls import path
+from . import views
+
+app_name = 'booking'
+
+urlpatterns = [
+    path(
+        '',
+        views.booking_calendar,
+        name='calendar'
+    ),
+    path(
+        '<int:year>/<int:month>/',
+        views.booking_calendar,
+        name='calendar_month'
+    ),
+    path(
+        '<int:year>/<int:month>/<int:day>/',
+        views.day_availability,
+        name='day_availability'
+    ),
+    path(
+        'reserve/',
+        views.reserve,
+        name='reserve'
+    ),
+    path(
+        'export/bookings.<str:format>',
+        views.export_bookings,
+        name='export_bookings'
+    ),
+    path(
+        'feed/<int:year>/<int:month>/<int:day>.ics',
+        views.day_feed,
+        name='day_feed'
+    ),
+    path(
+        'feed/<int:year>/week/<int:week>.ics',
+        views.week_feed,
+        name='week_feed'
+    ),
+]
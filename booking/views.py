@@ -1,3 +1,190 @@
+import calendar
+import functools
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpResponseBadRequest, JsonResponse
 from django.shortcuts import render
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import condition, require_GET, require_POST
+
+from . import availability, feeds, reservations
+from .forms import ReservationForm
+from .models import Booking, day_start
+
+
+def _month_bounds(year, month):
+    try:
+        first = date(year, month, 1)
+        return first, (first + timedelta(days=32)).replace(day=1)
+    except (ValueError, OverflowError):
+        # OverflowError: December 9999 has no following month
+        raise Http404('No such month')
+
+
+def booking_calendar(request, year=None, month=None):
+    """
+    Month view with the number of free tables on each day. The whole month
+    comes from one availability grid, i.e. at most one query
+    """
+    today = timezone.localdate()
+    if year is None:
+        year, month = today.year, today.month
+    first, end = _month_bounds(year, month)
+    grid = availability.get_grid(first, end)
+    weeks = [
+        [
+            {
+                'date': day,
+                'free': grid.free_count(day),
+                'past': day < today,
+            } if day.month == month else None
+            for day in week
+        ]
+        for week in calendar.Calendar().monthdatescalendar(year, month)
+    ]
+    # January of year 1 has no month before it
+    previous = first - timedelta(days=1) if first > date.min else None
+    return render(
+        request,
+        'booking/calendar.html',
+        {
+            'month': first,
+            'weeks': weeks,
+            'previous_month': previous,
+            'next_month': end,
+            'tables_per_day': grid.layout.day_size,
+        }
+    )
+
+
+def day_availability(request, year, month, day):
+    """
+    Free tables per slot on one day, and the first free table from then on
+    within a week, as JSON
+    """
+    try:
+        requested = date(year, month, day)
+        end = requested + timedelta(days=7)
+    except (ValueError, OverflowError):
+        raise Http404('No such day')
+    grid = availability.get_grid(requested, end)
+    first_free = grid.first_free(max(day_start(requested), timezone.now()))
+    return JsonResponse({
+        'date': requested.isoformat(),
+        'slots': grid.free_slots(requested),
+        'first_free': {
+            'start': first_free[0].isoformat(),
+            'table': first_free[1],
+        } if first_free else None,
+    })
+
+
+@login_required
+@require_POST
+def reserve(request):
+    """
+    Book one or more tables at a slot, or let a table be chosen for a
+    party size. Answers 201 with the bookings, 409 with alternatives when
+    a table is already taken, or 400 for invalid input
+    """
+    form = ReservationForm(request.POST)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+    day = form.cleaned_data['date']
+    slot = form.cleaned_data['slot']
+    layout = form.layout
+    try:
+        if form.cleaned_data['tables']:
+            bookings = reservations.reserve_many(day, slot, form.cleaned_data['tables'])
+        else:
+            bookings = [reservations.reserve_party(
+                day, slot, form.cleaned_data['party_size'],
+                form.cleaned_data['preferred_table']
+            )]
+    except reservations.SlotTaken as taken:
+        return JsonResponse(
+            {'taken': taken.taken, 'alternatives': taken.alternatives}, status=409
+        )
+    return JsonResponse({
+        'bookings': [
+            {
+                'id': booking.pk,
+                'date': day.isoformat(),
+                'slot': booking.slot,
+                'table': layout.numbers[booking.table_id],
+                'party_size': booking.party_size,
+            }
+            for booking in bookings
+        ]
+    }, status=201)
+
+
+def staff_or_feed_token(view):
+    """
+    Let staff in by their session and scripts or calendar clients, which
+    have no session, by ?token=BOOKING_FEED_TOKEN
+    """
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        token = getattr(settings, 'BOOKING_FEED_TOKEN', '')
+        if not request.user.is_staff and not (
+            token and constant_time_compare(request.GET.get('token', ''), token)
+        ):
+            raise PermissionDenied
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+@require_GET
+@staff_or_feed_token
+def export_bookings(request, format):
+    """
+    Stream bookings as CSV or JSON Lines, all of them or the days
+    ?start=YYYY-MM-DD up to, not including, ?end=YYYY-MM-DD
+    """
+    bookings = Booking.objects.all()
+    try:
+        start = date.fromisoformat(request.GET['start']) if request.GET.get('start') else None
+        end = date.fromisoformat(request.GET['end']) if request.GET.get('end') else None
+    except ValueError:
+        return HttpResponseBadRequest('start and end must be dates (YYYY-MM-DD)')
+    if start:
+        bookings = bookings.filter(slot_start__gte=day_start(start))
+    if end:
+        bookings = bookings.filter(slot_start__lt=day_start(end))
+    if format == 'csv':
+        return feeds.csv_response(bookings)
+    if format == 'jsonl':
+        return feeds.jsonl_response(bookings)
+    raise Http404('No such format')
+
+
+def _feed(request, start, end, name):
+    last_modified = feeds.feed_validators(request, start, end)[1]
+    return feeds.ics_response(Booking.objects.between(start, end), name, last_modified)
+
+
+@require_GET
+@staff_or_feed_token
+@condition(etag_func=feeds.day_etag, last_modified_func=feeds.day_last_modified)
+def day_feed(request, year, month, day):
+    """
+    iCalendar feed of one day's bookings
+    """
+    start, end = feeds.day_range(year, month, day)
+    return _feed(request, start, end, f'Bookings {start.isoformat()}')
+
 
-# Create your views here.
+@require_GET
+@staff_or_feed_token
+@condition(etag_func=feeds.week_etag, last_modified_func=feeds.week_last_modified)
+def week_feed(request, year, week):
+    """
+    iCalendar feed of the bookings in an ISO week, Monday to Sunday
+    """
+    start, end = feeds.week_range(year, week)
+    return _feed(request, start, end, f'Bookings {year} week {week}')
@@ -0,0 +1,308 @@
+"""
+Two-tier cache backend: a small per-process LRU (L1) in front of a SQLite
+file shared by every worker on the host (L2). No external service needed.
+
+Each L2 row carries a random stamp that changes on every write. L1 keeps the
+stamp it saw alongside the value. A read within L1_TTL seconds of the last
+check is answered from L1 alone. After that it asks L2 for the current
+stamp of that key, and the value itself is only transferred when the
+stamps differ. A write, delete or clear in one gunicorn worker is therefore
+seen by the others within L1_TTL seconds. With L1_TTL 0 (the default) they
+see it on their next read, but every read then costs a SQLite query. Keep
+it at 0 when the cache holds invalidation state (page-cache versions,
+sessions, cached users): a positive TTL delays purges and logouts. L1
+holds pickled values, so every get() still unpickles and callers never
+share a mutable object, as with LocMemCache.
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'mysite.cache.TwoTierCache',
+            'LOCATION': '/tmp/horror-haven-cache.sqlite3',
+            'OPTIONS': {
+                'MAX_ENTRIES': 100000,        # L2 rows before culling
+                'L1_MAX_ENTRIES': 1000,       # per-process LRU size
+                'L1_MAX_BYTES': 16 * 1024 * 1024,
+                'L1_TTL': 0,                  # seconds L1 is trusted unchecked
+            },
+        }
+    }
+
+stats() reports hit counts and rates for each tier in this process, and
+how many L1 hits needed a stamp check (l1_checked); hits and misses are
+also counted per request for PerformanceMiddleware.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from . import instrumentation
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    stamp INTEGER NOT NULL,
+    expires REAL
+)
+"""
+
+
+def _new_stamp():
+    return int.from_bytes(os.urandom(8), 'big') >> 1
+
+
+class TwoTierCache(BaseCache):
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._path = location
+        self._l1_max_entries = int(options.get('L1_MAX_ENTRIES', 1000))
+        self._l1_max_bytes = int(options.get('L1_MAX_BYTES', 16 * 1024 * 1024))
+        self._l1_ttl = float(options.get('L1_TTL', 0))
+        # key -> (stamp, pickled value, expires, time of the last stamp check)
+        self._l1 = OrderedDict()
+        self._l1_bytes = 0
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._writes = 0
+        self._stats = {
+            'l1_hits': 0, 'l1_checked': 0, 'l1_misses': 0, 'l2_hits': 0, 'l2_misses': 0
+        }
+
+    # -- L2 (shared SQLite file) ---------------------------------------
+
+    def _connection(self):
+        """
+        One connection per thread, reopened after a fork
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self._path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self._path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(SCHEMA)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _write(self, key, pickled, expires):
+        stamp = _new_stamp()
+        self._connection().execute(
+            'INSERT OR REPLACE INTO cache (key, value, stamp, expires) '
+            'VALUES (?, ?, ?, ?)',
+            (key, pickled, stamp, expires),
+        )
+        self._l1_store(key, stamp, pickled, expires)
+        self._maybe_cull()
+        return stamp
+
+    def _maybe_cull(self):
+        self._writes += 1
+        if self._writes % 100:
+            return
+        connection = self._connection()
+        connection.execute(
+            'DELETE FROM cache WHERE expires IS NOT NULL AND expires <= ?',
+            (time.time(),),
+        )
+        (count,) = connection.execute('SELECT count(*) FROM cache').fetchone()
+        if count > self._max_entries:
+            connection.execute(
+                'DELETE FROM cache WHERE key IN '
+                '(SELECT key FROM cache ORDER BY expires IS NULL, expires LIMIT ?)',
+                (count // self._cull_frequency,),
+            )
+
+    # -- L1 (per-process LRU) ------------------------------------------
+
+    def _l1_store(self, key, stamp, pickled, expires):
+        with self._lock:
+            self._l1_discard(key)
+            if len(pickled) > self._l1_max_bytes:
+                return
+            self._l1[key] = (stamp, pickled, expires, time.monotonic())
+            self._l1_bytes += len(pickled)
+            while (
+                len(self._l1) > self._l1_max_entries
+                or self._l1_bytes > self._l1_max_bytes
+            ):
+                _, evicted = self._l1.popitem(last=False)
+                self._l1_bytes -= len(evicted[1])
+
+    def _l1_discard(self, key):
+        with self._lock:
+            entry = self._l1.pop(key, None)
+            if entry is not None:
+                self._l1_bytes -= len(entry[1])
+
+    def _record(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    # -- cache API -----------------------------------------------------
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._lock:
+            entry = self._l1.get(key)
+            if (
+                entry is not None
+                and time.monotonic() - entry[3] < self._l1_ttl
+                and (entry[2] is None or entry[2] > time.time())
+            ):
+                # checked against L2 recently enough: no query at all
+                self._l1.move_to_end(key)
+                self._stats['l1_hits'] += 1
+                instrumentation.record_cache(hits=1)
+                return pickle.loads(entry[1])
+        known_stamp = entry[0] if entry else None
+        # one round trip: the value is only sent if our stamp is out of date
+        row = self._connection().execute(
+            'SELECT stamp, expires, CASE WHEN stamp = ? THEN NULL ELSE value END '
+            'FROM cache WHERE key = ?',
+            (known_stamp, key),
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            self._l1_discard(key)
+            self._record('l1_misses')
+            self._record('l2_misses')
+            instrumentation.record_cache(misses=1)
+            return default
+        stamp, expires, pickled = row
+        if entry is not None and stamp == known_stamp:
+            with self._lock:
+                if self._l1.get(key) is entry:
+                    self._l1[key] = (stamp, entry[1], expires, time.monotonic())
+                    self._l1.move_to_end(key)
+            self._record('l1_hits')
+            self._record('l1_checked')
+            instrumentation.record_cache(hits=1)
+            return pickle.loads(entry[1])
+        self._record('l1_misses')
+        self._record('l2_hits')
+        instrumentation.record_cache(hits=1)
+        self._l1_store(key, stamp, pickled, expires)
+        return pickle.loads(pickled)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        pickled = pickle.dumps(value, self.pickle_protocol)
+        self._write(key, pickled, self.get_backend_timeout(timeout))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        pickled = pickle.dumps(value, self.pickle_protocol)
+        stamp = _new_stamp()
+        expires = self.get_backend_timeout(timeout)
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.execute(
+                'DELETE FROM cache WHERE key = ? AND expires IS NOT NULL '
+                'AND expires <= ?',
+                (key, time.time()),
+            )
+            cursor = connection.execute(
+                'INSERT OR IGNORE INTO cache (key, value, stamp, expires) '
+                'VALUES (?, ?, ?, ?)',
+                (key, pickled, stamp, expires),
+            )
+            added = cursor.rowcount == 1
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        if added:
+            self._l1_store(key, stamp, pickled, expires)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._l1_discard(key)
+        cursor = self._connection().execute(
+            'UPDATE cache SET expires = ? WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), key, time.time()),
+        )
+        return cursor.rowcount == 1
+
+    def incr(self, key, delta=1, version=None):
+        """
+        Atomic across processes: read and write happen under one write lock
+        """
+        key = self.make_and_validate_key(key, version=version)
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute(
+                'SELECT value, expires FROM cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None or (row[1] is not None and row[1] <= time.time()):
+                raise ValueError("Key '%s' not found" % key)
+            value = pickle.loads(row[0]) + delta
+            expires = row[1]
+            pickled = pickle.dumps(value, self.pickle_protocol)
+            stamp = _new_stamp()
+            connection.execute(
+                'UPDATE cache SET value = ?, stamp = ? WHERE key = ?',
+                (pickled, stamp, key),
+            )
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        self._l1_store(key, stamp, pickled, expires)
+        return value
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._connection().execute(
+            'SELECT 1 FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (key, time.time()),
+        ).fetchone()
+        return row is not None
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._l1_discard(key)
+        cursor = self._connection().execute('DELETE FROM cache WHERE key = ?', (key,))
+        return cursor.rowcount == 1
+
+    def clear(self):
+        with self._lock:
+            self._l1.clear()
+            self._l1_bytes = 0
+        self._connection().execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # connections are kept open for the life of the thread
+        pass
+
+    def stats(self):
+        """
+        Per-tier hit counts and rates for this process
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['l1_entries'] = len(self._l1)
+            stats['l1_bytes'] = self._l1_bytes
+        l1_total = stats['l1_hits'] + stats['l1_misses']
+        l2_total = stats['l2_hits'] + stats['l2_misses']
+        stats['l1_hit_rate'] = stats['l1_hits'] / l1_total if l1_total else 0.0
+        stats['l2_hit_rate'] = stats['l2_hits'] / l2_total if l2_total else 0.0
+        return stats
+
+    def reset_stats(self):
+        with self._lock:
+            for name in self._stats:
+                self._stats[name] = 0
@@ -0,0 +1,185 @@
+"""
+A small thread-safe connection pool, used by the pooled PostgreSQL backend
+in mysite/db/postgresql/.
+
+Connections are handed out newest-first so the warm ones get reused and the
+rest age out after `idle_timeout`. At most `max_size` connections are open
+at once; when they are all in use, acquire() waits up to `wait_timeout`
+seconds for one to be released and then raises PoolTimeout. Time spent
+waiting is counted in stats().
+"""
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    def __init__(
+        self, connect, max_size=10, idle_timeout=300, wait_timeout=10,
+        max_lifetime=3600, check=None, check_interval=30,
+    ):
+        """
+        `connect` opens a new DB-API connection. `check(connection)` returns
+        whether an idle connection still works; it is only called for
+        connections idle longer than `check_interval` seconds
+        """
+        self.connect = connect
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.wait_timeout = wait_timeout
+        self.max_lifetime = max_lifetime
+        self.check = check
+        self.check_interval = check_interval
+        self._condition = threading.Condition()
+        # (connection, created, released) for idle connections, oldest first
+        self._idle = deque()
+        self._created = {}
+        self._size = 0
+        self.connections_created = 0
+        self.connections_closed = 0
+        self.acquired = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+        self.timeouts = 0
+
+    def acquire(self):
+        """
+        Return a connection, opening one if the pool is not full
+        """
+        started = time.monotonic()
+        deadline = started + self.wait_timeout
+        waited = False
+        while True:
+            with self._condition:
+                entry = self._take(deadline)
+                if entry is None:
+                    waited = True
+                    continue
+            if entry is True:
+                break
+            if self._usable(entry):
+                self._record_acquire(started, waited)
+                return entry[0]
+            self._discard(entry)
+        try:
+            connection = self.connect()
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self._created[id(connection)] = time.monotonic()
+            self.connections_created += 1
+        self._record_acquire(started, waited)
+        return connection
+
+    def _take(self, deadline):
+        """
+        An idle connection, True if a new one may be opened, or None after
+        waiting for a release. Called with the lock held
+        """
+        self._close_idle()
+        if self._idle:
+            return self._idle.pop()
+        if self._size < self.max_size:
+            self._size += 1
+            return True
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            self.timeouts += 1
+            raise PoolTimeout(
+                f'No database connection free after {self.wait_timeout}s '
+                f'({self.max_size} in use)'
+            )
+        self._condition.wait(remaining)
+        return None
+
+    def _record_acquire(self, started, waited):
+        with self._condition:
+            self.acquired += 1
+            if waited:
+                wait = time.monotonic() - started
+                self.waits += 1
+                self.wait_time += wait
+                self.max_wait = max(self.max_wait, wait)
+
+    def _usable(self, entry):
+        connection, created, released = entry
+        if getattr(connection, 'closed', False):
+            return False
+        if time.monotonic() - released > self.check_interval and self.check:
+            return self.check(connection)
+        return True
+
+    def release(self, connection, discard=False):
+        """
+        Return a connection to the pool, or close it if `discard` is set or
+        it has been open longer than `max_lifetime`
+        """
+        now = time.monotonic()
+        created = self._created.get(id(connection), now)
+        if discard or now - created > self.max_lifetime:
+            self._discard((connection, created, now))
+            return
+        with self._condition:
+            self._idle.append((connection, created, now))
+            self._condition.notify()
+
+    def _discard(self, entry):
+        connection = entry[0]
+        try:
+            connection.close()
+        except Exception:
+            pass
+        with self._condition:
+            self._created.pop(id(connection), None)
+            self._size -= 1
+            self.connections_closed += 1
+            self._condition.notify()
+
+    def _close_idle(self):
+        """
+        Close connections idle longer than idle_timeout. Called with the
+        lock held
+        """
+        cutoff = time.monotonic() - self.idle_timeout
+        while self._idle and self._idle[0][2] < cutoff:
+            connection = self._idle.popleft()[0]
+            try:
+                connection.close()
+            except Exception:
+                pass
+            self._created.pop(id(connection), None)
+            self._size -= 1
+            self.connections_closed += 1
+
+    def close_all(self):
+        with self._condition:
+            while self._idle:
+                connection = self._idle.popleft()[0]
+                connection.close()
+                self._created.pop(id(connection), None)
+                self._size -= 1
+                self.connections_closed += 1
+
+    def stats(self):
+        with self._condition:
+            return {
+                'max_size': self.max_size,
+                'open': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'connections_created': self.connections_created,
+                'connections_closed': self.connections_closed,
+                'acquired': self.acquired,
+                'waits': self.waits,
+                'wait_ms_total': round(self.wait_time * 1000, 3),
+                'wait_ms_max': round(self.max_wait * 1000, 3),
+                'timeouts': self.timeouts,
+            }
@@ -0,0 +1,85 @@
+"""
+PostgreSQL backend that takes its connections from an in-process pool
+(mysite/db/pool.py) shared by all threads, for threaded or ASGI workers
+where per-thread persistent connections would multiply.
+
+Enabled with DATABASE_POOL_MAX_SIZE (see settings.py). The pool options
+come from the POOL entry of the database settings; without it the backend
+behaves exactly like django.db.backends.postgresql. CONN_MAX_AGE should be
+0 so each request hands its connection back when it finishes.
+"""
+import threading
+import time
+
+from django.db.backends.postgresql.base import (
+    DatabaseWrapper as PostgreSQLDatabaseWrapper,
+)
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+from mysite import instrumentation
+from mysite.db.pool import ConnectionPool
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _check(connection):
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except Exception:
+        return False
+    return True
+
+
+class DatabaseWrapper(PostgreSQLDatabaseWrapper):
+    connection_pooling = True
+
+    @property
+    def pool(self):
+        """
+        The pool for this alias, or None when pooling is off
+        """
+        options = self.settings_dict.get('POOL')
+        if not options:
+            return None
+        with _pools_lock:
+            if self.alias not in _pools:
+                _pools[self.alias] = ConnectionPool(
+                    self._connect_for_pool,
+                    max_size=options.get('MAX_SIZE', 10),
+                    idle_timeout=options.get('IDLE_TIMEOUT', 300),
+                    wait_timeout=options.get('WAIT_TIMEOUT', 10),
+                    max_lifetime=options.get('MAX_LIFETIME', 3600),
+                    check=_check,
+                )
+            return _pools[self.alias]
+
+    def _connect_for_pool(self):
+        return super().get_new_connection(self.get_connection_params())
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        started = time.perf_counter()
+        connection = pool.acquire()
+        instrumentation.record_pool_wait(time.perf_counter() - started)
+        # normally set while connecting; a reused connection skips that
+        self.isolation_level = IsolationLevel(
+            self.settings_dict['OPTIONS'].get(
+                'isolation_level', IsolationLevel.READ_COMMITTED
+            )
+        )
+        return connection
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None:
+            return super()._close()
+        # a connection closed mid-transaction or after an error is not
+        # handed to the next request
+        pool.release(
+            self.connection,
+            discard=self.in_atomic_block or self.errors_occurred,
+        )
@@ -0,0 +1,107 @@
+"""
+Per-request performance counters, collected by
+mysite.middleware.PerformanceMiddleware.
+
+The counters for the request being handled live in a context variable, so
+the code that does the work (the SQL execute wrapper, the template backend
+below, the cache backend in mysite/cache.py, the connection pool) records into them without
+the request being passed around. Outside a sampled request every record_*
+call is a single ContextVar lookup.
+"""
+import time
+from contextvars import ContextVar
+
+from django.template.backends.django import DjangoTemplates, Template
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    __slots__ = (
+        'sql_count', 'sql_time', 'template_time', 'cache_hits',
+        'cache_misses', 'pool_acquires', 'pool_wait', '_template_depth',
+    )
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.pool_acquires = 0
+        self.pool_wait = 0.0
+        self._template_depth = 0
+
+
+def start():
+    """
+    Begin collecting for the current request; pass the token to stop()
+    """
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def stop(token):
+    _current.reset(token)
+
+
+def record_sql(execute, sql, params, many, context):
+    """
+    A connection.execute_wrapper() that counts and times every query
+    """
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start_time = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.sql_time += time.perf_counter() - start_time
+        metrics.sql_count += 1
+
+
+def record_cache(hits=0, misses=0):
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.cache_hits += hits
+        metrics.cache_misses += misses
+
+
+def record_pool_wait(seconds):
+    """
+    Time spent getting a connection from the pool (mysite/db/pool.py)
+    """
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.pool_acquires += 1
+        metrics.pool_wait += seconds
+
+
+class InstrumentedTemplate(Template):
+    def render(self, context=None, request=None):
+        metrics = _current.get()
+        if metrics is None:
+            return super().render(context, request)
+        # a template rendered from inside another one (render_to_string in
+        # a tag or context processor) is already inside the outer timing
+        metrics._template_depth += 1
+        start_time = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics._template_depth -= 1
+            if not metrics._template_depth:
+                metrics.template_time += time.perf_counter() - start_time
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """
+    The Django template backend, timing every top-level render
+    """
+
+    def from_string(self, template_code):
+        return InstrumentedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return InstrumentedTemplate(template.template, self)
@@ -0,0 +1,113 @@
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import instrumentation, routers
+
+logger = logging.getLogger('mysite.performance')
+
+
+class PerformanceMiddleware:
+    """
+    Record SQL count and time, template render time, cache hits and misses,
+    connection pool wait and total time for a sample of requests. The numbers are sent back in a
+    Server-Timing header (shown in the browser's network panel) and logged
+    as one JSON line on the mysite.performance logger.
+
+    Keep it first in MIDDLEWARE so the total covers the other middleware.
+    PERFORMANCE_SAMPLE_RATE (0.0 - 1.0) sets the share of requests that
+    are measured; the rest pass straight through.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'PERFORMANCE_SAMPLE_RATE', 1.0)
+
+    def __call__(self, request):
+        if self.sample_rate <= 0 or (
+            self.sample_rate < 1 and random.random() >= self.sample_rate
+        ):
+            return self.get_response(request)
+
+        metrics, token = instrumentation.start()
+        start_time = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(instrumentation.record_sql)
+                    )
+                response = self.get_response(request)
+        finally:
+            instrumentation.stop(token)
+        total = (time.perf_counter() - start_time) * 1000
+
+        sql_ms = metrics.sql_time * 1000
+        template_ms = metrics.template_time * 1000
+        pool_ms = metrics.pool_wait * 1000
+        timings = [
+            f'db;dur={sql_ms:.1f};desc="{metrics.sql_count} queries"',
+            f'tpl;dur={template_ms:.1f}',
+            f'cache;desc="{metrics.cache_hits} hits, {metrics.cache_misses} misses"',
+            f'total;dur={total:.1f}',
+        ]
+        if metrics.pool_acquires:
+            timings.insert(1, f'pool;dur={pool_ms:.1f}')
+        response['Server-Timing'] = ', '.join(timings)
+        match = getattr(request, 'resolver_match', None)
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'total_ms': round(total, 2),
+            'sql_count': metrics.sql_count,
+            'sql_ms': round(sql_ms, 2),
+            'template_ms': round(template_ms, 2),
+            'cache_hits': metrics.cache_hits,
+            'cache_misses': metrics.cache_misses,
+            'pool_wait_ms': round(pool_ms, 2),
+        }))
+        return response
+
+
+class ReplicaMiddleware:
+    """
+    Send the reads of safe requests to a read replica (see
+    mysite/routers.py) unless the visitor wrote recently, and pin visitors
+    who write to the primary for DATABASE_REPLICA_PIN_SECONDS.
+
+    Keep it before the session middleware so session reads and writes are
+    routed too. Without DATABASE_REPLICAS every request passes straight
+    through.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'DATABASE_REPLICAS', []):
+            return self.get_response(request)
+
+        use_replica = (
+            request.method in ('GET', 'HEAD', 'OPTIONS')
+            and routers.PIN_COOKIE not in request.COOKIES
+        )
+        state, token = routers.start(use_replica)
+        try:
+            response = self.get_response(request)
+        finally:
+            routers.stop(token)
+        if state.wrote:
+            response.set_cookie(
+                routers.PIN_COOKIE, '1',
+                max_age=getattr(settings, 'DATABASE_REPLICA_PIN_SECONDS', 10),
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
@@ -0,0 +1,84 @@
+"""
+Read replica routing with read-your-writes stickiness.
+
+Replicas are configured with DATABASE_REPLICA_URLS (see settings.py) and
+get the aliases listed in DATABASE_REPLICAS. Only reads made while
+handling a safe (GET/HEAD/OPTIONS) request go to a replica: writes, reads
+in unsafe requests and everything outside a request (management commands,
+shell) use the primary.
+
+mysite.middleware.ReplicaMiddleware opens the per-request state. One
+replica is picked per request, so all its reads see the same point in
+time. As soon as the request writes, its remaining reads go to the
+primary, and the response sets a cookie that keeps the visitor on the
+primary for DATABASE_REPLICA_PIN_SECONDS, long enough for the replicas to
+catch up with what they just wrote.
+
+Reads whose results go into a shared cache must not come from a lagging
+replica: a write's cache invalidation has run by the time it commits, so
+anything cached afterwards from the replica would stay stale. Code that
+fills such a cache reads the primary, either with an explicit
+using(DEFAULT_DB_ALIAS) or inside primary_reads().
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+PIN_COOKIE = 'db_pin'
+
+_current = ContextVar('replica_state', default=None)
+_primary = ContextVar('primary_reads', default=False)
+
+
+class RequestState:
+    __slots__ = ('replica', 'wrote')
+
+    def __init__(self, replica):
+        self.replica = replica
+        self.wrote = False
+
+
+def start(use_replica):
+    """
+    Begin routing for the current request; pass the token to stop()
+    """
+    replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+    replica = random.choice(replicas) if use_replica and replicas else None
+    state = RequestState(replica)
+    return state, _current.set(state)
+
+
+def stop(token):
+    _current.reset(token)
+
+
+@contextmanager
+def primary_reads():
+    """
+    Send every read in the block to the primary
+    """
+    token = _primary.set(True)
+    try:
+        yield
+    finally:
+        _primary.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _current.get()
+        if state is None or state.wrote or state.replica is None or _primary.get():
+            return 'default'
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _current.get()
+        if state is not None:
+            state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # every alias holds the same data
+        return True
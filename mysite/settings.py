@@ -21,6 +21,7 @@ from pathlib import Path
 import os
 import dj_database_url
 import sys
+import tempfile
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -75,6 +76,7 @@ INSTALLED_APPS = [
     'django.contrib.humanize',
     'blog.apps.BlogConfig',
     'account',
+    'booking.apps.BookingConfig',
 ]
 
 """
@@ -87,13 +89,17 @@ configure various aspects of our app, such as its name, verbose name, signal
 registrations, and more.
 """
 MIDDLEWARE = [
+    'mysite.middleware.PerformanceMiddleware',  # Server-Timing + timing log line
+    'mysite.middleware.ReplicaMiddleware',  # read replicas, pinning after writes
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Add whitenoise for static files
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'account.middleware.CachedAuthenticationMiddleware',  # request.user, optionally cached
     'django.contrib.messages.middleware.MessageMiddleware',
+    'blog.middleware.HoleMiddleware',  # per-user fragments of shared pages
+    'blog.middleware.PageCacheMiddleware',  # full-page cache
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -101,7 +107,8 @@ ROOT_URLCONF = 'mysite.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates with render timing for PerformanceMiddleware
+        'BACKEND': 'mysite.instrumentation.InstrumentedDjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -120,12 +127,54 @@ WSGI_APPLICATION = 'mysite.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
+# Connections are kept open for DATABASE_CONN_MAX_AGE seconds and reused by
+# later requests in the same worker thread (0 closes them after every
+# request); each is checked before reuse
+CONN_MAX_AGE = int(os.environ.get('DATABASE_CONN_MAX_AGE', '600'))
+
 DATABASES = {
     'default': dj_database_url.config(
-        default=os.environ.get('DATABASE_URL', 'sqlite:///' + str(BASE_DIR / 'db.sqlite3'))
+        default=os.environ.get('DATABASE_URL', 'sqlite:///' + str(BASE_DIR / 'db.sqlite3')),
+        conn_max_age=CONN_MAX_AGE,
+        conn_health_checks=True,
     )
 }
 
+# Read replicas, as comma-separated database URLs. Reads made by safe
+# requests are spread over them; see mysite/routers.py
+DATABASE_REPLICAS = []
+for index, url in enumerate(
+    filter(None, os.environ.get('DATABASE_REPLICA_URLS', '').split(',')), 1
+):
+    alias = f'replica{index}'
+    DATABASES[alias] = dj_database_url.parse(
+        url.strip(), conn_max_age=CONN_MAX_AGE, conn_health_checks=True
+    )
+    # tests run against the primary only
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['mysite.routers.ReplicaRouter']
+
+# Optional in-process connection pool for PostgreSQL, shared by the threads
+# of a worker (threaded gunicorn workers, ASGI); see mysite/db/postgresql/.
+# Connections then go back to the pool after each request instead of
+# staying with their thread
+DATABASE_POOL_MAX_SIZE = int(os.environ.get('DATABASE_POOL_MAX_SIZE', '0'))
+if DATABASE_POOL_MAX_SIZE:
+    for database in DATABASES.values():
+        if database['ENGINE'] == 'django.db.backends.postgresql':
+            database['ENGINE'] = 'mysite.db.postgresql'
+            database['CONN_MAX_AGE'] = 0
+            database['POOL'] = {
+                'MAX_SIZE': DATABASE_POOL_MAX_SIZE,
+                'IDLE_TIMEOUT': int(os.environ.get('DATABASE_POOL_IDLE_TIMEOUT', '300')),
+                'WAIT_TIMEOUT': int(os.environ.get('DATABASE_POOL_WAIT_TIMEOUT', '10')),
+            }
+
+# How long a visitor who wrote reads from the primary, in seconds
+DATABASE_REPLICA_PIN_SECONDS = int(os.environ.get('DATABASE_REPLICA_PIN_SECONDS', '10'))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -178,6 +227,56 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 LOGIN_REDIRECT_URL = 'blog:post_list'
 LOGIN_URL = 'login'
 
+# Sessions are read from the cache and only fall back to django_session on
+# a miss; the table is still written when a session changes, so logins
+# survive a cache flush. Expired rows are removed in batches by
+# `manage.py clear_expired_sessions`
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'default'
+
+# Seconds the logged-in user object is cached between requests, saving
+# the auth_user query on every authenticated hit (account/middleware.py).
+# 0 turns the cache off
+ACCOUNT_USER_CACHE = 'default'
+ACCOUNT_USER_CACHE_TIMEOUT = int(os.environ.get('ACCOUNT_USER_CACHE_TIMEOUT', '0'))
+
+# Flash messages (register, logout) travel in a signed cookie instead of
+# being written to the session
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
+# Cached "Most Commented" / "Highest Rated" sidebar fragment (blog/sidebar.py)
+# The alias must exist in CACHES; without a CACHES setting Django uses a
+# LocMemCache as 'default'
+BLOG_SIDEBAR_CACHE = 'default'
+BLOG_SIDEBAR_CACHE_TIMEOUT = 60 * 15
+
+# Comments shown per page on the review detail page; later pages are
+# loaded on demand from blog:post_comments
+BLOG_COMMENTS_PER_PAGE = 20
+
+# Use keyset (cursor) pagination for the review list instead of page numbers
+BLOG_CURSOR_PAGINATION = os.environ.get('BLOG_CURSOR_PAGINATION', 'False') == 'True'
+
+# Full-page cache (blog/page_cache.py). Off while running tests: the
+# cache outlives each test's rolled-back transaction
+BLOG_PAGE_CACHE_ENABLED = os.environ.get(
+    'BLOG_PAGE_CACHE_ENABLED', 'False' if IS_TESTING else 'True'
+) == 'True'
+BLOG_PAGE_CACHE = 'default'
+BLOG_PAGE_CACHE_TIMEOUT = 60
+
+# Booking exports and .ics feeds (booking/feeds.py). Staff can use them
+# with their session; scripts and calendar clients pass ?token= with this
+# value instead. Empty turns token access off
+BOOKING_FEED_TOKEN = os.environ.get('BOOKING_FEED_TOKEN', '')
+BOOKING_EXPORT_CHUNK_SIZE = 2000
+
+# Share of requests measured by mysite.middleware.PerformanceMiddleware
+# (off while running tests to keep the output readable)
+PERFORMANCE_SAMPLE_RATE = float(
+    os.environ.get('PERFORMANCE_SAMPLE_RATE', '0.0' if IS_TESTING else '1.0')
+)
+
 # Security settings for production
 if not DEBUG and not IS_TESTING:
     # Security headers
@@ -199,21 +298,47 @@ if not DEBUG and not IS_TESTING:
     TEMPLATES[0]['OPTIONS']['debug'] = False
     
     # Cache settings for production
+    # A bounded in-memory LRU per gunicorn worker in front of a SQLite file
+    # shared by all workers on the dyno, so an invalidation made by one
+    # worker is seen by the others (see mysite/cache.py)
     CACHES = {
         'default': {
-            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-            'LOCATION': 'unique-snowflake',
+            'BACKEND': 'mysite.cache.TwoTierCache',
+            'LOCATION': os.environ.get(
+                'CACHE_LOCATION',
+                os.path.join(tempfile.gettempdir(), 'horror-haven-cache.sqlite3')
+            ),
+            'OPTIONS': {
+                'MAX_ENTRIES': 100000,
+                'L1_MAX_ENTRIES': 1000,
+                'L1_MAX_BYTES': int(os.environ.get('CACHE_L1_MAX_BYTES', 16 * 1024 * 1024)),
+                # an L1 entry is served without asking SQLite for this many
+                # seconds, so other workers' writes (page purges, logouts,
+                # cached-user drops) show up at most this late. 0 checks on
+                # every read, which invalidation relies on
+                'L1_TTL': float(os.environ.get('CACHE_L1_TTL', 0)),
+            },
         }
     }
     
     # Logging configuration for production
+    # mysite.performance lines are bare JSON so log drains can parse them
     LOGGING = {
         'version': 1,
         'disable_existing_loggers': False,
+        'formatters': {
+            'message_only': {
+                'format': '%(message)s',
+            },
+        },
         'handlers': {
             'console': {
                 'class': 'logging.StreamHandler',
             },
+            'performance': {
+                'class': 'logging.StreamHandler',
+                'formatter': 'message_only',
+            },
         },
         'root': {
             'handlers': ['console'],
@@ -225,6 +350,11 @@ if not DEBUG and not IS_TESTING:
                 'level': 'INFO',
                 'propagate': False,
             },
+            'mysite.performance': {
+                'handlers': ['performance'],
+                'level': 'INFO',
+                'propagate': False,
+            },
         },
     }
 else:
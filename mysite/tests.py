@@ -0,0 +1,366 @@
+import json
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from unittest import mock, skipIf
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, router
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from blog import page_cache, sidebar
+from blog.middleware import PageCacheMiddleware
+from blog.models import Review
+
+from . import routers
+from .cache import TwoTierCache
+from .db.pool import ConnectionPool, PoolTimeout
+from .middleware import ReplicaMiddleware
+
+try:
+    from .db.postgresql import base as pooled_postgresql
+except ImproperlyConfigured:
+    # psycopg is not installed
+    pooled_postgresql = None
+
+
+class TwoTierCacheTest(SimpleTestCase):
+    """Test cases for the L1 + shared SQLite cache backend"""
+
+    def setUp(self):
+        """Two backend instances on one file stand in for two workers"""
+        self.directory = tempfile.mkdtemp()
+        self.location = f'{self.directory}/cache.sqlite3'
+        params = {'OPTIONS': {'L1_MAX_ENTRIES': 3, 'L1_MAX_BYTES': 4096}}
+        self.worker_a = TwoTierCache(self.location, params)
+        self.worker_b = TwoTierCache(self.location, params)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_write_is_seen_by_other_worker(self):
+        """Test that one worker's write invalidates the other's L1 copy"""
+        self.worker_a.set('sidebar', 'v1')
+        self.assertEqual(self.worker_b.get('sidebar'), 'v1')
+        self.assertEqual(self.worker_b.get('sidebar'), 'v1')
+        self.worker_a.set('sidebar', 'v2')
+        self.assertEqual(self.worker_b.get('sidebar'), 'v2')
+        self.worker_a.delete('sidebar')
+        self.assertIsNone(self.worker_b.get('sidebar'))
+
+    def test_clear_is_seen_by_other_worker(self):
+        """Test that clear() empties every worker's view of the cache"""
+        self.worker_a.set('key', 1)
+        self.worker_b.get('key')
+        self.worker_a.clear()
+        self.assertFalse(self.worker_b.has_key('key'))
+        self.assertIsNone(self.worker_b.get('key'))
+
+    def test_tier_stats(self):
+        """Test that hits are counted per tier"""
+        self.worker_a.set('key', 'value')
+        self.worker_b.get('key')  # L1 miss, L2 hit
+        self.worker_b.get('key')  # L1 hit, after a stamp check in L2
+        self.worker_b.get('missing')  # miss in both
+        stats = self.worker_b.stats()
+        self.assertEqual(stats['l1_hits'], 1)
+        self.assertEqual(stats['l1_checked'], 1)
+        self.assertEqual(stats['l1_misses'], 2)
+        self.assertEqual(stats['l2_hits'], 1)
+        self.assertEqual(stats['l2_misses'], 1)
+        self.assertEqual(stats['l2_hit_rate'], 0.5)
+
+    def test_l1_ttl(self):
+        """Test that L1 is trusted without a query for L1_TTL seconds"""
+        worker_c = TwoTierCache(self.location, {'OPTIONS': {'L1_TTL': 60}})
+        self.worker_a.set('key', 'v1')
+        self.assertEqual(worker_c.get('key'), 'v1')
+        self.worker_a.set('key', 'v2')
+        # still within L1_TTL: the old value, served from memory
+        self.assertEqual(worker_c.get('key'), 'v1')
+        stats = worker_c.stats()
+        self.assertEqual((stats['l1_hits'], stats['l1_checked']), (1, 0))
+        later = time.monotonic() + 61
+        with mock.patch('mysite.cache.time.monotonic', return_value=later):
+            self.assertEqual(worker_c.get('key'), 'v2')
+
+    def test_l1_is_bounded(self):
+        """Test the LRU entry and memory caps"""
+        for i in range(5):
+            self.worker_a.set(f'key{i}', i)
+        stats = self.worker_a.stats()
+        self.assertEqual(stats['l1_entries'], 3)
+        self.worker_a.set('big', 'x' * 10000)  # larger than L1_MAX_BYTES
+        self.assertLessEqual(self.worker_a.stats()['l1_bytes'], 4096)
+        self.assertEqual(self.worker_a.get('big'), 'x' * 10000)
+        # evicted from L1 but still in the shared tier
+        self.assertEqual(self.worker_a.get('key0'), 0)
+
+    def test_expiry_add_and_incr(self):
+        """Test timeouts, add() and atomic incr()"""
+        self.worker_a.set('short', 'value', timeout=0.05)
+        time.sleep(0.1)
+        self.assertIsNone(self.worker_b.get('short'))
+        self.assertTrue(self.worker_a.add('counter', 1))
+        self.assertFalse(self.worker_b.add('counter', 5))
+        self.assertEqual(self.worker_b.incr('counter'), 2)
+        self.assertEqual(self.worker_a.get('counter'), 2)
+        with self.assertRaises(ValueError):
+            self.worker_a.incr('missing')
+
+
+@override_settings(PERFORMANCE_SAMPLE_RATE=1.0)
+class PerformanceMiddlewareTest(TestCase):
+    """Test cases for the Server-Timing / structured log middleware"""
+
+    def setUp(self):
+        """Set up test data"""
+        user = User.objects.create_user(username='testuser', password='testpass123')
+        Review.objects.create(
+            title='Test Horror Film',
+            slug='test-horror-film',
+            author=user,
+            film_title='Test Film',
+            year=2024,
+            director='Test Director',
+            rating=4,
+            body='This is a test horror film review.',
+            status=Review.Status.PUBLISHED
+        )
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_server_timing_and_log_line(self):
+        """Test that the header and the log line agree with what ran"""
+        with self.assertLogs('mysite.performance', 'INFO') as logs, \
+                CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('blog:post_list'))
+        self.assertEqual(response.status_code, 200)
+        timing = response['Server-Timing']
+        self.assertIn('db;dur=', timing)
+        self.assertIn(f'desc="{len(queries)} queries"', timing)
+        self.assertIn('tpl;dur=', timing)
+        self.assertIn('total;dur=', timing)
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line['view'], 'blog:post_list')
+        self.assertEqual(line['status'], 200)
+        self.assertEqual(line['sql_count'], len(queries))
+        self.assertGreater(line['template_ms'], 0)
+        self.assertGreaterEqual(line['total_ms'], line['sql_ms'])
+
+    def test_cache_hits_and_misses(self):
+        """Test that cache lookups are counted per request"""
+        caches = {'default': {
+            'BACKEND': 'mysite.cache.TwoTierCache',
+            'LOCATION': f'{self.directory}/cache.sqlite3',
+        }}
+        with override_settings(CACHES=caches):
+            sidebar.bump_version()
+            with self.assertLogs('mysite.performance', 'INFO') as logs:
+                self.client.get(reverse('blog:post_list'))
+                response = self.client.get(reverse('blog:post_list'))
+        first, second = (json.loads(record.getMessage()) for record in logs.records)
+        self.assertGreater(first['cache_misses'], 0)
+        self.assertEqual(second['cache_misses'], 0)
+        self.assertGreater(second['cache_hits'], 0)
+        self.assertIn(f'desc="{second["cache_hits"]} hits, 0 misses"', response['Server-Timing'])
+
+    @override_settings(PERFORMANCE_SAMPLE_RATE=0.0)
+    def test_unsampled_requests_pass_through(self):
+        """Test that a zero sample rate adds nothing to the response"""
+        response = self.client.get(reverse('blog:post_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Server-Timing'))
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class ReplicaRoutingTest(SimpleTestCase):
+    """Test cases for read replica routing and pinning after writes"""
+
+    def setUp(self):
+        """A view that records where its reads would go"""
+        self.factory = RequestFactory()
+        self.reads = []
+
+    def view(self, write=False):
+        def view(request):
+            self.reads.append(router.db_for_read(Review))
+            if write:
+                router.db_for_write(Review)
+                self.reads.append(router.db_for_read(Review))
+            return HttpResponse()
+        return ReplicaMiddleware(view)
+
+    def test_safe_requests_read_from_replica(self):
+        """Test that GET reads go to the replica and set no cookie"""
+        response = self.view()(self.factory.get('/'))
+        self.assertEqual(self.reads, ['replica1'])
+        self.assertNotIn(routers.PIN_COOKIE, response.cookies)
+
+    def test_write_pins_to_primary(self):
+        """Test that reads after a write use the primary and the visitor is pinned"""
+        response = self.view(write=True)(self.factory.post('/'))
+        self.assertEqual(self.reads, ['default', 'default'])
+        cookie = response.cookies[routers.PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], 10)
+        request = self.factory.get('/')
+        request.COOKIES[routers.PIN_COOKIE] = cookie.value
+        self.view()(request)
+        self.assertEqual(self.reads[-1], 'default')
+
+    def test_write_in_safe_request_pins(self):
+        """Test that a GET which writes reads its own write back"""
+        response = self.view(write=True)(self.factory.get('/'))
+        self.assertEqual(self.reads, ['replica1', 'default'])
+        self.assertIn(routers.PIN_COOKIE, response.cookies)
+
+    def test_outside_requests_use_primary(self):
+        """Test that management commands and the shell never use a replica"""
+        self.assertEqual(router.db_for_read(Review), 'default')
+
+    def test_primary_reads_in_safe_request(self):
+        """Test that reads filling a shared cache can be sent to the primary"""
+        def view(request):
+            self.reads.append(router.db_for_read(Review))
+            with routers.primary_reads():
+                self.reads.append(router.db_for_read(Review))
+            self.reads.append(router.db_for_read(Review))
+            return HttpResponse()
+        ReplicaMiddleware(view)(self.factory.get('/'))
+        self.assertEqual(self.reads, ['replica1', 'default', 'replica1'])
+
+    @override_settings(BLOG_PAGE_CACHE_ENABLED=True)
+    def test_page_cache_miss_reads_primary_only_for_cacheable_views(self):
+        """Test that only views whose pages may be stored read the primary"""
+        def view(request):
+            self.reads.append(router.db_for_read(Review))
+            return HttpResponse()
+
+        def get_response(request):
+            middleware.process_view(request, request.view, (), {})
+            return request.view(request)
+        middleware = PageCacheMiddleware(get_response)
+        for request_view in (view, page_cache.cacheable(lambda request: view(request))):
+            request = self.factory.get('/')
+            request.view = request_view
+            ReplicaMiddleware(middleware)(request)
+            self.assertEqual(router.db_for_read(Review), 'default')
+        self.assertEqual(self.reads, ['replica1', 'default'])
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas_configured(self):
+        """Test that without replicas every read goes to the primary"""
+        self.view()(self.factory.get('/'))
+        self.assertEqual(self.reads, ['default'])
+
+
+class ConnectionPoolTest(SimpleTestCase):
+    """Test cases for the in-process database connection pool"""
+
+    def pool(self, **kwargs):
+        pool = ConnectionPool(
+            lambda: sqlite3.connect(':memory:', check_same_thread=False), **kwargs
+        )
+        self.addCleanup(pool.close_all)
+        return pool
+
+    def test_released_connection_is_reused(self):
+        """Test that a released connection is handed out again"""
+        pool = self.pool()
+        first = pool.acquire()
+        pool.release(first)
+        self.assertIs(pool.acquire(), first)
+        stats = pool.stats()
+        self.assertEqual(stats['connections_created'], 1)
+        self.assertEqual(stats['acquired'], 2)
+        self.assertEqual(stats['in_use'], 1)
+
+    def test_full_pool_times_out(self):
+        """Test that acquire gives up after the wait timeout"""
+        pool = self.pool(max_size=1, wait_timeout=0.05)
+        pool.acquire()
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+        self.assertEqual(pool.stats()['timeouts'], 1)
+
+    def test_wait_for_release_is_measured(self):
+        """Test that a waiting thread gets the released connection"""
+        pool = self.pool(max_size=1)
+        held = pool.acquire()
+        threading.Timer(0.05, pool.release, [held]).start()
+        self.assertIs(pool.acquire(), held)
+        stats = pool.stats()
+        self.assertEqual(stats['waits'], 1)
+        self.assertGreaterEqual(stats['wait_ms_max'], 40)
+
+    def test_idle_and_discarded_connections_are_closed(self):
+        """Test the idle timeout, discarding and failed health checks"""
+        pool = self.pool(idle_timeout=0)
+        first = pool.acquire()
+        pool.release(first)
+        self.assertIsNot(pool.acquire(), first)
+        self.assertEqual(pool.stats()['connections_closed'], 1)
+
+        pool = self.pool(check=lambda connection: False, check_interval=0)
+        first = pool.acquire()
+        pool.release(first)
+        second = pool.acquire()
+        self.assertIsNot(second, first)
+        pool.release(second, discard=True)
+        self.assertEqual(pool.stats()['open'], 0)
+        self.assertEqual(pool.stats()['connections_closed'], 2)
+
+
+@skipIf(pooled_postgresql is None, 'psycopg is not installed')
+class PooledDatabaseWrapperTest(SimpleTestCase):
+    """Test cases for the pooled PostgreSQL backend"""
+
+    def wrapper(self, alias, pool=None):
+        settings_dict = {
+            'ENGINE': 'mysite.db.postgresql', 'NAME': 'horror_haven', 'USER': '',
+            'PASSWORD': '', 'HOST': '', 'PORT': '', 'OPTIONS': {}, 'TEST': {},
+            'ATOMIC_REQUESTS': False, 'AUTOCOMMIT': True, 'CONN_MAX_AGE': 0,
+            'CONN_HEALTH_CHECKS': False, 'TIME_ZONE': None, 'POOL': pool,
+        }
+        self.addCleanup(pooled_postgresql._pools.pop, alias, None)
+        return pooled_postgresql.DatabaseWrapper(settings_dict, alias)
+
+    def test_connections_are_returned_to_the_pool(self):
+        """Test that _close() releases the connection for the next request"""
+        wrapper = self.wrapper('pooled', {'MAX_SIZE': 2})
+        raw = mock.Mock(closed=False)
+        with mock.patch.object(wrapper, '_connect_for_pool', return_value=raw):
+            wrapper.connection = wrapper.get_new_connection({})
+            self.assertIs(wrapper.connection, raw)
+            wrapper._close()
+            raw.close.assert_not_called()
+            self.assertIs(wrapper.get_new_connection({}), raw)
+        stats = wrapper.pool.stats()
+        self.assertEqual(stats['connections_created'], 1)
+        self.assertEqual(stats['acquired'], 2)
+
+    def test_broken_connections_are_discarded(self):
+        """Test that a connection closed after an error is not reused"""
+        wrapper = self.wrapper('pooled-errors', {'MAX_SIZE': 2})
+        raw = mock.Mock(closed=False)
+        with mock.patch.object(wrapper, '_connect_for_pool', return_value=raw):
+            wrapper.connection = wrapper.get_new_connection({})
+        wrapper.errors_occurred = True
+        wrapper._close()
+        raw.close.assert_called_once_with()
+        self.assertEqual(wrapper.pool.stats()['open'], 0)
+
+    def test_without_pool_options(self):
+        """Test that the backend connects directly when POOL is not set"""
+        wrapper = self.wrapper('unpooled')
+        self.assertIsNone(wrapper.pool)
+        parent = pooled_postgresql.PostgreSQLDatabaseWrapper
+        with mock.patch.object(parent, 'get_new_connection', return_value='raw') as connect:
+            self.assertEqual(wrapper.get_new_connection({'dbname': 'x'}), 'raw')
+        connect.assert_called_once_with({'dbname': 'x'})
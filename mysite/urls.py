@@ -10,4 +10,5 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('account/', include('account.urls')),
     path('blog/', include('blog.urls', namespace='blog')),
+    path('booking/', include('booking.urls', namespace='booking')),
 ]